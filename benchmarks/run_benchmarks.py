@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Benchmark suite for the hot paths of the Python modules
+
+Every benchmark times one operation, asv style: the number of calls per
+sample is calibrated so a sample lasts at least 50ms, several
+samples are taken and the per-call minimum, median and spread are kept.
+Database benchmarks run in local mode against stores already holding
+1, 1k and 100k players and guilds.
+
+Results are written as JSON to benchmarks/results/, one file per run,
+tagged with the commit, so runs can be compared over time.
+
+Usage:
+    python benchmarks/run_benchmarks.py run [--sizes 1,1000,100000] [--filter NAME] [--output FILE]
+    python benchmarks/run_benchmarks.py compare OLD.json NEW.json [--threshold 1.10]
+    
+With no command every benchmark runs with the default sizes.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import questions
+from combat import CombatSystem, Enemy
+from database import Database
+from guild import Guild
+from player import Player
+from session import Session
+
+RESULTS_FORMAT = 1
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ENTITY_SIZES = (1, 1000, 100000)
+
+BENCHMARKS = []  # (name, sized, setup)
+
+
+def benchmark(name, sized=False):
+    """Register a benchmark
+    
+    The decorated setup function is called as setup(size, stores) and returns
+    the operation to time; setup work is not measured.
+    
+    Args:
+        name (str): Benchmark name
+        sized (bool, optional): Whether to run at every entity size. Defaults to False.
+        
+    Returns:
+        callable: Decorator
+    """
+    def register(setup):
+        BENCHMARKS.append((name, sized, setup))
+        return setup
+    return register
+
+
+class Stores:
+    """Local-mode databases pre-filled with players and guilds, one per size
+    
+    Filling 100k entities takes a while, so each store is built once per run
+    and shared by every database benchmark.
+    """
+    
+    def __init__(self, root):
+        self.root = Path(root)
+        self._databases = {}
+    
+    def get(self, size):
+        """Get a database holding size players and size guilds
+        
+        Args:
+            size (int): Number of players and of guilds
+            
+        Returns:
+            Database: Local-mode database
+        """
+        if size not in self._databases:
+            data_dir = self.root / f"size-{size}"
+            _fill_store(data_dir, size)
+            db = Database(use_firebase=False, use_wal=False, data_dir=str(data_dir))
+            db.list_guilds_page(limit=1)  # Build the guild index now rather than in the first timed call
+            self._databases[size] = db
+        return self._databases[size]
+
+
+def _player_data(i):
+    player = Player(f"player{i:06d}", str(1 + i % 12))
+    player.xp = i % 5000
+    return player.to_dict()
+
+
+def _guild_data(i, members=8):
+    guild = Guild(f"Guild {i}", "Benchmark guild", f"player{i:06d}", subject_focus="math")
+    guild.id = f"g{i:07d}"
+    for m in range(1, members):
+        guild.add_member(f"player{(i + m) % 100000:06d}")
+    guild.member_xp = {user_id: 10 * m for m, user_id in enumerate(guild.members)}
+    guild.created_at = 1700000000.0 + i
+    return guild.to_dict()
+
+
+def _fill_store(data_dir, size):
+    """Write players and guilds straight to disk in the local storage layout
+    
+    Args:
+        data_dir (Path): Data directory
+        size (int): Number of players and of guilds
+    """
+    for collection, make in (("players", _player_data), ("guilds", _guild_data)):
+        directory = data_dir / collection
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(size):
+            data = make(i)
+            doc_id = data["name"] if collection == "players" else data["id"]
+            with open(directory / f"{doc_id}.json", "w") as f:
+                json.dump(data, f)
+
+
+def _question_pool(size):
+    return [
+        {"question": f"What is {i} + {i}?", "options": [str(2 * i), str(i), str(i + 1), str(3 * i)],
+         "answer": str(2 * i), "difficulty": 1 + i % 10}
+        for i in range(size)
+    ]
+
+
+# Questions and combat
+
+@benchmark("questions.select", sized=True)
+def bench_question_select(size, stores):
+    questions.QUESTIONS_DB.setdefault("bench", {})["1"] = _question_pool(size)
+    return lambda: questions.get_questions_by_subject_and_grade("bench", "1", 3)
+
+
+@benchmark("combat.enemy_question", sized=True)
+def bench_enemy_question(size, stores):
+    enemy = Enemy("Bench Golem", "", "math", 100, _question_pool(size))
+    rng = random.Random(0)
+    return lambda: enemy.get_random_question(rng)
+
+
+@benchmark("combat.calculate_damage")
+def bench_calculate_damage(size, stores):
+    player = Player("Bench", "10")
+    player.level = 12
+    player.traits["math"] = 80
+    player.add_to_inventory("Math Textbook")
+    player.add_to_inventory("Microscope", 2)
+    combat = CombatSystem(player, session=Session(seed=0))
+    combat.enemy = Enemy("Fraction Phantom", "", "math", 60, [])
+    return lambda: combat._calculate_damage(25)
+
+
+# Players
+
+@benchmark("player.gain_xp")
+def bench_gain_xp(size, stores):
+    state = {"player": Player("Bench", "10")}
+    
+    def gain():
+        player = state["player"]
+        if player.level >= 50:  # Keep level-ups in the mix instead of saturating at the cap
+            player = state["player"] = Player("Bench", "10")
+        player.gain_xp(40, "math")
+    return gain
+
+
+# Guilds
+
+@benchmark("guild.add_chat_message")
+def bench_add_chat_message(size, stores):
+    guild = Guild("Bench Guild", "", "leader")
+    for i in range(100):  # Full history, so every message also trims it
+        guild.add_chat_message("leader", "Leader", f"warm-up {i}", now=1700000000.0 + i)
+    return lambda: guild.add_chat_message("leader", "Leader", "Anyone up for the fractions quest?", now=1700000200.0)
+
+
+@benchmark("guild.to_dict", sized=True)
+def bench_guild_to_dict(size, stores):
+    guild = Guild.from_dict(_guild_data(0, members=size))
+    return guild.to_dict
+
+
+@benchmark("guild.from_dict", sized=True)
+def bench_guild_from_dict(size, stores):
+    data = _guild_data(0, members=size)
+    return lambda: Guild.from_dict(data)
+
+
+# Database, local mode
+
+@benchmark("database.save_player", sized=True)
+def bench_save_player(size, stores):
+    db = stores.get(size)
+    data = _player_data(size)  # One extra player, overwritten on every call
+    return lambda: db.save_player(data)
+
+
+@benchmark("database.get_player", sized=True)
+def bench_get_player(size, stores):
+    db = stores.get(size)
+    player_id = _player_data(size // 2)["name"]
+    return lambda: db.get_player(player_id)
+
+
+@benchmark("database.list_players", sized=True)
+def bench_list_players(size, stores):
+    return stores.get(size).list_players
+
+
+@benchmark("database.save_guild", sized=True)
+def bench_save_guild(size, stores):
+    db = stores.get(size)
+    data = _guild_data(size)
+    return lambda: db.save_guild(data)
+
+
+@benchmark("database.get_guild", sized=True)
+def bench_get_guild(size, stores):
+    db = stores.get(size)
+    guild_id = _guild_data(size // 2)["id"]
+    return lambda: db.get_guild(guild_id)
+
+
+@benchmark("database.list_guilds", sized=True)
+def bench_list_guilds(size, stores):
+    return stores.get(size).list_guilds
+
+
+def measure(operation, sample_time=0.05, repeat=7):
+    """Time an operation
+    
+    Args:
+        operation (callable): Operation to time
+        sample_time (float, optional): Least seconds per sample. Defaults to 0.05.
+        repeat (int, optional): Number of samples. Defaults to 7.
+        
+    Returns:
+        dict: Seconds per call (min, median, stddev) and the calls per sample
+    """
+    # Calibrate: double the calls per sample until one sample is long enough
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - start
+        if elapsed >= sample_time:
+            break
+        number *= 2 if elapsed * 10 >= sample_time else 10
+    
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        samples.append((time.perf_counter() - start) / number)
+    
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeat": len(samples)
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def run(sizes=ENTITY_SIZES, name_filter=None, sample_time=0.05, repeat=7):
+    """Run the benchmarks
+    
+    Args:
+        sizes (tuple, optional): Entity sizes of sized benchmarks. Defaults to ENTITY_SIZES.
+        name_filter (str, optional): Only run benchmarks whose name contains this. Defaults to all.
+        sample_time (float, optional): Least seconds per sample. Defaults to 0.05.
+        repeat (int, optional): Number of samples. Defaults to 7.
+        
+    Returns:
+        dict: Run metadata and results
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        stores = Stores(root)
+        for name, sized, setup in BENCHMARKS:
+            if name_filter and name_filter not in name:
+                continue
+            for size in (sizes if sized else (None,)):
+                # The game prints to stdout (level-ups, storage messages); keep it out of the report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    operation = setup(size, stores)
+                    timing = measure(operation, sample_time, repeat)
+                results.append({"name": name, "size": size, **timing})
+                label = name if size is None else f"{name}[{size}]"
+                print(f"{label:<34} {_format_seconds(timing['median']):>10} "
+                      f"(min {_format_seconds(timing['min'])}, {timing['number']} x {timing['repeat']})")
+    
+    return {
+        "format": RESULTS_FORMAT,
+        "commit": _git_commit(),
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+def compare(old_path, new_path, threshold=1.10):
+    """Print the change of every benchmark between two result files
+    
+    Args:
+        old_path (str): Baseline results
+        new_path (str): New results
+        threshold (float, optional): Ratio of medians beyond which a change is flagged. Defaults to 1.10.
+        
+    Returns:
+        bool: True if no benchmark got slower than the threshold
+    """
+    with open(old_path, "r") as f:
+        old = json.load(f)
+    with open(new_path, "r") as f:
+        new = json.load(f)
+    
+    baseline = {(result["name"], result["size"]): result for result in old["results"]}
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    print(f"{'Benchmark':<34} {'before':>10} {'after':>10} {'ratio':>7}")
+    
+    ok = True
+    for result in new["results"]:
+        before = baseline.get((result["name"], result["size"]))
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"]
+        flag = ""
+        if ratio > threshold:
+            flag, ok = "  slower", False
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        label = result["name"] if result["size"] is None else f"{result['name']}[{result['size']}]"
+        print(f"{label:<34} {_format_seconds(before['median']):>10} {_format_seconds(result['median']):>10} "
+              f"{ratio:>6.2f}x{flag}")
+    return ok
+
+
+def _sizes(value):
+    """Parse a comma-separated list of entity sizes for argparse"""
+    try:
+        sizes = tuple(int(size) for size in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"sizes must be comma-separated integers, not {value!r}")
+    if any(size < 1 for size in sizes):
+        raise argparse.ArgumentTypeError("sizes must be positive")
+    return sizes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark suite for the EduRPG hot paths")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    run_parser = commands.add_parser("run", help="run the benchmarks and write a results file (the default)")
+    run_parser.add_argument("--sizes", type=_sizes, default=ENTITY_SIZES, metavar="N,N,...",
+                            help=f"entity sizes of sized benchmarks (default: {','.join(map(str, ENTITY_SIZES))})")
+    run_parser.add_argument("--filter", dest="name_filter", metavar="NAME", help="only run benchmarks whose name contains NAME")
+    run_parser.add_argument("--output", metavar="FILE", help="results file (default: a new file in benchmarks/results/)")
+    compare_parser = commands.add_parser("compare", help="compare two results files and flag regressions")
+    compare_parser.add_argument("old_path", metavar="OLD.json", help="baseline results")
+    compare_parser.add_argument("new_path", metavar="NEW.json", help="new results")
+    compare_parser.add_argument("--threshold", type=float, default=1.10,
+                                help="ratio of medians beyond which a change is flagged (default: 1.10)")
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args(["run"])
+    
+    if args.command == "compare":
+        sys.exit(0 if compare(args.old_path, args.new_path, args.threshold) else 1)
+    
+    output_path = args.output
+    report = run(args.sizes, args.name_filter)
+    
+    if output_path is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(report["created_at"]))
+        output_path = RESULTS_DIR / f"{stamp}-{report['commit'] or 'nogit'}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output_path}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Multi-process stress test for quest progress counters and guild writes
+
+Many processes hammer one guild at once: every process adds progress to the
+same quest and joins the guild through version-checked writes. The final
+counter and member list must account for every single update.
+
+Usage: python benchmarks/stress_quest_progress.py [processes] [increments]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from guild import Guild, GuildSystem
+from player import Player
+
+
+def _worker(args):
+    data_dir, guild_id, quest_id, worker_id, increments = args
+    os.chdir(data_dir)
+    db = Database(use_firebase=False, use_wal=False)  # Workers are separate processes
+    guild_system = GuildSystem(Player(f"worker{worker_id}", "7"), db)
+    
+    for _ in range(increments):
+        db.increment_quest_progress(guild_id, quest_id, 1)
+    
+    # Contended read-modify-write of the guild document itself
+    joined = guild_system._update_guild(guild_id, lambda g: g.add_member(f"worker{worker_id}"), max_attempts=100)
+    return bool(joined)
+
+
+def run(processes=16, increments=500):
+    """Run the stress test
+    
+    Args:
+        processes (int, optional): Number of worker processes. Defaults to 16.
+        increments (int, optional): Increments per process. Defaults to 500.
+        
+    Returns:
+        bool: True if no update was lost
+    """
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.chdir(data_dir)
+        db = Database(use_firebase=False, use_wal=False)
+        
+        guild = Guild("Stress Guild", "Contention test", "leader")
+        quest_id = "stress01"
+        guild.add_quest({"id": quest_id, "name": "Stress", "progress": 0, "goal": {"count": processes * increments}})
+        db.save_guild(guild.to_dict())
+        
+        start = time.perf_counter()
+        with Pool(processes) as pool:
+            results = pool.map(_worker, [(data_dir, guild.id, quest_id, i, increments) for i in range(processes)])
+        elapsed = time.perf_counter() - start
+        
+        final = db.get_guild(guild.id)
+        progress = final["quests"][0]["progress"]
+        members = len(final["members"]) - 1  # Leader was already a member
+        expected = processes * increments
+        
+        print(f"{expected} increments from {processes} processes in {elapsed:.2f}s "
+              f"({expected / elapsed:.0f} increments/sec)")
+        print(f"Quest progress: {progress}/{expected}, members joined: {members}/{processes}, "
+              f"guild version: {final['version']}")
+        
+        ok = progress == expected and members == processes and all(results)
+        print("PASS: no lost updates" if ok else "FAIL: updates were lost")
+        return ok
+
+
+if __name__ == "__main__":
+    process_count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    increment_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    sys.exit(0 if run(process_count, increment_count) else 1)
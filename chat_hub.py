@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Chat hub module for pushing guild chat messages to live sessions
+"""
+
+import asyncio
+import time
+from collections import deque
+
+# What to do when a subscriber's buffer is full
+DROP_OLDEST = "drop_oldest"  # Discard the oldest buffered message
+DROP_NEWEST = "drop_newest"  # Discard the incoming message
+DISCONNECT = "disconnect"  # Close the subscription of the slow consumer
+SLOW_CONSUMER_POLICIES = (DROP_OLDEST, DROP_NEWEST, DISCONNECT)
+
+
+class ChatSubscription:
+    """One session's bounded feed of a guild's chat"""
+    
+    def __init__(self, guild_id, maxsize=100, policy=DROP_OLDEST):
+        """Initialize a subscription
+        
+        Args:
+            guild_id (str): ID of the guild
+            maxsize (int, optional): Messages buffered before the policy applies. Defaults to 100.
+            policy (str, optional): Slow-consumer policy. Defaults to DROP_OLDEST.
+        """
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow-consumer policy: {policy}")
+        
+        self.guild_id = guild_id
+        self.policy = policy
+        self.queue = asyncio.Queue(maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+    
+    def offer(self, message):
+        """Buffer a message without blocking the publisher
+        
+        Args:
+            message (dict): Chat message
+            
+        Returns:
+            bool: True if buffered, False if dropped or closed
+        """
+        if self.closed:
+            return False
+        
+        if self.queue.full():
+            if self.policy == DROP_NEWEST:
+                self.dropped += 1
+                return False
+            if self.policy == DISCONNECT:
+                self.close()
+                return False
+            self.queue.get_nowait()  # DROP_OLDEST
+            self.dropped += 1
+        
+        self.queue.put_nowait(message)
+        self.delivered += 1
+        return True
+    
+    def close(self):
+        """Stop the subscription; a waiting consumer receives None"""
+        if self.closed:
+            return
+        
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+    
+    async def get(self):
+        """Wait for the next message
+        
+        Returns:
+            dict: Chat message, or None once the subscription is closed
+        """
+        if self.closed and self.queue.empty():
+            return None
+        return await self.queue.get()
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        message = await self.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class _GuildChannel:
+    """Subscribers and throughput counters of one guild"""
+    
+    def __init__(self):
+        self.subscriptions = set()
+        self.published = 0
+        self.delivered = 0  # Of subscriptions that have left
+        self.dropped = 0  # Of subscriptions that have left
+        self.recent = deque()  # Publish timestamps inside the rate window
+
+
+class ChatHub:
+    """In-process pub/sub hub fanning guild chat out to subscribed sessions
+    
+    Publishing never blocks: every subscriber has a bounded queue and a
+    slow-consumer policy. With a broker attached, messages travel through
+    the broker so hubs in other server processes receive them too.
+    """
+    
+    RATE_WINDOW = 5.0  # Seconds of history used for messages/sec
+    
+    def __init__(self, broker=None):
+        """Initialize the hub
+        
+        Args:
+            broker (LocalBroker, optional): Broker shared between hubs. Defaults to None.
+        """
+        self.broker = broker
+        self._channels = {}  # Guild ID -> _GuildChannel
+        self._loop = None
+    
+    def subscribe(self, guild_id, maxsize=100, policy=DROP_OLDEST):
+        """Subscribe a session to a guild's chat
+        
+        Must be called from the event loop that will consume the messages.
+        
+        Args:
+            guild_id (str): ID of the guild
+            maxsize (int, optional): Messages buffered per subscriber. Defaults to 100.
+            policy (str, optional): Slow-consumer policy. Defaults to DROP_OLDEST.
+            
+        Returns:
+            ChatSubscription: The new subscription
+        """
+        self._loop = asyncio.get_running_loop()
+        channel = self._channels.get(guild_id)
+        if channel is None:
+            channel = self._channels[guild_id] = _GuildChannel()
+            if self.broker:
+                self.broker.subscribe(self._topic(guild_id), self._deliver)
+        
+        subscription = ChatSubscription(guild_id, maxsize, policy)
+        channel.subscriptions.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        """Remove a subscription
+        
+        Args:
+            subscription (ChatSubscription): Subscription to remove
+        """
+        subscription.close()
+        channel = self._channels.get(subscription.guild_id)
+        if channel is not None:
+            self._remove(channel, subscription)
+    
+    def _remove(self, channel, subscription):
+        """Drop a subscription from its channel, keeping its counts, and drop the channel once empty"""
+        if subscription not in channel.subscriptions:
+            return
+        
+        channel.subscriptions.discard(subscription)
+        channel.delivered += subscription.delivered
+        channel.dropped += subscription.dropped
+        if not channel.subscriptions and self._channels.get(subscription.guild_id) is channel:
+            del self._channels[subscription.guild_id]
+            if self.broker:
+                self.broker.unsubscribe(self._topic(subscription.guild_id), self._deliver)
+    
+    def publish(self, guild_id, message):
+        """Publish a chat message to every subscriber of a guild
+        
+        Safe to call from any thread; delivery happens on the hub's event loop.
+        
+        Args:
+            guild_id (str): ID of the guild
+            message (dict): Chat message
+        """
+        if self.broker:
+            self.broker.publish(self._topic(guild_id), message)
+        else:
+            self._deliver(self._topic(guild_id), message)
+    
+    def _deliver(self, topic, message):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        
+        if running is loop:
+            self._fan_out(topic, message)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, topic, message)
+    
+    def _fan_out(self, topic, message):
+        guild_id = topic.split(":", 1)[1]
+        channel = self._channels.get(guild_id)
+        if channel is None:
+            return
+        
+        channel.published += 1
+        now = time.monotonic()
+        channel.recent.append(now)
+        while channel.recent and now - channel.recent[0] > self.RATE_WINDOW:
+            channel.recent.popleft()
+        
+        for subscription in list(channel.subscriptions):
+            subscription.offer(message)
+            if subscription.closed:
+                self._remove(channel, subscription)
+    
+    def messages_per_second(self, guild_id):
+        """Get the recent publish rate of a guild
+        
+        Args:
+            guild_id (str): ID of the guild
+            
+        Returns:
+            float: Messages per second over the last RATE_WINDOW seconds
+        """
+        channel = self._channels.get(guild_id)
+        if channel is None or len(channel.recent) < 2:
+            return 0.0
+        
+        span = channel.recent[-1] - channel.recent[0]
+        return (len(channel.recent) - 1) / span if span > 0 else float(len(channel.recent))
+    
+    def stats(self):
+        """Get per-guild fan-out statistics
+        
+        Returns:
+            dict: Guild ID -> subscribers, published, delivered, dropped and messages/sec
+        """
+        return {
+            guild_id: {
+                "subscribers": len(channel.subscriptions),
+                "published": channel.published,
+                "delivered": channel.delivered + sum(s.delivered for s in channel.subscriptions),
+                "dropped": channel.dropped + sum(s.dropped for s in channel.subscriptions),
+                "messages_per_second": self.messages_per_second(guild_id)
+            }
+            for guild_id, channel in self._channels.items()
+        }
+    
+    @staticmethod
+    def _topic(guild_id):
+        return f"guild:{guild_id}"
+
+
+class LocalBroker:
+    """In-process stand-in for a message broker shared by several hubs
+    
+    Mirrors the publish/subscribe surface of a networked broker so hubs can
+    be tested as if they ran in separate server processes.
+    """
+    
+    def __init__(self):
+        """Initialize the broker"""
+        self._subscribers = {}  # Topic -> list of callbacks
+    
+    def subscribe(self, topic, callback):
+        """Subscribe a callback to a topic
+        
+        Args:
+            topic (str): Topic name
+            callback (callable): Called as callback(topic, message)
+        """
+        callbacks = self._subscribers.setdefault(topic, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+    
+    def unsubscribe(self, topic, callback):
+        """Unsubscribe a callback from a topic
+        
+        Args:
+            topic (str): Topic name
+            callback (callable): Previously subscribed callback
+        """
+        callbacks = self._subscribers.get(topic, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            self._subscribers.pop(topic, None)
+    
+    def publish(self, topic, message):
+        """Deliver a message to every subscriber of a topic
+        
+        Args:
+            topic (str): Topic name
+            message (dict): Message
+        """
+        for callback in list(self._subscribers.get(topic, ())):
+            callback(topic, message)
+
+
+# For testing
+if __name__ == "__main__":
+    async def benchmark(guilds=10, subscribers=50, messages=2000):
+        broker = LocalBroker()
+        hubs = [ChatHub(broker), ChatHub(broker)]  # Two "server processes"
+        received = {"count": 0}
+        
+        async def consume(subscription, delay):
+            async for _ in subscription:
+                received["count"] += 1
+                if delay:
+                    await asyncio.sleep(delay)
+        
+        consumers = []
+        for g in range(guilds):
+            for s in range(subscribers):
+                hub = hubs[s % 2]
+                slow = s == 0  # One slow consumer per guild
+                subscription = hub.subscribe(f"g{g}", maxsize=32, policy=DISCONNECT if slow else DROP_OLDEST)
+                consumers.append(asyncio.create_task(consume(subscription, 0.01 if slow else 0)))
+        
+        start = time.perf_counter()
+        for i in range(messages):
+            for g in range(guilds):
+                hubs[i % 2].publish(f"g{g}", {"user_name": "bench", "message": f"msg {i}"})
+            if i % 16 == 0:
+                await asyncio.sleep(0)  # Let consumers drain
+        await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        
+        for task in consumers:
+            task.cancel()
+        
+        published = messages * guilds
+        print(f"Published {published} messages to {guilds} guilds x {subscribers} subscribers "
+              f"in {elapsed:.2f}s ({messages / elapsed:.0f} messages/sec per guild)")
+        print(f"Delivered {received['count']} messages ({received['count'] / elapsed:.0f}/sec)")
+        print("Guild g0 on hub 0:", hubs[0].stats().get("g0"))
+    
+    asyncio.run(benchmark())
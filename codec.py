@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Codec module for compact binary serialization of players and guilds
+"""
+
+import struct
+
+MAGIC = b"ER"
+PLAYER_KIND = ord("P")
+GUILD_KIND = ord("G")
+PLAYER_VERSION = 1
+GUILD_VERSION = 1
+
+TRAIT_ORDER = ("math", "science", "history", "language", "arts")
+
+# Fixed-width fields packed up front
+PLAYER_FIXED = struct.Struct("<HQ5I")  # level, xp, one uint32 per trait in TRAIT_ORDER
+GUILD_FIXED = struct.Struct("<dQHI")  # created_at, xp, level, version
+FLOAT = struct.Struct("<d")
+
+# Tags of self-describing values (quests, items, chat and unknown fields)
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR, TAG_LIST, TAG_DICT = range(8)
+
+PLAYER_FIELDS = ("name", "grade", "level", "xp", "traits", "inventory", "skills", "guild_id")
+GUILD_FIELDS = (
+    "id", "name", "description", "leader_id", "subject_focus", "members", "quests",
+    "completed_quests", "quest_stats", "chat_history", "created_at", "xp", "level",
+    "member_xp", "version"
+)
+
+
+class _Writer:
+    """Builds a body and the table of strings it references"""
+    
+    def __init__(self):
+        self.body = bytearray()
+        self.strings = {}  # String -> index in the table
+    
+    def varint(self, value):
+        body = self.body
+        while value > 0x7F:
+            body.append((value & 0x7F) | 0x80)
+            value >>= 7
+        body.append(value)
+    
+    def string(self, value):
+        """Write a reference to an interned string"""
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        self.varint(index)
+    
+    def optional_string(self, value):
+        """Write a string that may be None (index shifted by one, 0 means None)"""
+        if value is None:
+            self.varint(0)
+            return
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        self.varint(index + 1)
+    
+    def value(self, value):
+        """Write any JSON-compatible value with a type tag"""
+        body = self.body
+        if value is None:
+            body.append(TAG_NONE)
+        elif value is True:
+            body.append(TAG_TRUE)
+        elif value is False:
+            body.append(TAG_FALSE)
+        elif isinstance(value, int):
+            body.append(TAG_INT)
+            self.varint(value << 1 if value >= 0 else ((-value) << 1) - 1)  # Zigzag
+        elif isinstance(value, float):
+            body.append(TAG_FLOAT)
+            body += FLOAT.pack(value)
+        elif isinstance(value, str):
+            body.append(TAG_STR)
+            self.string(value)
+        elif isinstance(value, (list, tuple)):
+            body.append(TAG_LIST)
+            self.varint(len(value))
+            for item in value:
+                self.value(item)
+        elif isinstance(value, dict):
+            body.append(TAG_DICT)
+            self.varint(len(value))
+            for key, item in value.items():
+                self.string(key)
+                self.value(item)
+        else:
+            raise TypeError(f"Cannot encode value of type {type(value).__name__}")
+    
+    def finish(self, kind, version):
+        """Assemble header, string table and body"""
+        out = _Writer()
+        out.body += MAGIC
+        out.body.append(kind)
+        out.varint(version)
+        out.varint(len(self.strings))
+        for string in self.strings:  # Dicts keep insertion order, which is index order
+            raw = string.encode("utf-8")
+            out.varint(len(raw))
+            out.body += raw
+        out.body += self.body
+        return bytes(out.body)
+
+
+class _Reader:
+    """Reads a body written by _Writer"""
+    
+    def __init__(self, blob, kind):
+        if blob[:2] != MAGIC or len(blob) < 3 or blob[2] != kind:
+            raise ValueError("Not an encoded record of the expected kind")
+        
+        self.blob = blob
+        self.pos = 3
+        self.version = self.varint()
+        self.strings = []
+        for _ in range(self.varint()):
+            length = self.varint()
+            self.strings.append(blob[self.pos:self.pos + length].decode("utf-8"))
+            self.pos += length
+    
+    def varint(self):
+        blob = self.blob
+        byte = blob[self.pos]
+        if byte < 0x80:  # Fast path: most counts and string indexes fit in one byte
+            self.pos += 1
+            return byte
+        result = 0
+        shift = 0
+        while True:
+            byte = blob[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+    
+    def string(self):
+        return self.strings[self.varint()]
+    
+    def optional_string(self):
+        index = self.varint()
+        return self.strings[index - 1] if index else None
+    
+    def fixed(self, layout):
+        values = layout.unpack_from(self.blob, self.pos)
+        self.pos += layout.size
+        return values
+    
+    def value(self):
+        tag = self.blob[self.pos]
+        self.pos += 1
+        if tag == TAG_STR:
+            return self.strings[self.varint()]
+        if tag == TAG_INT:
+            raw = self.varint()
+            return raw >> 1 if not raw & 1 else -((raw + 1) >> 1)
+        if tag == TAG_DICT:
+            return {self.string(): self.value() for _ in range(self.varint())}
+        if tag == TAG_LIST:
+            return [self.value() for _ in range(self.varint())]
+        if tag == TAG_FLOAT:
+            return self.fixed(FLOAT)[0]
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_FALSE:
+            return False
+        raise ValueError(f"Unknown value tag {tag}")
+
+
+def _extras(data, known_fields):
+    """Collect fields the fixed layout does not know about"""
+    return {key: value for key, value in data.items() if key not in known_fields}
+
+
+def encode_player(data):
+    """Encode a player dictionary (as returned by Player.to_dict)
+    
+    Args:
+        data (dict): Player data
+        
+    Returns:
+        bytes: Encoded player
+    """
+    writer = _Writer()
+    traits = data["traits"]
+    writer.body += PLAYER_FIXED.pack(data["level"], data["xp"], *(traits.get(name, 0) for name in TRAIT_ORDER))
+    writer.string(data["name"])
+    writer.string(str(data["grade"]))
+    writer.optional_string(data["guild_id"])
+    writer.value(data["inventory"])
+    writer.value(data["skills"])
+    # Traits outside the fixed layout and fields added after this version
+    writer.value({name: value for name, value in traits.items() if name not in TRAIT_ORDER})
+    writer.value(_extras(data, PLAYER_FIELDS))
+    return writer.finish(PLAYER_KIND, PLAYER_VERSION)
+
+
+def decode_player(blob):
+    """Decode a player encoded by encode_player
+    
+    Args:
+        blob (bytes): Encoded player
+        
+    Returns:
+        dict: Player data, suitable for Player.from_dict
+    """
+    reader = _Reader(blob, PLAYER_KIND)
+    if reader.version not in _PLAYER_DECODERS:
+        raise ValueError(f"Unsupported player format version {reader.version}")
+    return _PLAYER_DECODERS[reader.version](reader)
+
+
+def _decode_player_v1(reader):
+    level, xp, *trait_values = reader.fixed(PLAYER_FIXED)
+    data = {
+        "name": reader.string(),
+        "grade": reader.string(),
+        "level": level,
+        "xp": xp
+    }
+    data["guild_id"] = reader.optional_string()
+    data["inventory"] = reader.value()
+    data["skills"] = reader.value()
+    data["traits"] = dict(zip(TRAIT_ORDER, trait_values))
+    data["traits"].update(reader.value())
+    data.update(reader.value())
+    return data
+
+
+def encode_guild(data):
+    """Encode a guild dictionary (as returned by Guild.to_dict)
+    
+    Args:
+        data (dict): Guild data
+        
+    Returns:
+        bytes: Encoded guild
+    """
+    writer = _Writer()
+    writer.body += GUILD_FIXED.pack(data["created_at"], data["xp"], data["level"], data.get("version", 0))
+    writer.string(data["id"])
+    writer.string(data["name"])
+    writer.string(data["description"])
+    writer.string(data["leader_id"])
+    writer.optional_string(data.get("subject_focus"))
+    
+    members = data["members"]
+    writer.varint(len(members))
+    for user_id, role in members.items():
+        writer.string(user_id)
+        writer.string(role)
+    
+    writer.value(data["quests"])
+    writer.value(data.get("completed_quests", []))
+    writer.value(data.get("quest_stats"))
+    writer.value(data["chat_history"])
+    writer.value(data.get("member_xp", {}))
+    writer.value(_extras(data, GUILD_FIELDS))
+    return writer.finish(GUILD_KIND, GUILD_VERSION)
+
+
+def decode_guild(blob):
+    """Decode a guild encoded by encode_guild
+    
+    Args:
+        blob (bytes): Encoded guild
+        
+    Returns:
+        dict: Guild data, suitable for Guild.from_dict
+    """
+    reader = _Reader(blob, GUILD_KIND)
+    if reader.version not in _GUILD_DECODERS:
+        raise ValueError(f"Unsupported guild format version {reader.version}")
+    return _GUILD_DECODERS[reader.version](reader)
+
+
+def _decode_guild_v1(reader):
+    created_at, xp, level, version = reader.fixed(GUILD_FIXED)
+    data = {
+        "id": reader.string(),
+        "name": reader.string(),
+        "description": reader.string(),
+        "leader_id": reader.string(),
+        "subject_focus": reader.optional_string()
+    }
+    data["members"] = {reader.string(): reader.string() for _ in range(reader.varint())}
+    data["quests"] = reader.value()
+    data["completed_quests"] = reader.value()
+    quest_stats = reader.value()
+    if quest_stats is not None:
+        data["quest_stats"] = quest_stats
+    data["chat_history"] = reader.value()
+    data["created_at"] = created_at
+    data["xp"] = xp
+    data["level"] = level
+    data["member_xp"] = reader.value()
+    data["version"] = version
+    data.update(reader.value())
+    return data
+
+
+# Decoders by format version; add one per new version and keep the old ones
+# so records written by earlier releases still load
+_PLAYER_DECODERS = {1: _decode_player_v1}
+_GUILD_DECODERS = {1: _decode_guild_v1}
+
+
+# For testing
+if __name__ == "__main__":
+    import json
+    import random
+    import time
+    
+    rng = random.Random(3)
+    item_ids = ["math_textbook", "microscope", "antique_map", "knowledge_orb", "lab_equipment"]
+    players = []
+    for i in range(20000):
+        players.append({
+            "name": f"student{i}",
+            "grade": str(rng.randint(1, 12)),
+            "level": rng.randint(1, 60),
+            "xp": rng.randint(0, 500000),
+            "traits": {name: rng.randint(0, 200) for name in TRAIT_ORDER},
+            "inventory": {item_id: rng.randint(1, 5) for item_id in rng.sample(item_ids, rng.randint(0, 5))},
+            "skills": [f"Skill {rng.randint(1, 20)}" for _ in range(rng.randint(0, 4))],
+            "guild_id": rng.choice([None, "a1b2c3d4", "e5f6a7b8"])
+        })
+    
+    for player in players[:50]:
+        assert decode_player(encode_player(player)) == player
+    
+    def measure(label, encode, decode):
+        start = time.perf_counter()
+        blobs = [encode(player) for player in players]
+        encode_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for blob in blobs:
+            decode(blob)
+        decode_time = time.perf_counter() - start
+        size = sum(len(blob) for blob in blobs)
+        print(f"{label:<14} {size / len(players):8.0f} bytes/player  "
+              f"encode {len(players) / encode_time:9.0f}/sec  decode {len(players) / decode_time:9.0f}/sec")
+        return size
+    
+    pretty_size = measure("json indent=2", lambda p: json.dumps(p, indent=2).encode("utf-8"), json.loads)
+    compact_size = measure("json compact", lambda p: json.dumps(p, separators=(",", ":")).encode("utf-8"), json.loads)
+    binary_size = measure("binary codec", encode_player, decode_player)
+    print(f"Binary records are {pretty_size / binary_size:.1f}x smaller than json indent=2 "
+          f"and {compact_size / binary_size:.1f}x smaller than compact json")
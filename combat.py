@@ -5,18 +5,25 @@ Combat module for educational battles
 """
 
 import random
-import time
 from rich.console import Console
 from rich.panel import Panel
-from rich.prompt import Prompt
 from rich.progress import Progress
 
+from enemies import get_enemy_registry
+from loot import get_loot_tables
+from metrics import INTERACTION_BUCKETS, get_registry, timed
+from pacing import get_pacing
+from session import get_session
+
 console = Console()
 
+_answers = get_registry().counter("edurpg_answers_total", "Questions answered by subject and outcome", ("subject", "outcome"))
+
+
 class Enemy:
     """Enemy class for combat encounters"""
     
-    def __init__(self, name, sprite, subject, hp, questions, grade_level=None):
+    def __init__(self, name, sprite, subject, hp, questions, grade_level=None, template_id=None):
         """Initialize a new enemy
         
         Args:
@@ -26,14 +33,20 @@ class Enemy:
             hp (int): Hit points
             questions (list): List of question dictionaries
             grade_level (str, optional): Target grade level. Defaults to None.
+            template_id (str, optional): ID of the enemy template. Defaults to None.
         """
         self.name = name
+        self.template_id = template_id
         self.sprite = sprite
         self.subject = subject
         self.max_hp = hp
         self.hp = hp
         self.questions = questions
         self.grade_level = grade_level
+        
+        # Battle difficulty is the typical difficulty of the enemy's questions
+        difficulties = [question.get("difficulty", 1) for question in questions]
+        self.difficulty = round(sum(difficulties) / len(difficulties)) if difficulties else 1
     
     def is_defeated(self):
         """Check if enemy is defeated
@@ -56,13 +69,16 @@ class Enemy:
         self.hp -= actual_damage
         return actual_damage
     
-    def get_random_question(self):
+    def get_random_question(self, rng=random):
         """Get a random question from the enemy's question pool
         
+        Args:
+            rng (random.Random, optional): Random number generator. Defaults to the random module.
+            
         Returns:
             dict: Question dictionary
         """
-        return random.choice(self.questions)
+        return rng.choice(self.questions)
     
     def get_hp_percentage(self):
         """Get the enemy's HP as a percentage
@@ -76,14 +92,25 @@ class Enemy:
 class CombatSystem:
     """Combat system for educational battles"""
     
-    def __init__(self, player):
+    def __init__(self, player, loot_tables=None, enemy_registry=None, pacing=None, session=None):
         """Initialize the combat system
         
         Args:
             player: Player object
+            loot_tables (LootTables, optional): Loot tables for drops. Defaults to the shared tables.
+            enemy_registry (EnemyRegistry, optional): Enemy templates. Defaults to the shared registry.
+            pacing (Pacing, optional): Pacing policy for pauses. Defaults to the shared policy.
+            session (Session, optional): Source of input, random numbers and time. Defaults to the shared session.
         """
         self.player = player
+        self.loot_tables = loot_tables or get_loot_tables()
+        self.enemy_registry = enemy_registry or get_enemy_registry()
+        self.pacing = pacing or get_pacing()
+        self.session = session or get_session()
+        self.rng = self.session.rng
+        self.clock = self.session.clock
         self.enemy = None
+        self._question_started = None  # When the current question was asked
         self.question_bank = self._load_question_bank()
         self.difficulty_multiplier = 1.0
     
@@ -152,6 +179,7 @@ class CombatSystem:
             },
         }
     
+    @timed("edurpg_combat_seconds", "Latency of combat steps", step="generate_enemy")
     def generate_enemy(self, subject=None):
         """Generate an enemy appropriate for the player's level and grade
         
@@ -162,7 +190,7 @@ class CombatSystem:
             Enemy: Generated enemy
         """
         if not subject:
-            subject = random.choice(["math", "science", "history"])
+            subject = self.rng.choice(["math", "science", "history"])
         
         # Determine grade level for questions
         grade = self.player.grade
@@ -180,60 +208,23 @@ class CombatSystem:
         
         # Take a random sample of questions
         if len(available_questions) > 5:
-            battle_questions = random.sample(available_questions, 5)
+            battle_questions = self.rng.sample(available_questions, 5)
         else:
             battle_questions = available_questions
         
-        # Generate enemy based on subject
-        enemy_templates = {
-            "math": [
-                {
-                    "name": "Polynomial Golem",
-                    "sprite": "🔥📐\n/()\\\n /\\",
-                    "hp": 100 + (self.player.level * 10)
-                },
-                {
-                    "name": "Fraction Phantom",
-                    "sprite": "  👻\n /|\\\n/ | \\",
-                    "hp": 80 + (self.player.level * 8)
-                },
-            ],
-            "science": [
-                {
-                    "name": "Chemical Construct",
-                    "sprite": "⚗️ 🧪\n/|\\\n/ \\",
-                    "hp": 90 + (self.player.level * 9)
-                },
-                {
-                    "name": "Physics Phantom",
-                    "sprite": "  ⚛️\n /|\\\n/ | \\",
-                    "hp": 85 + (self.player.level * 8.5)
-                },
-            ],
-            "history": [
-                {
-                    "name": "Chronos Guardian",
-                    "sprite": "⏳ 📜\n/|\\\n/ \\",
-                    "hp": 95 + (self.player.level * 9.5)
-                },
-                {
-                    "name": "Ancient Archivist",
-                    "sprite": "  📚\n /|\\\n/ | \\",
-                    "hp": 85 + (self.player.level * 8.5)
-                },
-            ],
-        }
-        
-        # Select a random enemy template for the subject
-        template = random.choice(enemy_templates[subject])
+        # Spawning is a lookup in the registry's subject and level band index
+        template = self.enemy_registry.choose(subject, self.player.level, self.rng)
+        if template is None:
+            raise ValueError(f"No enemies are defined for {subject} at level {self.player.level}")
         
         return Enemy(
-            name=template["name"],
-            sprite=template["sprite"],
+            name=template.name,
+            sprite=template.sprite,
             subject=subject,
-            hp=template["hp"],
+            hp=template.hp_at(self.player.level),
             questions=battle_questions,
-            grade_level=grade
+            grade_level=grade,
+            template_id=template.id
         )
     
     def start_battle(self, enemy=None):
@@ -270,15 +261,14 @@ class CombatSystem:
             console.print("2. Use an item")
             console.print("3. Flee")
             
-            choice = Prompt.ask("Choose an action", choices=["1", "2", "3"])
+            choice = self.session.ask("Choose an action", choices=["1", "2", "3"])
             
             if choice == "1":
                 # Get a question and ask player
                 result = self._handle_question()
                 if result:
                     # Correct answer - deal damage
-                    damage = self._calculate_damage(result)
-                    actual_damage = enemy.take_damage(damage)
+                    actual_damage = self.strike(result)
                     console.print(f"[bold green]You dealt {actual_damage} damage to {enemy.name}![/bold green]")
                 else:
                     # Incorrect answer - no damage
@@ -293,7 +283,7 @@ class CombatSystem:
             
             elif choice == "3":
                 # Flee from battle
-                if Confirm.ask("Are you sure you want to flee?"):
+                if self.session.confirm("Are you sure you want to flee?"):
                     console.print("[yellow]You fled from battle![/yellow]")
                     return False
             
@@ -304,49 +294,84 @@ class CombatSystem:
             
             # Increment round counter
             battle_round += 1
-            time.sleep(1)
+            self.pacing.pause(1)
     
-    def _handle_question(self):
-        """Present a question to the player and check the answer
+    def ask_question(self):
+        """Pick the next question and start its answer timer
         
         Returns:
-            int: Score based on answer correctness and speed, or 0 if incorrect
+            dict: Question dictionary
         """
-        question_data = self.enemy.get_random_question()
-        question_text = question_data["question"]
-        correct_answer = question_data["difficulty"]
-        
-        console.print(f"\n[bold cyan]Question:[/bold cyan] {question_text}")
-        
-        # Timer for answering (more points for faster answers)
-        start_time = time.time()
-        
-        # Get player's answer
-        answer = Prompt.ask("Your answer")
+        question_data = self.enemy.get_random_question(self.rng)
+        self._question_started = self.clock()
+        return question_data
+    
+    def check_answer(self, question_data, answer, time_taken=None):
+        """Check an answer to the current question and award XP for it
         
+        Args:
+            question_data (dict): Question from ask_question()
+            answer (str): Player's answer
+            time_taken (float, optional): Seconds taken to answer. Defaults to the time since ask_question().
+            
+        Returns:
+            dict: {"correct": bool, "score": int, "xp_gained": int, "answer": correct answer}
+        """
         # Calculate time taken (capped at 30 seconds)
-        time_taken = min(time.time() - start_time, 30)
+        if time_taken is None:
+            time_taken = self.clock() - self._question_started
+        time_taken = min(time_taken, 30)
         
         # Check if answer is correct
         # In a real implementation, this would use more sophisticated answer checking
         # For now, we'll do a simple string comparison
-        if answer.lower().strip() == question_data["answer"].lower().strip():
-            # Calculate score based on time taken and difficulty
-            time_factor = max(0, 1 - (time_taken / 30))  # 1.0 for instant, 0 for 30+ seconds
-            difficulty_bonus = question_data["difficulty"] * 5
-            score = int(10 + (difficulty_bonus * time_factor))
-            
-            console.print(f"[bold green]Correct! +{score} points[/bold green]")
-            
-            # Add XP to player
-            xp_gained = score * 2
-            self.player.gain_xp(xp_gained, self.enemy.subject)
-            console.print(f"[green]You gained {xp_gained} XP in {self.enemy.subject}![/green]")
+        if answer.lower().strip() != question_data["answer"].lower().strip():
+            _answers.inc(self.enemy.subject, "incorrect")
+            return {"correct": False, "score": 0, "xp_gained": 0, "answer": question_data["answer"]}
+        
+        # Calculate score based on time taken and difficulty
+        time_factor = max(0, 1 - (time_taken / 30))  # 1.0 for instant, 0 for 30+ seconds
+        difficulty_bonus = question_data["difficulty"] * 5
+        score = int(10 + (difficulty_bonus * time_factor))
+        
+        # Add XP to player
+        xp_gained = score * 2
+        _answers.inc(self.enemy.subject, "correct")
+        self.player.gain_xp(xp_gained, self.enemy.subject)
+        return {"correct": True, "score": score, "xp_gained": xp_gained, "answer": question_data["answer"]}
+    
+    def strike(self, score):
+        """Deal the damage earned by a correct answer to the enemy
+        
+        Args:
+            score (int): Score from check_answer()
             
-            return score
+        Returns:
+            int: Damage dealt
+        """
+        return self.enemy.take_damage(self._calculate_damage(score))
+    
+    @timed("edurpg_question_seconds", "Time from asking a question to checking the answer, player included",
+           buckets=INTERACTION_BUCKETS)
+    def _handle_question(self):
+        """Present a question to the player and check the answer
+        
+        Returns:
+            int: Score based on answer correctness and speed, or 0 if incorrect
+        """
+        question_data = self.ask_question()
+        console.print(f"\n[bold cyan]Question:[/bold cyan] {question_data['question']}")
+        
+        # Get player's answer
+        answer = self.session.ask("Your answer")
+        
+        result = self.check_answer(question_data, answer)
+        if result["correct"]:
+            console.print(f"[bold green]Correct! +{result['score']} points[/bold green]")
+            console.print(f"[green]You gained {result['xp_gained']} XP in {self.enemy.subject}![/green]")
         else:
-            console.print(f"[bold red]Incorrect! The answer was: {question_data['answer']}[/bold red]")
-            return 0
+            console.print(f"[bold red]Incorrect! The answer was: {result['answer']}[/bold red]")
+        return result["score"]
     
     def _calculate_damage(self, score):
         """Calculate damage based on score and player traits
@@ -360,8 +385,12 @@ class CombatSystem:
         # Base damage from score
         damage = score
         
+        # Traits and item bonuses come precomputed from the player's equipment
+        stats = self.player.get_effective_stats()
+        subject = self.enemy.subject
+        
         # Apply trait bonus
-        trait_value = self.player.traits.get(self.enemy.subject, 0)
+        trait_value = stats["traits"].get(subject, 0)
         trait_multiplier = 1 + (trait_value / 200)  # +50% damage at 100 trait points
         damage = int(damage * trait_multiplier)
         
@@ -369,79 +398,40 @@ class CombatSystem:
         level_bonus = 1 + (self.player.level / 20)  # +50% damage at level 10
         damage = int(damage * level_bonus)
         
+        # Apply flat item damage bonuses
+        damage += stats["damage_bonus"].get(subject, 0) + stats["damage_bonus"].get("all", 0)
+        
         return max(1, damage)  # Minimum 1 damage
     
-    def _handle_victory(self):
-        """Handle enemy defeat and rewards"""
-        console.print(f"\n[bold green]Victory! You defeated the {self.enemy.name}![/bold green]")
+    def claim_victory(self):
+        """Award the rewards for defeating the enemy
         
+        Returns:
+            dict: {"xp": XP reward, "item": catalog item dropped, or None}
+        """
         # Calculate rewards
         xp_reward = int(self.enemy.max_hp / 5)
-        console.print(f"[green]You gained {xp_reward} XP![/green]")
         self.player.gain_xp(xp_reward, self.enemy.subject)
         
-        # Random chance for item drop
-        if random.random() < 0.3:  # 30% chance
-            item = self._generate_random_item()
-            self.player.add_to_inventory(item)
+        # Roll the enemy's loot table
+        item_id = self._generate_random_item()
+        item = self.player.add_to_inventory(item_id) if item_id else None
+        return {"xp": xp_reward, "item": item}
+    
+    def _handle_victory(self):
+        """Handle enemy defeat and rewards"""
+        console.print(f"\n[bold green]Victory! You defeated the {self.enemy.name}![/bold green]")
+        
+        rewards = self.claim_victory()
+        console.print(f"[green]You gained {rewards['xp']} XP![/green]")
     
     def _generate_random_item(self):
         """Generate a random item as loot
         
         Returns:
-            dict: Item data
+            str: Catalog ID of the item, or None if nothing dropped
         """
-        item_templates = [
-            {
-                "name": "Math Textbook",
-                "type": "book",
-                "subject": "math",
-                "effect": {"trait_bonus": {"math": 5}},
-                "description": "A comprehensive math textbook. Grants +5 to Math trait."
-            },
-            {
-                "name": "Science Journal",
-                "type": "book",
-                "subject": "science",
-                "effect": {"trait_bonus": {"science": 5}},
-                "description": "A scientific journal with the latest discoveries. Grants +5 to Science trait."
-            },
-            {
-                "name": "History Scroll",
-                "type": "book",
-                "subject": "history",
-                "effect": {"trait_bonus": {"history": 5}},
-                "description": "An ancient scroll containing historical knowledge. Grants +5 to History trait."
-            },
-            {
-                "name": "Precision Compass",
-                "type": "tool",
-                "subject": "math",
-                "effect": {"damage_bonus": 2},
-                "description": "A precision drawing compass. Increases Math damage by 2."
-            },
-            {
-                "name": "Microscope",
-                "type": "tool",
-                "subject": "science",
-                "effect": {"damage_bonus": 2},
-                "description": "A powerful microscope. Increases Science damage by 2."
-            },
-            {
-                "name": "Antique Map",
-                "type": "tool",
-                "subject": "history",
-                "effect": {"damage_bonus": 2},
-                "description": "An antique map with historical routes. Increases History damage by 2."
-            },
-        ]
-        
-        # Choose a random item, with preference for the enemy's subject
-        subject_items = [item for item in item_templates if item["subject"] == self.enemy.subject]
-        if subject_items and random.random() < 0.7:  # 70% chance for subject-specific item
-            return random.choice(subject_items)
-        else:
-            return random.choice(item_templates)
+        return self.loot_tables.roll(self.enemy, self.rng)
 
 
 # For testing
@@ -6,34 +6,90 @@ Database module for Firebase integration
 
 import os
 import json
+import atexit
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from rich.console import Console
 
+from membership import MembershipIndex
+from metrics import get_registry, timed
+from resilience import DeadlineExceeded, ResilientFirestore
+from storage_engine import StorageEngine
+from file_locks import file_lock as _file_lock
+from guild_index import GuildIndex, guild_summary, decode_cursor, encode_cursor, SUMMARY_FIELDS
+
 # Optional Firebase imports - will be used if Firebase is configured
 try:
     import firebase_admin
     from firebase_admin import credentials, firestore
     FIREBASE_AVAILABLE = True
 except ImportError:
+    firestore = None
     FIREBASE_AVAILABLE = False
 
 console = Console()
 
+# Errors are printed and swallowed below, so count them where they happen
+_errors = get_registry().counter("edurpg_database_errors_total", "Database errors by operation", ("operation",))
+
+
+def _timed(operation):
+    """Time a database operation into the shared latency histogram
+    
+    Args:
+        operation (str): Operation label
+        
+    Returns:
+        callable: Decorator
+    """
+    return timed("edurpg_database_seconds", "Latency of database operations", operation=operation)
+
+
+def _write_json_atomic(file_path, data):
+    """Write JSON to a file so readers never see a partial document
+    
+    Args:
+        file_path (Path): Destination file
+        data: JSON-serializable data
+    """
+    tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, file_path)
+
 class Database:
     """Database class for EduRPG
     
-    Handles data persistence using either Firebase (online) or local JSON files (offline)
+    Handles data persistence using either Firebase (online) or local JSON files (offline).
+    Offline, players and guilds can instead live in a write-ahead-logged
+    storage engine, which makes multi-document transactions atomic.
     """
     
-    def __init__(self, use_firebase=True):
+    def __init__(self, use_firebase=True, use_wal=None, data_dir="data", firestore_module=None):
         """Initialize the database connection
         
         Args:
             use_firebase (bool, optional): Whether to use Firebase. Defaults to True.
+            use_wal (bool, optional): Keep local players and guilds in the storage engine.
+                Defaults to the EDURPG_STORAGE environment variable being "wal".
+            data_dir (str, optional): Directory for local storage. Defaults to "data".
+            firestore_module (optional): Stand-in for firebase_admin.firestore, such as
+                fake_firestore.FakeFirestore(). Defaults to the real module.
         """
-        self.use_firebase = use_firebase and FIREBASE_AVAILABLE
+        if use_wal is None:
+            use_wal = os.environ.get("EDURPG_STORAGE", "").lower() == "wal"
+        
+        self.firestore = firestore_module or firestore  # Provides client(), transactional, Increment...
+        self.use_firebase = use_firebase and self.firestore is not None
+        self.use_wal = use_wal
         self.db = None
-        self.local_data_dir = Path("data")
+        self.engine = None  # Storage engine, when use_wal is on in local mode
+        self.local_data_dir = Path(data_dir)
+        self._guild_index = None  # Loaded on first use in local mode
+        self._membership_index = None  # Loaded on first use in local mode
+        self._txn_state = threading.local()  # Engine transaction of the current thread
+        self._index_lock = threading.Lock()  # Guards the local guild index against worker threads
         
         if self.use_firebase:
             self._initialize_firebase()
@@ -43,8 +99,8 @@ class Database:
     def _initialize_firebase(self):
         """Initialize Firebase connection"""
         try:
-            # Check if already initialized
-            if not firebase_admin._apps:
+            # Check if already initialized; stand-in modules need no app
+            if self.firestore is firestore and not firebase_admin._apps:
                 # Look for service account key file
                 key_file = Path("firebase-key.json")
                 if key_file.exists():
@@ -56,9 +112,12 @@ class Database:
                     self._initialize_local_storage()
                     return
             
-            self.db = firestore.client()
+            # Calls get deadlines and retries; writes are queued locally while Firestore is down
+            queue_path = self.local_data_dir / "queue" / "firestore_writes.jsonl"
+            self.db = ResilientFirestore(self.firestore.client(), self.firestore, queue_path)
             console.print("[green]Connected to Firebase successfully![/green]")
         except Exception as e:
+            _errors.inc("initialize_firebase")
             console.print(f"[red]Error connecting to Firebase: {e}[/red]")
             console.print("[yellow]Falling back to local storage.[/yellow]")
             self.use_firebase = False
@@ -73,10 +132,79 @@ class Database:
         (self.local_data_dir / "players").mkdir(exist_ok=True)
         (self.local_data_dir / "guilds").mkdir(exist_ok=True)
         (self.local_data_dir / "questions").mkdir(exist_ok=True)
+        (self.local_data_dir / "indexes").mkdir(exist_ok=True)
+        (self.local_data_dir / "counters").mkdir(exist_ok=True)
+        (self.local_data_dir / "archives").mkdir(exist_ok=True)
+        
+        if self.use_wal and self.engine is None:
+            self.engine = StorageEngine(self.local_data_dir / "wal")
+            atexit.register(self.close)
         
         console.print("[green]Local storage initialized.[/green]")
     
+    def close(self):
+        """Flush and close the storage engine, if one is open"""
+        if self.engine:
+            self.engine.close()
+    
+    @property
+    def available(self):
+        """Whether the database is believed reachable; local storage always is"""
+        return not self.use_firebase or self.db.available
+    
+    @contextmanager
+    def transaction(self):
+        """Group several saves and deletes into one atomic commit
+        
+        With the storage engine, every player and guild write made by this
+        thread inside the block is committed as a single log record when the
+        block exits, or not at all if it raises. Other backends write through
+        immediately. Nested blocks join the outer transaction.
+        """
+        if not self.engine or getattr(self._txn_state, "transaction", None) is not None:
+            yield
+            return
+        
+        with self.engine.transaction() as txn:
+            self._txn_state.transaction = txn
+            try:
+                yield
+            finally:
+                self._txn_state.transaction = None
+    
+    def _engine_write(self, collection, doc_id, data=None):
+        """Put (or delete, when data is None) a document in the storage engine
+        
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+            data (dict, optional): Document data. Defaults to None.
+        """
+        with self.transaction():
+            txn = self._txn_state.transaction
+            if data is None:
+                txn.delete(collection, doc_id)
+            else:
+                # Snapshot the data so later changes by the caller are not logged silently
+                txn.put(collection, doc_id, json.loads(json.dumps(data)))
+    
+    def _engine_read(self, collection, doc_id):
+        """Get a copy of a document from the storage engine
+        
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+            
+        Returns:
+            dict: Document data, or None if not found
+        """
+        txn = getattr(self._txn_state, "transaction", None)
+        data = txn.get(collection, doc_id) if txn else self.engine.get(collection, doc_id)
+        # Callers mutate what they load; keep the engine's copy pristine
+        return json.loads(json.dumps(data)) if data is not None else None
+    
     # Player data methods
+    @_timed("save_player")
     def save_player(self, player_data):
         """Save player data
         
@@ -91,6 +219,8 @@ class Database:
         try:
             if self.use_firebase:
                 self.db.collection("players").document(player_id).set(player_data)
+            elif self.engine:
+                self._engine_write("players", player_id, player_data)
             else:
                 file_path = self.local_data_dir / "players" / f"{player_id}.json"
                 with open(file_path, "w") as f:
@@ -98,9 +228,11 @@ class Database:
             
             return True
         except Exception as e:
+            _errors.inc("save_player")
             console.print(f"[red]Error saving player data: {e}[/red]")
             return False
     
+    @_timed("get_player")
     def get_player(self, player_id):
         """Get player data
         
@@ -114,6 +246,8 @@ class Database:
             if self.use_firebase:
                 doc = self.db.collection("players").document(player_id).get()
                 return doc.to_dict() if doc.exists else None
+            elif self.engine:
+                return self._engine_read("players", player_id)
             else:
                 file_path = self.local_data_dir / "players" / f"{player_id}.json"
                 if file_path.exists():
@@ -121,9 +255,11 @@ class Database:
                         return json.load(f)
                 return None
         except Exception as e:
+            _errors.inc("get_player")
             console.print(f"[red]Error getting player data: {e}[/red]")
             return None
     
+    @_timed("delete_player")
     def delete_player(self, player_id):
         """Delete player data
         
@@ -136,6 +272,8 @@ class Database:
         try:
             if self.use_firebase:
                 self.db.collection("players").document(player_id).delete()
+            elif self.engine:
+                self._engine_write("players", player_id)
             else:
                 file_path = self.local_data_dir / "players" / f"{player_id}.json"
                 if file_path.exists():
@@ -143,9 +281,11 @@ class Database:
             
             return True
         except Exception as e:
+            _errors.inc("delete_player")
             console.print(f"[red]Error deleting player data: {e}[/red]")
             return False
     
+    @_timed("list_players")
     def list_players(self):
         """List all players
         
@@ -156,38 +296,98 @@ class Database:
             if self.use_firebase:
                 docs = self.db.collection("players").stream()
                 return [doc.id for doc in docs]
+            elif self.engine:
+                return self.engine.list_ids("players")
             else:
                 player_files = list((self.local_data_dir / "players").glob("*.json"))
                 return [file.stem for file in player_files]
         except Exception as e:
+            _errors.inc("list_players")
             console.print(f"[red]Error listing players: {e}[/red]")
             return []
     
     # Guild data methods
-    def save_guild(self, guild_data):
+    @_timed("save_guild")
+    def save_guild(self, guild_data, expected_version=None):
         """Save guild data
         
+        When expected_version is given the write only happens if the stored
+        guild still has that version (optimistic concurrency control). The
+        caller is expected to have set guild_data["version"] to the new version.
+        Versioned saves are not queued during a Firestore outage: the version
+        cannot be checked, so they fail instead.
+        
         Args:
             guild_data (dict): Guild data to save
+            expected_version (int, optional): Version the stored guild must have. Defaults to None.
             
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if successful, False on error or version conflict
         """
         guild_id = guild_data["id"]
         
         try:
             if self.use_firebase:
-                self.db.collection("guilds").document(guild_id).set(guild_data)
+                # Denormalize the member count so listings can order by it
+                summary = guild_summary(guild_data)
+                doc_data = {**guild_data, "member_count": summary["member_count"]}
+                doc_ref = self.db.collection("guilds").document(guild_id)
+                
+                if expected_version is None:
+                    doc_ref.set(doc_data)
+                    return True
+                
+                if not self.db.available:
+                    console.print("[yellow]Firestore is unreachable; guild changes can be saved once it is back.[/yellow]")
+                    return False
+                
+                @self.firestore.transactional
+                def write_if_current(transaction):
+                    snapshot = doc_ref.raw.get(transaction=transaction, **self.db.call_options)
+                    # Guilds saved before versioning have no version field, and
+                    # DocumentSnapshot.get raises KeyError for a missing field
+                    if (snapshot.to_dict() or {}).get("version", 0) != expected_version:
+                        return False
+                    transaction.set(doc_ref.raw, doc_data)
+                    return True
+                
+                try:
+                    # Not retried after a timeout: the commit may have landed anyway
+                    return self.db.call(lambda: write_if_current(self.db.transaction()), idempotent=False)
+                except DeadlineExceeded:
+                    # Our write is in place only if the stored guild is exactly what we wrote
+                    return doc_ref.get().to_dict() == doc_data
+            elif self.engine:
+                # Transactions run one at a time, so the check and write are atomic
+                with self.transaction():
+                    if expected_version is not None:
+                        stored = self._txn_state.transaction.get("guilds", guild_id)
+                        if (stored or {}).get("version", 0) != expected_version:
+                            return False
+                    self._engine_write("guilds", guild_id, guild_data)
+                with self._index_lock:
+                    self._get_guild_index().put(guild_data)
             else:
                 file_path = self.local_data_dir / "guilds" / f"{guild_id}.json"
-                with open(file_path, "w") as f:
-                    json.dump(guild_data, f, indent=2)
+                with _file_lock(file_path.with_suffix(".lock")):
+                    if expected_version is not None:
+                        stored_version = 0
+                        if file_path.exists():
+                            with open(file_path, "r") as f:
+                                stored_version = json.load(f).get("version", 0)
+                        if stored_version != expected_version:
+                            return False
+                    _write_json_atomic(file_path, guild_data)
+                with self._index_lock:
+                    self._get_guild_index().put(guild_data)
             
             return True
         except Exception as e:
+            _errors.inc("save_guild")
             console.print(f"[red]Error saving guild data: {e}[/red]")
             return False
     
+    @_timed("get_guild")
     def get_guild(self, guild_id):
         """Get guild data
         
@@ -200,17 +400,28 @@ class Database:
         try:
             if self.use_firebase:
                 doc = self.db.collection("guilds").document(guild_id).get()
-                return doc.to_dict() if doc.exists else None
+                guild_data = doc.to_dict() if doc.exists else None
+            elif self.engine:
+                guild_data = self._engine_read("guilds", guild_id)
             else:
                 file_path = self.local_data_dir / "guilds" / f"{guild_id}.json"
+                guild_data = None
                 if file_path.exists():
                     with open(file_path, "r") as f:
-                        return json.load(f)
-                return None
+                        guild_data = json.load(f)
+            
+            if guild_data:
+                # Quest progress lives in atomic counters, not the guild document
+                counters = self.get_quest_progress(guild_id)
+                for quest in guild_data.get("quests", []):
+                    quest["progress"] = counters.get(quest["id"], quest.get("progress", 0))
+            return guild_data
         except Exception as e:
+            _errors.inc("get_guild")
             console.print(f"[red]Error getting guild data: {e}[/red]")
             return None
     
+    @_timed("delete_guild")
     def delete_guild(self, guild_id):
         """Delete guild data
         
@@ -222,17 +433,35 @@ class Database:
         """
         try:
             if self.use_firebase:
-                self.db.collection("guilds").document(guild_id).delete()
+                doc_ref = self.db.collection("guilds").document(guild_id)
+                doc_ref.collection("counters").document("quests").delete()
+                for segment in doc_ref.collection("archive").stream():
+                    doc_ref.collection("archive").document(segment.id).delete()
+                doc_ref.delete()
             else:
+                if self.engine:
+                    self._engine_write("guilds", guild_id)
                 file_path = self.local_data_dir / "guilds" / f"{guild_id}.json"
                 if file_path.exists():
                     file_path.unlink()
+                counter_path = self.local_data_dir / "counters" / f"{guild_id}.json"
+                if counter_path.exists():
+                    counter_path.unlink()
+                archive_dir = self.local_data_dir / "archives" / guild_id
+                if archive_dir.exists():
+                    for segment_path in archive_dir.glob("*.z"):
+                        segment_path.unlink()
+                    archive_dir.rmdir()
+                with self._index_lock:
+                    self._get_guild_index().remove(guild_id)
             
             return True
         except Exception as e:
+            _errors.inc("delete_guild")
             console.print(f"[red]Error deleting guild data: {e}[/red]")
             return False
     
+    @_timed("list_guilds")
     def list_guilds(self):
         """List all guilds
         
@@ -243,14 +472,459 @@ class Database:
             if self.use_firebase:
                 docs = self.db.collection("guilds").stream()
                 return [doc.id for doc in docs]
+            elif self.engine:
+                return self.engine.list_ids("guilds")
             else:
                 guild_files = list((self.local_data_dir / "guilds").glob("*.json"))
                 return [file.stem for file in guild_files]
         except Exception as e:
+            _errors.inc("list_guilds")
             console.print(f"[red]Error listing guilds: {e}[/red]")
             return []
     
+    def iter_documents(self, collection):
+        """Stream the stored documents of a collection one at a time
+        
+        Args:
+            collection (str): "players" or "guilds"
+            
+        Yields:
+            dict: Stored document data
+        """
+        try:
+            if self.use_firebase:
+                for doc in self.db.collection(collection).stream():
+                    yield doc.to_dict()
+            elif self.engine:
+                for doc_id in self.engine.list_ids(collection):
+                    data = self._engine_read(collection, doc_id)
+                    if data is not None:
+                        yield data
+            else:
+                for file in (self.local_data_dir / collection).glob("*.json"):
+                    with open(file, "r") as f:
+                        yield json.load(f)
+        except Exception as e:
+            _errors.inc("iter_documents")
+            console.print(f"[red]Error reading {collection}: {e}[/red]")
+    
+    # Quest progress counter methods
+    @_timed("increment_quest_progress")
+    def increment_quest_progress(self, guild_id, quest_id, amount):
+        """Atomically add to a quest's progress counter
+        
+        Counters are kept apart from the guild document so concurrent
+        increments never race with each other or with full guild saves.
+        
+        Args:
+            guild_id (str): Guild ID
+            quest_id (str): Quest ID
+            amount (int): Progress to add
+            
+        Returns:
+            int: Progress after the increment, or None on error
+        """
+        try:
+            if self.use_firebase:
+                doc_ref = self.db.collection("guilds").document(guild_id).collection("counters").document("quests")
+                doc_ref.set({quest_id: self.firestore.Increment(amount)}, merge=True)
+                return (doc_ref.get().to_dict() or {}).get(quest_id)
+            else:
+                counter_path = self.local_data_dir / "counters" / f"{guild_id}.json"
+                with _file_lock(counter_path.with_suffix(".lock")):
+                    counters = {}
+                    if counter_path.exists():
+                        with open(counter_path, "r") as f:
+                            counters = json.load(f)
+                    counters[quest_id] = counters.get(quest_id, 0) + amount
+                    _write_json_atomic(counter_path, counters)
+                return counters[quest_id]
+        except Exception as e:
+            _errors.inc("increment_quest_progress")
+            console.print(f"[red]Error updating quest progress: {e}[/red]")
+            return None
+    
+    @_timed("get_quest_progress")
+    def get_quest_progress(self, guild_id):
+        """Get all quest progress counters of a guild
+        
+        Args:
+            guild_id (str): Guild ID
+            
+        Returns:
+            dict: Quest ID -> progress
+        """
+        try:
+            if self.use_firebase:
+                doc = self.db.collection("guilds").document(guild_id).collection("counters").document("quests").get()
+                return doc.to_dict() if doc.exists else {}
+            else:
+                counter_path = self.local_data_dir / "counters" / f"{guild_id}.json"
+                if counter_path.exists():
+                    with open(counter_path, "r") as f:
+                        return json.load(f)
+                return {}
+        except Exception as e:
+            _errors.inc("get_quest_progress")
+            console.print(f"[red]Error getting quest progress: {e}[/red]")
+            return {}
+    
+    @_timed("set_quest_progress")
+    def set_quest_progress(self, guild_id, counters):
+        """Replace all quest progress counters of a guild
+        
+        Args:
+            guild_id (str): Guild ID
+            counters (dict): Quest ID -> progress
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self.use_firebase:
+                self.db.collection("guilds").document(guild_id).collection("counters").document("quests").set(counters)
+            else:
+                counter_path = self.local_data_dir / "counters" / f"{guild_id}.json"
+                with _file_lock(counter_path.with_suffix(".lock")):
+                    _write_json_atomic(counter_path, counters)
+            
+            return True
+        except Exception as e:
+            _errors.inc("set_quest_progress")
+            console.print(f"[red]Error saving quest progress: {e}[/red]")
+            return False
+    
+    @_timed("clear_quest_progress")
+    def clear_quest_progress(self, guild_id, quest_id):
+        """Remove a quest's progress counter once the quest is finished
+        
+        Args:
+            guild_id (str): Guild ID
+            quest_id (str): Quest ID
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self.use_firebase:
+                doc_ref = self.db.collection("guilds").document(guild_id).collection("counters").document("quests")
+                doc_ref.set({quest_id: self.firestore.DELETE_FIELD}, merge=True)
+            else:
+                counter_path = self.local_data_dir / "counters" / f"{guild_id}.json"
+                with _file_lock(counter_path.with_suffix(".lock")):
+                    if counter_path.exists():
+                        with open(counter_path, "r") as f:
+                            counters = json.load(f)
+                        if counters.pop(quest_id, None) is not None:
+                            _write_json_atomic(counter_path, counters)
+            
+            return True
+        except Exception as e:
+            _errors.inc("clear_quest_progress")
+            console.print(f"[red]Error clearing quest progress: {e}[/red]")
+            return False
+    
+    # Quest archive methods
+    @_timed("update_archive_segment")
+    def update_archive_segment(self, guild_id, segment_no, update):
+        """Read, change and write a compressed segment of a guild's completed quests
+        
+        The read and write are atomic (a file lock locally, a transaction on
+        Firebase), so sessions archiving the same guild never overwrite
+        each other's records.
+        
+        Args:
+            guild_id (str): Guild ID
+            segment_no (int): Segment number
+            update (callable): Called with the stored segment data (or None); returns
+                the new segment data, or None to leave the segment unchanged
+            
+        Returns:
+            bool: True if the segment was written, False otherwise
+        """
+        try:
+            if self.use_firebase:
+                doc_ref = self.db.collection("guilds").document(guild_id).collection("archive").document(f"{segment_no:06d}")
+                
+                @self.firestore.transactional
+                def update_in_transaction(transaction):
+                    snapshot = doc_ref.raw.get(transaction=transaction, **self.db.call_options)
+                    blob = update((snapshot.to_dict() or {}).get("data"))
+                    if blob is None:
+                        return False
+                    transaction.set(doc_ref.raw, {"data": blob})
+                    return True
+                
+                return self.db.call(lambda: update_in_transaction(self.db.transaction()))
+            else:
+                archive_dir = self.local_data_dir / "archives" / guild_id
+                archive_dir.mkdir(exist_ok=True)
+                segment_path = archive_dir / f"{segment_no:06d}.z"
+                with _file_lock(segment_path.with_suffix(".lock")):
+                    stored = None
+                    if segment_path.exists():
+                        with open(segment_path, "rb") as f:
+                            stored = f.read()
+                    blob = update(stored)
+                    if blob is None:
+                        return False
+                    tmp_path = segment_path.with_name(f"{segment_path.name}.{os.getpid()}.tmp")
+                    with open(tmp_path, "wb") as f:
+                        f.write(blob)
+                    os.replace(tmp_path, segment_path)
+            
+            return True
+        except Exception as e:
+            _errors.inc("update_archive_segment")
+            console.print(f"[red]Error saving quest archive: {e}[/red]")
+            return False
+    
+    @_timed("get_archive_segment")
+    def get_archive_segment(self, guild_id, segment_no):
+        """Get a compressed segment of a guild's completed quests
+        
+        Args:
+            guild_id (str): Guild ID
+            segment_no (int): Segment number
+            
+        Returns:
+            bytes: Compressed segment data, or None if not found
+        """
+        try:
+            if self.use_firebase:
+                doc = self.db.collection("guilds").document(guild_id).collection("archive").document(f"{segment_no:06d}").get()
+                return doc.to_dict()["data"] if doc.exists else None
+            else:
+                segment_path = self.local_data_dir / "archives" / guild_id / f"{segment_no:06d}.z"
+                if segment_path.exists():
+                    with open(segment_path, "rb") as f:
+                        return f.read()
+                return None
+        except Exception as e:
+            _errors.inc("get_archive_segment")
+            console.print(f"[red]Error getting quest archive: {e}[/red]")
+            return None
+    
+    # Membership index methods
+    @_timed("set_membership")
+    def set_membership(self, player_id, guild_id, grade=None):
+        """Record which guild a player belongs to
+        
+        Args:
+            player_id (str): Player ID
+            guild_id (str): Guild ID
+            grade (str, optional): Player's grade level. Defaults to None.
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self.use_firebase:
+                entry = {"player_id": player_id, "guild_id": guild_id}
+                if grade is not None:
+                    entry["grade"] = str(grade)
+                self.db.collection("memberships").document(player_id).set(entry, merge=True)
+            else:
+                self._get_membership_index().set(player_id, guild_id, grade)
+            
+            return True
+        except Exception as e:
+            _errors.inc("set_membership")
+            console.print(f"[red]Error saving membership: {e}[/red]")
+            return False
+    
+    @_timed("remove_membership")
+    def remove_membership(self, player_id):
+        """Record that a player is no longer in a guild
+        
+        Args:
+            player_id (str): Player ID
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self.use_firebase:
+                self.db.collection("memberships").document(player_id).delete()
+            else:
+                self._get_membership_index().remove(player_id)
+            
+            return True
+        except Exception as e:
+            _errors.inc("remove_membership")
+            console.print(f"[red]Error removing membership: {e}[/red]")
+            return False
+    
+    @_timed("get_player_guild")
+    def get_player_guild(self, player_id):
+        """Get the guild a player belongs to
+        
+        Args:
+            player_id (str): Player ID
+            
+        Returns:
+            str: Guild ID, or None if not in a guild
+        """
+        try:
+            if self.use_firebase:
+                doc = self.db.collection("memberships").document(player_id).get()
+                return doc.to_dict().get("guild_id") if doc.exists else None
+            return self._get_membership_index().guild_of(player_id)
+        except Exception as e:
+            _errors.inc("get_player_guild")
+            console.print(f"[red]Error getting membership: {e}[/red]")
+            return None
+    
+    @_timed("get_guild_members_batch")
+    def get_guild_members_batch(self, guild_ids):
+        """Get the members of several guilds in one call
+        
+        Args:
+            guild_ids (list): Guild IDs
+            
+        Returns:
+            dict: Guild ID -> list of {"player_id", "grade"} dictionaries
+        """
+        try:
+            if self.use_firebase:
+                result = {guild_id: [] for guild_id in guild_ids}
+                guild_ids = list(result)
+                # Firestore "in" filters accept at most 30 values
+                for start in range(0, len(guild_ids), 30):
+                    query = self.db.collection("memberships").where("guild_id", "in", guild_ids[start:start + 30])
+                    for doc in query.stream():
+                        entry = doc.to_dict()
+                        result[entry["guild_id"]].append({"player_id": entry["player_id"], "grade": entry.get("grade")})
+                for members in result.values():
+                    members.sort(key=lambda member: member["player_id"])
+                return result
+            return self._get_membership_index().members_of(guild_ids)
+        except Exception as e:
+            _errors.inc("get_guild_members_batch")
+            console.print(f"[red]Error getting guild members: {e}[/red]")
+            return {}
+    
+    @_timed("get_guilds_with_grade")
+    def get_guilds_with_grade(self, grade):
+        """Get the guilds with at least one member in a grade
+        
+        Args:
+            grade (str): Grade level
+            
+        Returns:
+            list: Guild IDs
+        """
+        try:
+            if self.use_firebase:
+                docs = self.db.collection("memberships").where("grade", "==", str(grade)).select(["guild_id"]).stream()
+                return sorted({doc.to_dict()["guild_id"] for doc in docs})
+            return self._get_membership_index().guilds_with_grade(grade)
+        except Exception as e:
+            _errors.inc("get_guilds_with_grade")
+            console.print(f"[red]Error getting guilds by grade: {e}[/red]")
+            return []
+    
+    def _get_membership_index(self):
+        """Get the local membership index, loading or rebuilding it on first use
+        
+        Returns:
+            MembershipIndex: The membership index
+        """
+        if self._membership_index is None:
+            index = MembershipIndex(self.local_data_dir / "indexes" / "membership.log")
+            if not index.load():
+                # First run with an index: build it from the existing guilds
+                index.rebuild_from(self._local_guild_records())
+            self._membership_index = index
+        return self._membership_index
+    
+    @_timed("list_guilds_page")
+    def list_guilds_page(self, order_by="created_at", cursor=None, limit=20, descending=False, subject_focus=None):
+        """List one page of guild summaries
+        
+        Args:
+            order_by (str, optional): "level", "member_count", "created_at" or "subject_focus". Defaults to "created_at".
+            cursor (str, optional): Cursor returned with the previous page. Defaults to None.
+            limit (int, optional): Page size. Defaults to 20.
+            descending (bool, optional): Highest values first. Defaults to False.
+            subject_focus (str, optional): Only guilds with this subject focus. Defaults to None.
+            
+        Returns:
+            tuple: (list of guild summaries, cursor for the next page or None)
+        """
+        try:
+            if self.use_firebase:
+                return self._list_guilds_page_firebase(order_by, cursor, limit, descending, subject_focus)
+            return self._get_guild_index().page(order_by, cursor, limit, descending, subject_focus)
+        except Exception as e:
+            _errors.inc("list_guilds_page")
+            console.print(f"[red]Error listing guilds: {e}[/red]")
+            return [], None
+    
+    def _list_guilds_page_firebase(self, order_by, cursor, limit, descending, subject_focus):
+        """Run a paginated guild query against Firestore
+        
+        Rows come in the same order as GuildIndex.page: by the field, then by
+        ID, with "subject_focus" meaning subject then creation time. Filtering
+        by subject needs a composite index on (subject_focus, field, id);
+        guilds saved before member_count was stored will not appear when
+        ordering by it.
+        """
+        direction = self.firestore.Query.DESCENDING if descending else self.firestore.Query.ASCENDING
+        query = self.db.collection("guilds")
+        
+        if subject_focus is not None:
+            query = query.where("subject_focus", "==", subject_focus)
+        fields = ["subject_focus", "created_at", "id"] if order_by == "subject_focus" else [order_by, "id"]
+        
+        for field in fields:
+            query = query.order_by(field, direction=direction)
+        if cursor:
+            query = query.start_after(dict(zip(fields, decode_cursor(cursor))))
+        
+        # Fetch one extra row to learn whether another page exists
+        docs = query.select(list(SUMMARY_FIELDS)).limit(limit + 1).stream()
+        rows = [doc.to_dict() for doc in docs]
+        for row in rows:
+            row.setdefault("subject_focus", None)
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][field] for field in fields])
+        return rows, next_cursor
+    
+    def _local_guild_records(self):
+        """Load every locally stored guild document
+        
+        Returns:
+            list: Guild data dictionaries
+        """
+        if self.engine:
+            return [self.engine.get("guilds", guild_id) for guild_id in self.engine.list_ids("guilds")]
+        
+        records = []
+        for file in (self.local_data_dir / "guilds").glob("*.json"):
+            with open(file, "r") as f:
+                records.append(json.load(f))
+        return records
+    
+    def _get_guild_index(self):
+        """Get the local guild index, loading or rebuilding it on first use
+        
+        Returns:
+            GuildIndex: The guild index
+        """
+        if self._guild_index is None:
+            index = GuildIndex(self.local_data_dir / "indexes" / "guilds.log")
+            if not index.load():
+                # First run with an index: build it from the existing guilds
+                index.rebuild_from(self._local_guild_records())
+            self._guild_index = index
+        return self._guild_index
+    
     # Question data methods
+    @_timed("save_questions")
     def save_questions(self, subject, grade, questions):
         """Save questions for a subject and grade
         
@@ -280,9 +954,11 @@ class Database:
             
             return True
         except Exception as e:
+            _errors.inc("save_questions")
             console.print(f"[red]Error saving questions: {e}[/red]")
             return False
     
+    @_timed("get_questions")
     def get_questions(self, subject, grade):
         """Get questions for a subject and grade
         
@@ -306,9 +982,11 @@ class Database:
                         return json.load(f)["questions"]
                 return []
         except Exception as e:
+            _errors.inc("get_questions")
             console.print(f"[red]Error getting questions: {e}[/red]")
             return []
     
+    @_timed("get_all_questions")
     def get_all_questions(self):
         """Get all questions
         
@@ -342,6 +1020,7 @@ class Database:
                         
                         result[subject][grade] = data["questions"]
         except Exception as e:
+            _errors.inc("get_all_questions")
             console.print(f"[red]Error getting all questions: {e}[/red]")
         
         return result
@@ -349,8 +1028,12 @@ class Database:
 
 # For testing
 if __name__ == "__main__":
-    # Initialize database
-    db = Database(use_firebase=False)  # Use local storage for testing
+    import shutil
+    import tempfile
+    
+    # Initialize database in a scratch directory so the test leaves no files behind
+    data_dir = tempfile.mkdtemp()
+    db = Database(use_firebase=False, data_dir=data_dir)  # Use local storage for testing
     
     # Test saving and retrieving player data
     test_player = {
@@ -370,4 +1053,7 @@ if __name__ == "__main__":
     if retrieved_player:
         console.print("[green]Player data saved and retrieved successfully![/green]")
     else:
-        console.print("[red]Error retrieving player data.[/red]")
\ No newline at end of file
+        console.print("[red]Error retrieving player data.[/red]")
+    
+    db.close()
+    shutil.rmtree(data_dir, ignore_errors=True)
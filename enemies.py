@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Enemies module with the data-driven enemy template registry
+"""
+
+import json
+import math
+import random
+from bisect import bisect_right
+from pathlib import Path
+
+from sampling import AliasSampler
+
+CONTENT_DIR = Path(__file__).parent / "content"
+MAX_LEVEL = 50  # Highest player level
+
+
+def _compile_scaling(scaling):
+    """Precompute an integer stat for every level
+    
+    Fractional values round half up, so 93.5 HP becomes 94 at every level
+    (round() would send 110.5 down to 110).
+    
+    Args:
+        scaling (dict): {"base": number, "per_level": number}
+        
+    Returns:
+        tuple: Stat value indexed by level (index 0 unused)
+    """
+    base = scaling.get("base", 0)
+    per_level = scaling.get("per_level", 0)
+    return tuple(math.floor(base + per_level * level + 0.5) for level in range(MAX_LEVEL + 1))
+
+
+class EnemyTemplate:
+    """An enemy definition with its scaling tables compiled"""
+    
+    __slots__ = ("id", "name", "subject", "sprite", "min_level", "max_level", "weight", "hp_by_level")
+    
+    def __init__(self, data):
+        """Compile a template from its data file entry
+        
+        Args:
+            data (dict): Template data
+        """
+        self.id = data["id"]
+        self.name = data["name"]
+        self.subject = data["subject"]
+        self.sprite = data["sprite"]
+        self.min_level = data.get("min_level", 1)
+        self.max_level = data.get("max_level", MAX_LEVEL)
+        self.weight = data.get("weight", 1)
+        self.hp_by_level = _compile_scaling(data["hp"])
+    
+    def hp_at(self, level):
+        """Get the HP of this enemy at a player level
+        
+        Args:
+            level (int): Player level
+            
+        Returns:
+            int: Hit points
+        """
+        return self.hp_by_level[min(max(level, 1), MAX_LEVEL)]
+
+
+class EnemyRegistry:
+    """Enemy templates loaded once and indexed by subject and level band
+    
+    Templates come from content/enemies.json plus every file in
+    content/enemy_packs/, so new enemies are added by dropping in a file.
+    Level bands are the ranges between the templates' level limits, so
+    every level in a band has exactly the same eligible enemies.
+    """
+    
+    def __init__(self, content_dir=CONTENT_DIR):
+        """Load every enemy file
+        
+        Args:
+            content_dir (Path, optional): Content directory. Defaults to content/.
+        """
+        self.templates = {}  # Template ID -> EnemyTemplate
+        self._band_starts = []  # First level of each band, ascending
+        self._index = {}  # (subject, band) -> AliasSampler over templates
+        
+        content_dir = Path(content_dir)
+        files = [content_dir / "enemies.json"] + sorted((content_dir / "enemy_packs").glob("*.json"))
+        for path in files:
+            if path.exists():
+                self.load_file(path)
+    
+    def load_file(self, path):
+        """Add the templates of an enemy file, replacing any with the same ID
+        
+        Args:
+            path (Path): Enemy file
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for entry in data.get("enemies", []):
+            self.templates[entry["id"]] = EnemyTemplate(entry)
+        self._build_index()
+    
+    def _build_index(self):
+        limits = {1}
+        for template in self.templates.values():
+            limits.add(template.min_level)
+            limits.add(template.max_level + 1)
+        self._band_starts = sorted(limits)
+        
+        by_slot = {}
+        for band, start in enumerate(self._band_starts):
+            for template in self.templates.values():
+                if template.min_level <= start <= template.max_level:
+                    by_slot.setdefault((template.subject, band), []).append((template, template.weight))
+        self._index = {slot: AliasSampler(weighted) for slot, weighted in by_slot.items()}
+    
+    def level_band(self, level):
+        """Get the index band of a level
+        
+        Args:
+            level (int): Player level
+            
+        Returns:
+            int: Band number
+        """
+        return bisect_right(self._band_starts, min(max(level, 1), MAX_LEVEL)) - 1
+    
+    @property
+    def subjects(self):
+        """Subjects that have at least one enemy"""
+        return sorted({template.subject for template in self.templates.values()})
+    
+    def get(self, template_id):
+        """Get a template by ID
+        
+        Args:
+            template_id (str): Template ID
+            
+        Returns:
+            EnemyTemplate: The template, or None if unknown
+        """
+        return self.templates.get(template_id)
+    
+    def choose(self, subject, level, rng=random):
+        """Pick a random template for a subject at a player level
+        
+        Args:
+            subject (str): Enemy subject
+            level (int): Player level
+            rng (random.Random, optional): Random number generator. Defaults to the random module.
+            
+        Returns:
+            EnemyTemplate: Chosen template, or None if the subject has no enemies
+        """
+        sampler = self._index.get((subject, self.level_band(level)))
+        if sampler is None:
+            return None
+        return sampler.sample(rng)
+
+
+_shared_registry = None
+
+
+def get_enemy_registry():
+    """Get the enemy registry shared by every combat system, loading it once
+    
+    Returns:
+        EnemyRegistry: Shared registry
+    """
+    global _shared_registry
+    if _shared_registry is None:
+        _shared_registry = EnemyRegistry()
+    return _shared_registry
+
+
+# For testing
+if __name__ == "__main__":
+    import time
+    
+    registry = EnemyRegistry()
+    print(f"Loaded {len(registry.templates)} templates for {', '.join(registry.subjects)}")
+    
+    rng = random.Random(2)
+    spawns = 200000
+    start = time.perf_counter()
+    for i in range(spawns):
+        template = registry.choose(registry.subjects[i % 3], 1 + i % MAX_LEVEL, rng)
+        template.hp_at(1 + i % MAX_LEVEL)
+    elapsed = time.perf_counter() - start
+    print(f"{spawns} spawns in {elapsed * 1000:.0f}ms ({spawns / elapsed:.0f}/sec)")
+    
+    for level in (1, 10, 25):
+        picks = {registry.choose("math", level, rng).name for _ in range(200)}
+        print(f"Math enemies at level {level}: {', '.join(sorted(picks))}")
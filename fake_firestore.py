@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Fake Firestore module: an in-memory stand-in for firebase_admin.firestore
+
+Implements the slice of the Firestore API that Database uses (documents,
+subcollections, merge writes with Increment and DELETE_FIELD, simple
+queries and transactions), plus failure injection for testing outages:
+
+    from fake_firestore import FakeFirestore
+    db = Database(firestore_module=FakeFirestore())
+"""
+
+import copy
+import threading
+import time
+
+
+class ServiceUnavailable(Exception):
+    """Raised during a simulated outage, like google.api_core.exceptions.ServiceUnavailable"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call outlasts its timeout, like google.api_core.exceptions.DeadlineExceeded"""
+
+
+class PermissionDenied(Exception):
+    """A non-transient error, like google.api_core.exceptions.PermissionDenied"""
+
+
+class Increment:
+    """Write transform adding to a numeric field"""
+    
+    def __init__(self, value):
+        self.value = value
+
+
+class _Sentinel:
+    def __init__(self, name):
+        self.name = name
+    
+    def __repr__(self):
+        return self.name
+
+
+DELETE_FIELD = _Sentinel("DELETE_FIELD")
+
+
+class Query:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+
+_FILTERS = {
+    "==": lambda stored, value: stored == value,
+    "in": lambda stored, value: stored in value,
+    ">": lambda stored, value: stored > value,
+    ">=": lambda stored, value: stored >= value,
+    "<": lambda stored, value: stored < value,
+    "<=": lambda stored, value: stored <= value,
+}
+
+
+def _field_value(data, field, missing=None):
+    """Get a possibly nested field ("a.b") of a document
+    
+    Args:
+        data (dict): Document data
+        field (str): Field path
+        missing (type, optional): Exception to raise for a missing field. Defaults to returning None.
+        
+    Returns:
+        The value, or None if missing
+    """
+    for part in field.split("."):
+        if not isinstance(data, dict) or part not in data:
+            if missing:
+                raise missing(field)
+            return None
+        data = data[part]
+    return data
+
+
+def _order_key(value):
+    """Sort key putting missing and null values first, as Firestore does"""
+    return (value is not None, value if value is not None else 0)
+
+
+def transactional(func):
+    """Decorator running func(transaction, ...) as one atomic transaction
+    
+    Args:
+        func (callable): Transaction body; its first argument is the transaction
+        
+    Returns:
+        callable: Runs the body and commits its writes, or none of them if it raises
+    """
+    def run(transaction, *args, **kwargs):
+        with transaction._client._lock:
+            result = func(transaction, *args, **kwargs)
+            transaction._commit()
+        return result
+    return run
+
+
+def _apply_write(existing, data, merge):
+    """Compute a document after a set() write
+    
+    Args:
+        existing (dict): Current data, or None
+        data (dict): Written data, possibly with Increment and DELETE_FIELD values
+        merge (bool): Whether to merge into the existing data
+        
+    Returns:
+        dict: New document data
+    """
+    result = copy.deepcopy(existing) if merge and existing else {}
+    for field, value in data.items():
+        if value is DELETE_FIELD:
+            result.pop(field, None)
+        elif isinstance(value, Increment):
+            result[field] = result.get(field, 0) + value.value
+        else:
+            result[field] = copy.deepcopy(value)
+    return result
+
+
+class DocumentSnapshot:
+    """A document read at one point in time"""
+    
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+    
+    @property
+    def exists(self):
+        return self._data is not None
+    
+    def get(self, field):
+        """Get a field, raising KeyError if the document lacks it, like the real client"""
+        if self._data is None:
+            return None
+        value = _field_value(self._data, field, KeyError)
+        return copy.deepcopy(value)
+    
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+
+class DocumentReference:
+    """Reference to a document path"""
+    
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+    
+    def collection(self, name):
+        return CollectionReference(self._client, f"{self.path}/{name}")
+    
+    def get(self, transaction=None, retry=None, timeout=None):
+        self._client._call("get", timeout)
+        return DocumentSnapshot(self, self._client._documents.get(self.path))
+    
+    def set(self, data, merge=False, retry=None, timeout=None):
+        self._client._call("set", timeout)
+        with self._client._lock:
+            self._client._documents[self.path] = _apply_write(self._client._documents.get(self.path), data, merge)
+    
+    def delete(self, retry=None, timeout=None):
+        self._client._call("delete", timeout)
+        with self._client._lock:
+            self._client._documents.pop(self.path, None)
+
+
+class CollectionReference:
+    """Reference to a collection, which is also a query over all its documents"""
+    
+    def __init__(self, client, path, filters=(), orders=(), start=None, fields=None, limit=None, group=False):
+        self._client = client
+        self.path = path
+        self._group = group  # Collection group query: every collection with this name
+        self._filters = filters
+        self._orders = orders
+        self._start = start
+        self._fields = fields
+        self._limit = limit
+    
+    def _with(self, **changes):
+        args = {"filters": self._filters, "orders": self._orders, "start": self._start,
+                "fields": self._fields, "limit": self._limit, "group": self._group}
+        args.update(changes)
+        return CollectionReference(self._client, self.path, **args)
+    
+    def document(self, doc_id):
+        return DocumentReference(self._client, f"{self.path}/{doc_id}")
+    
+    def where(self, field, op, value):
+        if op not in _FILTERS:
+            raise ValueError(f"Unsupported filter: {op}")
+        return self._with(filters=self._filters + ((field, op, value),))
+    
+    def order_by(self, field, direction=Query.ASCENDING):
+        return self._with(orders=self._orders + ((field, direction),))
+    
+    def start_after(self, values):
+        return self._with(start=values)
+    
+    def select(self, fields):
+        return self._with(fields=list(fields))
+    
+    def limit(self, count):
+        return self._with(limit=count)
+    
+    def _matches(self, data):
+        for field, op, value in self._filters:
+            stored = _field_value(data, field)
+            if stored is None and op != "==":
+                return False
+            if not _FILTERS[op](stored, value):
+                return False
+        return True
+    
+    def _in_collection(self, path):
+        parent = path.rpartition("/")[0]
+        if self._group:
+            return parent.rpartition("/")[2] == self.path
+        return parent == self.path
+    
+    def stream(self, transaction=None, retry=None, timeout=None):
+        self._client._call("stream", timeout)
+        with self._client._lock:
+            docs = [(path, data) for path, data in self._client._documents.items()
+                    if self._in_collection(path) and self._matches(data)]
+        
+        # Sort by each ordering, last one first, so earlier orderings take precedence
+        for field, direction in reversed(self._orders):
+            docs.sort(key=lambda doc: _order_key(doc[1].get(field)), reverse=direction == Query.DESCENDING)
+        if self._start is not None and self._orders:
+            fields = [field for field, _ in self._orders]
+            boundary = tuple(_order_key(self._start.get(field)) for field in fields)
+            descending = self._orders[0][1] == Query.DESCENDING
+            docs = [doc for doc in docs
+                    if (tuple(_order_key(doc[1].get(field)) for field in fields) < boundary if descending
+                        else tuple(_order_key(doc[1].get(field)) for field in fields) > boundary)]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        
+        for path, data in docs:
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield DocumentSnapshot(DocumentReference(self._client, path), copy.deepcopy(data))
+
+
+class Transaction:
+    """Writes buffered until the transactional function returns"""
+    
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+    
+    def set(self, reference, data, merge=False):
+        self._writes.append((reference.path, data, merge))
+    
+    def delete(self, reference):
+        self._writes.append((reference.path, None, False))
+    
+    def _commit(self):
+        # Like the real client, commits take no timeout
+        self._client._call("commit")
+        for path, data, merge in self._writes:
+            if data is None:
+                self._client._documents.pop(path, None)
+            else:
+                self._client._documents[path] = _apply_write(self._client._documents.get(path), data, merge)
+        self._writes = []
+        if self._client._lost_replies:
+            self._client._lost_replies -= 1
+            raise DeadlineExceeded("Commit applied but its reply was lost")
+
+
+class FakeClient:
+    """In-memory Firestore database with failure injection
+    
+    Set outage to make every call raise ServiceUnavailable, latency to
+    delay every call (calls given a shorter timeout raise DeadlineExceeded),
+    fail_next() to fail a number of calls, or lose_commit_replies() to make
+    commits apply and then time out.
+    """
+    
+    def __init__(self):
+        self._documents = {}  # Document path -> data
+        self._lock = threading.RLock()
+        self.outage = False
+        self.latency = 0.0
+        self.calls = 0
+        self._failures = []  # Exceptions raised by the next calls
+        self._lost_replies = 0  # Commits that apply but report DeadlineExceeded
+    
+    def fail_next(self, count=1, error=None):
+        """Make the next calls fail
+        
+        Args:
+            count (int, optional): Number of calls to fail. Defaults to 1.
+            error (Exception, optional): Error to raise. Defaults to ServiceUnavailable.
+        """
+        self._failures.extend([error or ServiceUnavailable("Injected failure")] * count)
+    
+    def lose_commit_replies(self, count=1):
+        """Make the next transaction commits apply, then raise DeadlineExceeded
+        
+        Args:
+            count (int, optional): Number of commits. Defaults to 1.
+        """
+        self._lost_replies += count
+    
+    def _call(self, operation, timeout=None):
+        self.calls += 1
+        if self.latency:
+            if timeout is not None and self.latency > timeout:
+                time.sleep(timeout)
+                raise DeadlineExceeded(f"{operation} took longer than {timeout}s")
+            time.sleep(self.latency)
+        if self.outage:
+            raise ServiceUnavailable(f"Firestore unreachable during {operation}")
+        if self._failures:
+            raise self._failures.pop(0)
+    
+    def collection(self, name):
+        return CollectionReference(self, name)
+    
+    def document(self, path):
+        return DocumentReference(self, path)
+    
+    def collection_group(self, name):
+        return CollectionReference(self, name, group=True)
+    
+    def transaction(self):
+        return Transaction(self)
+    
+    def dump(self):
+        """Get a copy of every stored document
+        
+        Returns:
+            dict: Document path -> data
+        """
+        with self._lock:
+            return copy.deepcopy(self._documents)
+
+
+class FakeFirestore:
+    """Stand-in for the firebase_admin.firestore module, bound to one fake database"""
+    
+    Increment = Increment
+    DELETE_FIELD = DELETE_FIELD
+    Query = Query
+    transactional = staticmethod(transactional)
+    
+    def __init__(self, fake_client=None):
+        """Initialize the stand-in
+        
+        Args:
+            fake_client (FakeClient, optional): Database returned by client(). Defaults to a new one.
+        """
+        self.fake_client = fake_client or FakeClient()
+    
+    def client(self):
+        return self.fake_client
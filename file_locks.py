@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+File lock module for local storage shared between game processes
+"""
+
+from contextlib import contextmanager
+
+# File locking for local storage shared between processes
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path):
+    """Hold an exclusive inter-process lock on a lock file
+    
+    Args:
+        lock_path (Path): Lock file to lock (created if missing)
+    """
+    with open(lock_path, "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def try_lock_file(lock_path):
+    """Take an exclusive inter-process lock without waiting, held until unlock_file
+    
+    Args:
+        lock_path (Path): Lock file to lock (created if missing)
+        
+    Returns:
+        file: The open lock file, or None if another process holds the lock
+    """
+    lock_file = open(lock_path, "a+")
+    try:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def unlock_file(lock_file):
+    """Release a lock taken with try_lock_file
+    
+    Args:
+        lock_file (file): Lock file returned by try_lock_file
+    """
+    if fcntl:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    lock_file.close()
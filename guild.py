@@ -6,35 +6,123 @@ Guild module for collaborative features
 
 import time
 import uuid
+from bisect import bisect_right
 from rich.console import Console
 from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
 from rich.table import Table
 
+from codec import encode_guild, decode_guild
+from leaderboard import LeaderboardService
+from metrics import get_registry, timed
+from migrations import upgrade_guild, GUILD_SCHEMA_VERSION
+from quest_archive import QuestArchive, empty_quest_stats
+from quest_scheduler import QuestExpiryScheduler
+from session import get_session
+
 console = Console()
 
+GUILD_MAX_LEVEL = 50
+QUEST_EXPIRY_RETRY_DELAY = 5.0  # Seconds before retrying an expiry whose guild could not be saved
+QUEST_ARCHIVE_BATCH = 25  # Completed quests kept on the guild before they move to the archive together
+
+_write_conflicts = get_registry().counter("edurpg_guild_write_conflicts_total",
+                                          "Guild saves rejected by the version check and retried")
+
+
+def _timed(operation):
+    """Time a guild mutation into the shared latency histogram
+    
+    Args:
+        operation (str): Operation label
+        
+    Returns:
+        callable: Decorator
+    """
+    return timed("edurpg_guild_seconds", "Latency of guild mutations", operation=operation)
+
+
+def _build_guild_level_curve():
+    """Build the cumulative XP needed to reach each guild level
+    
+    Returns:
+        list: Total XP required for level 1, 2, ... GUILD_MAX_LEVEL
+    """
+    # Every level takes another 1000 XP: level L starts at (L - 1) * 1000 total XP
+    return [(level - 1) * 1000 for level in range(1, GUILD_MAX_LEVEL + 1)]
+
+
+GUILD_LEVEL_THRESHOLDS = _build_guild_level_curve()
+
+
+def guild_level_for_xp(xp):
+    """Get the guild level reached with a total amount of XP
+    
+    Args:
+        xp (int): Total guild XP
+        
+    Returns:
+        int: Guild level (1 to GUILD_MAX_LEVEL)
+    """
+    return max(1, bisect_right(GUILD_LEVEL_THRESHOLDS, xp))
+
+
 class Guild:
     """Guild class for collaborative gameplay"""
     
-    def __init__(self, name, description, leader_id):
+    def __init__(self, name, description, leader_id, subject_focus=None):
         """Initialize a new guild
         
         Args:
             name (str): Guild name
             description (str): Guild description
             leader_id (str): User ID of the guild leader
+            subject_focus (str, optional): Main subject of the guild. Defaults to None.
         """
         self.id = str(uuid.uuid4())[:8]  # Generate a short unique ID
         self.name = name
         self.description = description
         self.leader_id = leader_id
+        self.subject_focus = subject_focus
         self.members = {leader_id: "Leader"}  # User ID -> Role mapping
         self.quests = []  # List of active quests
-        self.completed_quests = []  # List of completed quests
+        self._quest_index = {}  # Quest ID -> active quest
+        self.completed_quests = []  # Completed quests not yet moved to the archive
+        self.quest_stats = empty_quest_stats()  # Summary of every completed quest
         self.chat_history = []  # List of chat messages
         self.created_at = time.time()
         self.xp = 0  # Guild XP
         self.level = 1  # Guild level
+        self.member_xp = {}  # User ID -> XP contributed to the guild
+        self.version = 0  # Incremented on every saved change
+        self._listeners = []  # Callbacks notified of guild events
+    
+    def add_listener(self, callback):
+        """Register a callback for guild events
+        
+        Args:
+            callback (callable): Called as callback(event, guild, payload)
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def remove_listener(self, callback):
+        """Stop notifying a callback of guild events
+        
+        Args:
+            callback (callable): Callback passed to add_listener
+        """
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def _emit(self, event, **payload):
+        """Notify listeners of a guild event
+        
+        Args:
+            event (str): Event name
+            **payload: Event data
+        """
+        for callback in self._listeners:
+            callback(event, self, payload)
     
     def add_member(self, user_id, role="Member"):
         """Add a member to the guild
@@ -50,6 +138,7 @@ class Guild:
             return False
         
         self.members[user_id] = role
+        self._emit("member_added", user_id=user_id, role=role)
         return True
     
     def remove_member(self, user_id):
@@ -65,6 +154,7 @@ class Guild:
             return False
         
         del self.members[user_id]
+        self._emit("member_removed", user_id=user_id)
         return True
     
     def change_role(self, user_id, new_role):
@@ -90,51 +180,127 @@ class Guild:
             quest (dict): Quest data
         """
         self.quests.append(quest)
+        self._quest_index[quest["id"]] = quest
+        self._emit("quest_added", quest=quest)
+    
+    def get_quest(self, quest_id):
+        """Get an active quest by ID
+        
+        Args:
+            quest_id (str): ID of the quest
+            
+        Returns:
+            dict: The quest, or None if not active
+        """
+        return self._quest_index.get(quest_id)
     
-    def complete_quest(self, quest_id):
+    def _remove_quest(self, quest_id):
+        """Remove an active quest
+        
+        Args:
+            quest_id (str): ID of the quest
+            
+        Returns:
+            dict: The removed quest, or None if not active
+        """
+        quest = self._quest_index.pop(quest_id, None)
+        if quest is not None:
+            self.quests.remove(quest)
+        return quest
+    
+    def complete_quest(self, quest_id, now=None):
         """Mark a quest as completed
         
         Args:
             quest_id (str): ID of the quest to complete
+            now (float, optional): Completion time. Defaults to time.time().
             
         Returns:
             bool: True if completed, False if not found
         """
-        for i, quest in enumerate(self.quests):
-            if quest["id"] == quest_id:
-                completed_quest = self.quests.pop(i)
-                completed_quest["completed_at"] = time.time()
-                self.completed_quests.append(completed_quest)
-                
-                # Add XP to guild
-                self.gain_xp(completed_quest["xp_reward"])
-                
-                return True
+        completed_quest = self._remove_quest(quest_id)
+        if completed_quest is None:
+            return False
+        
+        completed_quest["completed_at"] = time.time() if now is None else now
+        self.completed_quests.append(completed_quest)
+        self._record_completion(completed_quest)
+        self._emit("quest_completed", quest=completed_quest)
+        
+        # Add XP to guild
+        self.gain_xp(completed_quest["xp_reward"])
+        
+        return True
+    
+    def _record_completion(self, quest):
+        """Update the summary counters for a completed quest
+        
+        Args:
+            quest (dict): Completed quest
+        """
+        stats = self.quest_stats
+        stats["completed"] += 1
+        stats["xp_earned"] += quest.get("xp_reward", 0)
+        subject = quest.get("subject", "all")
+        stats["by_subject"][subject] = stats["by_subject"].get(subject, 0) + 1
+        stats["last_completed_at"] = quest.get("completed_at")
+    
+    def mark_archived(self, count):
+        """Drop the oldest completed quests once they are in the archive
         
-        return False
+        Args:
+            count (int): Number of completed quests that were archived
+        """
+        del self.completed_quests[:count]
+        self.quest_stats["archived"] += count
     
-    def add_chat_message(self, user_id, user_name, message):
+    def expire_quest(self, quest_id):
+        """Drop an active quest whose time limit has passed
+        
+        Args:
+            quest_id (str): ID of the quest to expire
+            
+        Returns:
+            bool: True if expired, False if not found
+        """
+        expired_quest = self._remove_quest(quest_id)
+        if expired_quest is None:
+            return False
+        
+        self._emit("quest_expired", quest=expired_quest)
+        return True
+    
+    def add_chat_message(self, user_id, user_name, message, now=None):
         """Add a chat message to the guild
         
         Args:
             user_id (str): ID of the user sending the message
             user_name (str): Name of the user sending the message
             message (str): Message content
+            now (float, optional): Time the message was sent. Defaults to time.time().
+            
+        Returns:
+            dict: The stored chat message
         """
-        self.chat_history.append({
+        chat_message = {
             "user_id": user_id,
             "user_name": user_name,
             "message": message,
-            "timestamp": time.time()
-        })
+            "timestamp": time.time() if now is None else now
+        }
+        self.chat_history.append(chat_message)
         
         # Limit chat history to last 100 messages
         if len(self.chat_history) > 100:
             self.chat_history = self.chat_history[-100:]
+        
+        return chat_message
     
     def gain_xp(self, amount):
         """Add XP to the guild and check for level up
         
+        Large rewards can raise the guild several levels at once.
+        
         Args:
             amount (int): Amount of XP to add
             
@@ -143,12 +309,35 @@ class Guild:
         """
         self.xp += amount
         
-        # Check for level up (simple formula: level * 1000 XP needed)
-        if self.xp >= self.level * 1000 and self.level < 50:  # Max level 50
-            self.level += 1
-            return True
+        # Look up the level on the cumulative curve (1000 XP per level)
+        old_level = self.level
+        self.level = max(self.level, guild_level_for_xp(self.xp))
+        leveled_up = self.level > old_level
+        
+        self._emit("xp_gained", amount=amount, leveled_up=leveled_up)
+        if leveled_up:
+            self._emit("level_up", old_level=old_level, new_level=self.level)
+        return leveled_up
+    
+    def apply_contributions(self, contributions):
+        """Add a batch of member XP contributions in one step
+        
+        Args:
+            contributions (list): (user_id, amount) tuples
+            
+        Returns:
+            dict: Total XP added plus the level before and after
+        """
+        total = 0
+        for user_id, amount in contributions:
+            self.member_xp[user_id] = self.member_xp.get(user_id, 0) + amount
+            total += amount
+        
+        old_level = self.level
+        if total:
+            self.gain_xp(total)
         
-        return False
+        return {"total": total, "old_level": old_level, "new_level": self.level}
     
     def to_dict(self):
         """Convert guild data to dictionary for saving
@@ -161,13 +350,18 @@ class Guild:
             "name": self.name,
             "description": self.description,
             "leader_id": self.leader_id,
+            "subject_focus": self.subject_focus,
             "members": self.members,
             "quests": self.quests,
             "completed_quests": self.completed_quests,
+            "quest_stats": self.quest_stats,
             "chat_history": self.chat_history,
             "created_at": self.created_at,
             "xp": self.xp,
-            "level": self.level
+            "level": self.level,
+            "member_xp": self.member_xp,
+            "version": self.version,
+            "schema_version": GUILD_SCHEMA_VERSION
         }
     
     @classmethod
@@ -180,32 +374,73 @@ class Guild:
         Returns:
             Guild: New guild instance
         """
+        data = upgrade_guild(data)
         guild = cls(data["name"], data["description"], data["leader_id"])
         guild.id = data["id"]
+        guild.subject_focus = data["subject_focus"]
         guild.members = data["members"]
         guild.quests = data["quests"]
+        guild._quest_index = {quest["id"]: quest for quest in guild.quests}
         guild.completed_quests = data["completed_quests"]
+        guild.quest_stats = data["quest_stats"]
         guild.chat_history = data["chat_history"]
         guild.created_at = data["created_at"]
         guild.xp = data["xp"]
         guild.level = data["level"]
+        guild.member_xp = data["member_xp"]
+        guild.version = data["version"]
         return guild
+    
+    def to_bytes(self):
+        """Convert guild data to the compact binary format
+        
+        Returns:
+            bytes: Encoded guild data
+        """
+        return encode_guild(self.to_dict())
+    
+    @classmethod
+    def from_bytes(cls, blob):
+        """Create a guild from the compact binary format
+        
+        Args:
+            blob (bytes): Encoded guild data
+            
+        Returns:
+            Guild: New guild instance
+        """
+        return cls.from_dict(decode_guild(blob))
 
 
 class GuildSystem:
     """System for managing guilds and quests"""
     
-    def __init__(self, player, database):
+    def __init__(self, player, database, leaderboard=None, chat_hub=None, session=None):
         """Initialize the guild system
         
         Args:
             player: Player object
             database: Database object for persistence
+            leaderboard (LeaderboardService, optional): Shared leaderboards. Defaults to a new one.
+            chat_hub (ChatHub, optional): Hub pushing chat to live sessions. Defaults to None.
+            session (Session, optional): Source of input, IDs and time. Defaults to the shared session.
         """
         self.player = player
         self.db = database
+        self.chat_hub = chat_hub
+        self.session = session or get_session()
         self.guilds = {}  # Guild ID -> Guild object mapping
+        self.leaderboard = leaderboard or LeaderboardService()
+        self.leaderboard.track_player(player)
+        self.quest_scheduler = QuestExpiryScheduler()
+        self.quest_archive = QuestArchive(database)
+        self._pending_memberships = []  # (guild_id, user_id, joined) awaiting a successful save
+        self._pending_contributions = {}  # Guild ID -> list of (user_id, amount)
         self.quest_templates = self._load_quest_templates()
+        
+        # With a write-ahead log, saves are cheap enough to persist every player change
+        if getattr(database, "engine", None):
+            player.add_listener(self._on_player_event)
     
     def _load_quest_templates(self):
         """Load quest templates
@@ -224,7 +459,7 @@ class GuildSystem:
                 "time_limit": 86400,  # 24 hours in seconds
                 "min_level": 1,
                 "xp_reward": 500,
-                "item_reward": {"name": "Advanced Calculator", "type": "tool", "subject": "math", "effect": {"trait_bonus": {"math": 10}}}
+                "item_reward": "advanced_calculator"
             },
             {
                 "name": "Science Sprint",
@@ -234,7 +469,7 @@ class GuildSystem:
                 "time_limit": 43200,  # 12 hours in seconds
                 "min_level": 3,
                 "xp_reward": 300,
-                "item_reward": {"name": "Lab Equipment", "type": "tool", "subject": "science", "effect": {"trait_bonus": {"science": 8}}}
+                "item_reward": "lab_equipment"
             },
             {
                 "name": "Historical Hunt",
@@ -244,7 +479,7 @@ class GuildSystem:
                 "time_limit": 172800,  # 48 hours in seconds
                 "min_level": 2,
                 "xp_reward": 400,
-                "item_reward": {"name": "Ancient Artifact", "type": "tool", "subject": "history", "effect": {"trait_bonus": {"history": 9}}}
+                "item_reward": "ancient_artifact"
             },
             {
                 "name": "Multi-Subject Challenge",
@@ -254,35 +489,64 @@ class GuildSystem:
                 "time_limit": 86400,  # 24 hours in seconds
                 "min_level": 5,
                 "xp_reward": 600,
-                "item_reward": {"name": "Knowledge Orb", "type": "artifact", "subject": "all", "effect": {"xp_bonus": 0.1}}
+                "item_reward": "knowledge_orb"
             },
         ]
     
-    def create_guild(self, name, description):
-        """Create a new guild
+    @_timed("create_guild")
+    def new_guild(self, name, description, subject_focus=None):
+        """Create a guild led by the player without printing anything
         
         Args:
             name (str): Guild name
             description (str): Guild description
+            subject_focus (str, optional): Main subject of the guild. Defaults to None.
             
         Returns:
-            Guild: The created guild
+            Guild: The created guild, or None if the name is blank or the player is already in a guild
         """
+        if not name.strip() or self.player.guild_id:
+            return None
+        
         # Create the guild with the player as leader
-        guild = Guild(name, description, self.player.name)  # Using player name as ID for simplicity
+        guild = Guild(name, description, self.player.name, subject_focus)  # Using player name as ID for simplicity
+        guild.id = self.session.new_id()
+        guild.created_at = self.session.clock()
         
         # Add to local cache
-        self.guilds[guild.id] = guild
+        self._cache_guild(guild)
         
-        # Save to database
-        self._save_guild(guild)
+        # Save the guild and the player's new guild together
+        with self.db.transaction():
+            self._save_guild(guild)
+            self.player.guild_id = guild.id
+            self._save_player()
+        self.db.set_membership(self.player.name, guild.id, self.player.grade)  # Using player name as ID for simplicity
+        return guild
+    
+    def create_guild(self, name, description, subject_focus=None):
+        """Create a new guild
         
-        # Update player's guild
-        self.player.join_guild(guild.id)
+        Args:
+            name (str): Guild name
+            description (str): Guild description
+            subject_focus (str, optional): Main subject of the guild. Defaults to None.
+            
+        Returns:
+            Guild: The created guild, or None if it could not be created
+        """
+        guild = self.new_guild(name, description, subject_focus)
+        if guild is None:
+            if self.player.guild_id:
+                console.print(f"[bold yellow]You are already in a guild. Leave it first.[/bold yellow]")
+            else:
+                console.print(f"[bold red]A guild needs a name![/bold red]")
+            return None
         
         console.print(f"[bold green]Guild '{name}' created successfully![/bold green]")
         return guild
     
+    @_timed("join_guild")
     def join_guild(self, guild_id):
         """Join an existing guild
         
@@ -303,20 +567,21 @@ class GuildSystem:
             console.print(f"[bold yellow]You are already in a guild. Leave it first.[/bold yellow]")
             return False
         
-        # Add player to guild
-        if guild.add_member(self.player.name):  # Using player name as ID for simplicity
-            # Update player's guild
-            self.player.join_guild(guild_id)
-            
-            # Save guild to database
-            self._save_guild(guild)
-            
+        # Add player to guild and save both in one transaction
+        with self.db.transaction():
+            joined = self._update_guild(guild_id, lambda g: g.add_member(self.player.name))  # Using player name as ID for simplicity
+            if joined:
+                self.player.join_guild(guild_id)
+                self._save_player()
+        
+        if joined:
             console.print(f"[bold green]You have joined the guild '{guild.name}'![/bold green]")
             return True
         else:
             console.print(f"[bold yellow]You are already a member of this guild.[/bold yellow]")
             return False
     
+    @_timed("leave_guild")
     def leave_guild(self):
         """Leave the current guild
         
@@ -338,42 +603,52 @@ class GuildSystem:
         
         # Check if player is the leader
         if guild.leader_id == self.player.name:  # Using player name as ID for simplicity
-            if Confirm.ask("You are the leader of this guild. Leaving will delete the guild. Are you sure?"):
-                # Delete the guild
-                self._delete_guild(guild.id)
-                
-                # Clear player's guild ID
-                self.player.leave_guild()
+            if self.session.confirm("You are the leader of this guild. Leaving will delete the guild. Are you sure?"):
+                # Delete the guild and clear the player's guild ID together
+                with self.db.transaction():
+                    self._delete_guild(guild.id)
+                    self.player.leave_guild()
+                    self._save_player()
                 
                 console.print(f"[bold yellow]You have left and deleted the guild '{guild.name}'.[/bold yellow]")
                 return True
             else:
                 return False
         else:
-            # Remove player from guild
-            guild.remove_member(self.player.name)  # Using player name as ID for simplicity
-            
-            # Save guild to database
-            self._save_guild(guild)
-            
-            # Clear player's guild ID
-            self.player.leave_guild()
+            # Remove player from guild and clear the player's guild ID together
+            with self.db.transaction():
+                self._update_guild(guild.id, lambda g: g.remove_member(self.player.name))  # Using player name as ID for simplicity
+                self.player.leave_guild()
+                self._save_player()
             
             console.print(f"[bold yellow]You have left the guild '{guild.name}'.[/bold yellow]")
             return True
     
     def list_guilds(self):
-        """List all available guilds
+        """List all available guilds, best ranked first
         
         Returns:
-            list: List of guild dictionaries
+            list: List of guild summary dictionaries
         """
         # This would normally query the database
-        # For now, we'll just return the local cache
-        guilds_list = [guild.to_dict() for guild in self.guilds.values()]
+        # For now, we'll just list the local cache in leaderboard order
+        guilds_list = []
+        for entry in self.leaderboard.guilds.top(len(self.leaderboard.guilds)):
+            guild = self.guilds.get(entry["id"])
+            if guild is None:
+                continue
+            guilds_list.append({
+                "rank": entry["rank"],
+                "id": guild.id,
+                "name": guild.name,
+                "member_count": len(guild.members),
+                "level": guild.level,
+                "xp": guild.xp
+            })
         
         # Display guilds in a table
         table = Table(title="Available Guilds")
+        table.add_column("Rank")
         table.add_column("ID")
         table.add_column("Name")
         table.add_column("Members")
@@ -381,15 +656,114 @@ class GuildSystem:
         
         for guild in guilds_list:
             table.add_row(
+                str(guild["rank"]),
                 guild["id"],
                 guild["name"],
-                str(len(guild["members"])),
+                str(guild["member_count"]),
                 str(guild["level"])
             )
         
         console.print(table)
         return guilds_list
     
+    def browse_guilds(self, order_by="level", cursor=None, limit=20, descending=True, subject_focus=None):
+        """Get one page of all guilds from the database
+        
+        Args:
+            order_by (str, optional): "level", "member_count", "created_at" or "subject_focus". Defaults to "level".
+            cursor (str, optional): Cursor returned with the previous page. Defaults to None.
+            limit (int, optional): Page size. Defaults to 20.
+            descending (bool, optional): Highest values first. Defaults to True.
+            subject_focus (str, optional): Only guilds with this subject focus. Defaults to None.
+            
+        Returns:
+            tuple: (list of guild summaries, cursor for the next page or None)
+        """
+        return self.db.list_guilds_page(order_by, cursor, limit, descending, subject_focus)
+    
+    def find_player_guild(self, player_id):
+        """Find the guild a player belongs to without loading any guild
+        
+        Args:
+            player_id (str): Player ID
+            
+        Returns:
+            str: Guild ID, or None if not in a guild
+        """
+        return self.db.get_player_guild(player_id)
+    
+    def get_rosters(self, guild_ids):
+        """Get the members of several guilds in one lookup
+        
+        Args:
+            guild_ids (list): Guild IDs
+            
+        Returns:
+            dict: Guild ID -> list of {"player_id", "grade"} dictionaries
+        """
+        return self.db.get_guild_members_batch(guild_ids)
+    
+    def find_guilds_with_grade(self, grade):
+        """Find the guilds with at least one member in a grade
+        
+        Args:
+            grade (str): Grade level
+            
+        Returns:
+            list: Guild IDs
+        """
+        return self.db.get_guilds_with_grade(grade)
+    
+    def view_leaderboard(self, count=10):
+        """Display the guild and player leaderboards
+        
+        Args:
+            count (int, optional): Number of entries to show. Defaults to 10.
+            
+        Returns:
+            dict: Top guild and player entries, plus the player's own rank
+        """
+        result = {
+            "guilds": self.leaderboard.guilds.top(count),
+            "players": self.leaderboard.players.top(count),
+            "player_rank": self.leaderboard.players.rank_of(self.player.name)  # Using player name as ID for simplicity
+        }
+        
+        for title, entries in (("Top Guilds", result["guilds"]), ("Top Players", result["players"])):
+            table = Table(title=title)
+            table.add_column("Rank")
+            table.add_column("Name")
+            table.add_column("Level")
+            table.add_column("XP")
+            
+            for entry in entries:
+                table.add_row(str(entry["rank"]), entry["name"], str(entry["level"]), str(entry["xp"]))
+            
+            console.print(table)
+        
+        console.print(f"[cyan]Your rank: {result['player_rank']}[/cyan]")
+        return result
+    
+    def guild_details(self, guild_id=None):
+        """Get the details of a guild without printing anything
+        
+        Args:
+            guild_id (str, optional): ID of the guild. Defaults to player's guild.
+            
+        Returns:
+            dict: Guild data, or None if not in a guild or not found
+        """
+        # Use player's guild if not specified
+        guild_id = guild_id or self.player.guild_id
+        if not guild_id:
+            return None
+        
+        # Expire overdue quests so the listing is current
+        self.process_expired_quests()
+        
+        guild = self._get_guild(guild_id)
+        return guild.to_dict() if guild else None
+    
     def view_guild(self, guild_id=None):
         """View details of a guild
         
@@ -399,23 +773,18 @@ class GuildSystem:
         Returns:
             dict: Guild data, or None if not found
         """
-        # Use player's guild if not specified
-        if not guild_id:
-            guild_id = self.player.guild_id
-        
         # Check if player is in a guild
-        if not guild_id:
+        if not guild_id and not self.player.guild_id:
             console.print(f"[bold yellow]You are not in a guild.[/bold yellow]")
             return None
         
-        # Get the guild
-        guild = self._get_guild(guild_id)
+        guild = self.guild_details(guild_id)
         if not guild:
-            console.print(f"[bold red]Guild with ID {guild_id} not found![/bold red]")
+            console.print(f"[bold red]Guild with ID {guild_id or self.player.guild_id} not found![/bold red]")
             return None
         
         # Display guild details
-        console.print(Panel(f"{guild.description}", title=f"Guild: {guild.name} (Level {guild.level})")
+        console.print(Panel(f"{guild['description']}", title=f"Guild: {guild['name']} (Level {guild['level']})")
         )
         
         # Display members
@@ -423,19 +792,20 @@ class GuildSystem:
         table.add_column("Name")
         table.add_column("Role")
         
-        for member_id, role in guild.members.items():
+        for member_id, role in guild["members"].items():
             table.add_row(member_id, role)  # Using player name as ID for simplicity
         
         console.print(table)
         
         # Display active quests
-        if guild.quests:
+        if guild["quests"]:
             console.print("\n[bold]Active Quests:[/bold]")
-            for quest in guild.quests:
+            for quest in guild["quests"]:
                 console.print(f"- {quest['name']}: {quest['description']}")
         
-        return guild.to_dict()
+        return guild
     
+    @_timed("start_quest")
     def start_quest(self, template_index):
         """Start a new quest for the guild
         
@@ -470,31 +840,36 @@ class GuildSystem:
             return None
         
         # Create the quest
+        now = self.session.clock()
         quest = {
-            "id": str(uuid.uuid4())[:8],  # Generate a short unique ID
+            "id": self.session.new_id(),  # Generate a short unique ID
             "name": template["name"],
             "description": template["description"],
             "subject": template["subject"],
             "goal": template["goal"],
             "progress": 0,
-            "started_at": time.time(),
-            "expires_at": time.time() + template["time_limit"],
+            "started_at": now,
+            "expires_at": now + template["time_limit"],
             "xp_reward": template["xp_reward"],
             "item_reward": template["item_reward"],
             "started_by": self.player.name  # Using player name as ID for simplicity
         }
         
-        # Add to guild
-        guild.add_quest(quest)
+        # Add to guild and save it
+        def add_quest(g):
+            g.add_quest(quest)
+            return True
         
-        # Save guild to database
-        self._save_guild(guild)
+        if not self._update_guild(guild.id, add_quest):
+            console.print(f"[bold red]Could not start the quest, please try again.[/bold red]")
+            return None
         
         console.print(f"[bold green]Quest '{quest['name']}' started![/bold green]")
         console.print(f"[green]{quest['description']}[/green]")
         
         return quest
     
+    @_timed("update_quest_progress")
     def update_quest_progress(self, quest_id, progress_amount):
         """Update progress on a quest
         
@@ -509,37 +884,171 @@ class GuildSystem:
         if not self.player.guild_id:
             return False
         
+        # Expire overdue quests before counting progress towards them
+        self.process_expired_quests()
+        
         # Get the guild
         guild = self._get_guild(self.player.guild_id)
         if not guild:
             return False
         
         # Find the quest
-        for quest in guild.quests:
-            if quest["id"] == quest_id:
-                # Update progress
-                quest["progress"] += progress_amount
-                
-                # Check if quest is completed
-                if quest["progress"] >= quest["goal"]["count"]:
-                    # Complete the quest
-                    guild.complete_quest(quest_id)
-                    
-                    # Give reward to player
-                    self.player.add_to_inventory(quest["item_reward"])
-                    
-                    console.print(f"[bold green]Quest '{quest['name']}' completed![/bold green]")
-                    console.print(f"[green]Reward: {quest['item_reward']['name']}[/green]")
-                else:
-                    console.print(f"[green]Quest progress updated: {quest['progress']}/{quest['goal']['count']}[/green]")
-                
-                # Save guild to database
-                self._save_guild(guild)
-                
-                return True
+        quest = guild.get_quest(quest_id)
+        if not quest:
+            return False
+        
+        # Update the shared counter atomically instead of saving the whole guild
+        progress = self.db.increment_quest_progress(guild.id, quest_id, progress_amount)
+        if progress is None:
+            return False
+        quest["progress"] = progress
+        
+        # Check if quest is completed
+        if progress >= quest["goal"]["count"]:
+            # Complete the quest; only one member's completion can win the version check
+            now = self.session.clock()
+            
+            def complete(g):
+                active = g.get_quest(quest_id)
+                if active:
+                    active["progress"] = progress
+                return g.complete_quest(quest_id, now)
+            
+            # The guild and the rewarded player are saved in one transaction
+            with self.db.transaction():
+                if not self._update_guild(guild.id, complete):
+                    return False
+                reward = self.player.add_to_inventory(quest["item_reward"])
+                self._save_player()
+            self.db.clear_quest_progress(guild.id, quest_id)
+            
+            console.print(f"[bold green]Quest '{quest['name']}' completed![/bold green]")
+            console.print(f"[green]Reward: {reward['name']}[/green]")
+        else:
+            console.print(f"[green]Quest progress updated: {progress}/{quest['goal']['count']}[/green]")
         
-        return False
+        return True
     
+    @_timed("process_expired_quests")
+    def process_expired_quests(self, now=None):
+        """Expire every loaded quest whose time limit has passed
+        
+        Only quests that are actually due are touched, however many guilds
+        are loaded.
+        
+        Args:
+            now (float, optional): Current time. Defaults to the session clock.
+            
+        Returns:
+            list: (guild_id, quest_id) tuples of the expired quests
+        """
+        if now is None:
+            now = self.session.clock()
+        
+        expired = []
+        for guild_id, quest_id in self.quest_scheduler.pop_due(now):
+            if guild_id not in self.guilds:
+                continue  # Guild was unloaded or deleted since scheduling
+            
+            result = self._update_guild(guild_id, lambda g: g.expire_quest(quest_id))
+            if result:
+                self.db.clear_quest_progress(guild_id, quest_id)
+                expired.append((guild_id, quest_id))
+            elif result is None and (not self.db.available or self._get_guild(guild_id) is not None):
+                # Busy or unreachable guild: try again shortly instead of forgetting the quest
+                retry = {"id": quest_id, "expires_at": now + QUEST_EXPIRY_RETRY_DELAY}
+                self.quest_scheduler.schedule(guild_id, retry)
+        
+        return expired
+    
+    def get_quest_history(self, guild_id=None, subject=None, since=None, limit=20):
+        """Get completed quests of a guild, newest first
+        
+        Args:
+            guild_id (str, optional): ID of the guild. Defaults to player's guild.
+            subject (str, optional): Only quests of this subject. Defaults to None.
+            since (float, optional): Only quests completed at or after this time. Defaults to None.
+            limit (int, optional): Maximum number of quests. Defaults to 20.
+            
+        Returns:
+            list: Completed quest dictionaries, or None if the guild was not found
+        """
+        guild = self._get_guild(guild_id or self.player.guild_id)
+        if not guild:
+            return None
+        
+        history = []
+        
+        # Recently completed quests stay on the guild until a full batch is archived
+        for quest in reversed(guild.completed_quests):
+            if since is not None and quest.get("completed_at", 0) < since:
+                return history
+            if subject is None or quest.get("subject") == subject:
+                history.append(quest)
+            if len(history) >= limit:
+                return history
+        
+        for quest in self.quest_archive.history(guild.id, guild.quest_stats["archived"], subject, since, limit - len(history)):
+            history.append(quest)
+        
+        return history
+    
+    @_timed("contribute_xp")
+    def contribute_xp(self, contributions, guild_id=None):
+        """Add a batch of member XP contributions to a guild and save once
+        
+        Args:
+            contributions (list): (user_id, amount) tuples
+            guild_id (str, optional): ID of the guild. Defaults to player's guild.
+            
+        Returns:
+            dict: Total XP added plus the level before and after, or None if failed
+        """
+        guild_id = guild_id or self.player.guild_id
+        if not guild_id or not contributions:
+            return None
+        
+        result = self._update_guild(guild_id, lambda g: g.apply_contributions(contributions))
+        if result and result["new_level"] > result["old_level"]:
+            console.print(f"[bold green]Guild reached level {result['new_level']}![/bold green]")
+        return result
+    
+    def queue_xp_contribution(self, amount, user_id=None, guild_id=None):
+        """Queue an XP contribution to be saved with the next batch
+        
+        Args:
+            amount (int): XP contributed
+            user_id (str, optional): Contributing member. Defaults to the player.
+            guild_id (str, optional): ID of the guild. Defaults to player's guild.
+        """
+        guild_id = guild_id or self.player.guild_id
+        if not guild_id:
+            return
+        
+        user_id = user_id or self.player.name  # Using player name as ID for simplicity
+        self._pending_contributions.setdefault(guild_id, []).append((user_id, amount))
+    
+    @_timed("flush_xp_contributions")
+    def flush_xp_contributions(self):
+        """Save every queued contribution, one write per guild
+        
+        Batches that could not be saved (busy guild, storage error or an
+        outage) are queued again, ahead of contributions queued since.
+        
+        Returns:
+            dict: Guild ID -> result of contribute_xp
+        """
+        pending, self._pending_contributions = self._pending_contributions, {}
+        results = {}
+        for guild_id, contributions in pending.items():
+            results[guild_id] = self.contribute_xp(contributions, guild_id)
+            # While the database is unreachable a missing guild may only be unreadable
+            if results[guild_id] is None and (not self.db.available or self._get_guild(guild_id) is not None):
+                queued = self._pending_contributions.get(guild_id, [])
+                self._pending_contributions[guild_id] = contributions + queued
+        return results
+    
+    @_timed("send_chat_message")
     def send_chat_message(self, message):
         """Send a chat message to the guild
         
@@ -560,14 +1069,36 @@ class GuildSystem:
             console.print(f"[bold red]Guild not found![/bold red]")
             return False
         
-        # Add message to chat history
-        guild.add_chat_message(self.player.name, self.player.name, message)  # Using player name as ID and display name
+        # Add message to chat history and save it
+        chat_message = self._update_guild(
+            guild.id, lambda g: g.add_chat_message(self.player.name, self.player.name, message, self.session.clock())  # Using player name as ID and display name
+        )
+        if not chat_message:
+            return False
         
-        # Save guild to database
-        self._save_guild(guild)
+        # Push to live sessions instead of making them re-read the history
+        if self.chat_hub:
+            self.chat_hub.publish(guild.id, chat_message)
         
         return True
     
+    def subscribe_chat(self, maxsize=100, policy="drop_oldest"):
+        """Subscribe to live chat messages of the player's guild
+        
+        Must be called from a running asyncio event loop.
+        
+        Args:
+            maxsize (int, optional): Messages buffered before the policy applies. Defaults to 100.
+            policy (str, optional): Slow-consumer policy. Defaults to "drop_oldest".
+            
+        Returns:
+            ChatSubscription: The subscription, or None if not in a guild or no hub is attached
+        """
+        if not self.chat_hub or not self.player.guild_id:
+            return None
+        
+        return self.chat_hub.subscribe(self.player.guild_id, maxsize, policy)
+    
     def view_chat(self):
         """View the guild chat history
         
@@ -613,7 +1144,7 @@ class GuildSystem:
         guild_data = self.db.get_guild(guild_id)
         if guild_data:
             guild = Guild.from_dict(guild_data)
-            self.guilds[guild_id] = guild  # Add to cache
+            self._cache_guild(guild)
             return guild
         
         return None
@@ -625,10 +1156,123 @@ class GuildSystem:
             guild (Guild): Guild to save
         """
         # Update local cache
-        self.guilds[guild.id] = guild
+        self._cache_guild(guild)
         
         # Save to database
-        self.db.save_guild(guild.to_dict())
+        if self.db.save_guild(guild.to_dict()):
+            self._flush_memberships()
+    
+    def _save_player(self):
+        """Save the current player to the database"""
+        self.db.save_player(self.player.to_dict())
+    
+    def _on_player_event(self, event, player, payload):
+        """Persist the player after every change it reports"""
+        self._save_player()
+    
+    def _flush_memberships(self):
+        """Write membership changes of a saved guild to the membership index"""
+        for guild_id, user_id, joined in self._pending_memberships:
+            if joined:
+                grade = self.player.grade if user_id == self.player.name else None  # Using player name as ID for simplicity
+                self.db.set_membership(user_id, guild_id, grade)
+            else:
+                self.db.remove_membership(user_id)
+        self._pending_memberships.clear()
+    
+    def _archive_completed_quests(self, guild):
+        """Move a guild's completed quests to cold storage after a save
+        
+        Quests are archived in batches of QUEST_ARCHIVE_BATCH, so only one
+        save in a batch pays for the second versioned write that trims the
+        guild. Only committed guild versions are archived. Any session archiving at
+        the same segment slot holds a later committed version, whose
+        completed quests include these, so overwriting a segment never
+        loses a quest.
+        
+        Args:
+            guild (Guild): Guild that was just saved
+        """
+        if len(guild.completed_quests) < QUEST_ARCHIVE_BATCH:
+            return
+        
+        if not self.quest_archive.append(guild.id, guild.quest_stats["archived"], guild.completed_quests):
+            return
+        
+        guild.mark_archived(len(guild.completed_quests))
+        guild_data = guild.to_dict()
+        guild_data["version"] = guild.version + 1
+        if self.db.save_guild(guild_data, expected_version=guild.version):
+            guild.version += 1
+        else:
+            # The newer version still lists these quests, so they are archived again on its next save
+            _write_conflicts.inc()
+            self.guilds.pop(guild.id, None)
+    
+    def _update_guild(self, guild_id, mutate, max_attempts=5):
+        """Apply a change to a guild and save it with a version check
+        
+        If another session saved the guild after our copy was loaded, the
+        stale copy is dropped, the guild is reloaded and the change is
+        applied again.
+        
+        Args:
+            guild_id (str): ID of the guild to change
+            mutate (callable): Called with the Guild; returns a falsy value when there is nothing to save
+            max_attempts (int, optional): Attempts before giving up. Defaults to 5.
+            
+        Returns:
+            The value returned by mutate, or None if the guild was not found or every attempt conflicted
+        """
+        for attempt in range(max_attempts):
+            guild = self._get_guild(guild_id)
+            if not guild:
+                return None
+            
+            self._pending_memberships.clear()
+            result = mutate(guild)
+            if not result:
+                return result
+            
+            guild_data = guild.to_dict()
+            guild_data["version"] = guild.version + 1
+            if self.db.save_guild(guild_data, expected_version=guild.version):
+                guild.version += 1
+                self._flush_memberships()
+                self._archive_completed_quests(guild)
+                return result
+            
+            # Lost the race: reload fresh data and back off a little
+            _write_conflicts.inc()
+            self.guilds.pop(guild_id, None)
+            time.sleep(self.session.rng.uniform(0, 0.005 * (2 ** attempt)))
+        
+        console.print(f"[bold red]Guild {guild_id} is busy, please try again.[/bold red]")
+        return None
+    
+    def _cache_guild(self, guild):
+        """Add a guild to the local cache and rank it on the leaderboard
+        
+        Args:
+            guild (Guild): Guild to cache
+        """
+        if self.guilds.get(guild.id) is not guild:
+            self.guilds[guild.id] = guild
+            self.leaderboard.track_guild(guild)
+            guild.add_listener(self._on_guild_event)
+            for quest in guild.quests:
+                self.quest_scheduler.schedule(guild.id, quest)
+    
+    def _on_guild_event(self, event, guild, payload):
+        """Keep quest expiry schedules and memberships in step with guild changes"""
+        if event == "quest_added":
+            self.quest_scheduler.schedule(guild.id, payload["quest"])
+        elif event in ("quest_completed", "quest_expired"):
+            self.quest_scheduler.cancel(guild.id, payload["quest"]["id"])
+        elif event == "member_added":
+            self._pending_memberships.append((guild.id, payload["user_id"], True))
+        elif event == "member_removed":
+            self._pending_memberships.append((guild.id, payload["user_id"], False))
     
     def _delete_guild(self, guild_id):
         """Delete a guild
@@ -639,9 +1283,17 @@ class GuildSystem:
         Returns:
             bool: True if deleted, False if not found
         """
+        # Remove every member from the membership index
+        guild = self._get_guild(guild_id)
+        if guild:
+            for member_id in guild.members:
+                self.db.remove_membership(member_id)
+        
         # Remove from local cache
         if guild_id in self.guilds:
-            del self.guilds[guild_id]
+            guild = self.guilds.pop(guild_id)
+            self.quest_scheduler.cancel_guild(guild_id, [quest["id"] for quest in guild.quests])
+        self.leaderboard.untrack_guild(guild_id)
         
         # Delete from database
         return self.db.delete_guild(guild_id)
\ No newline at end of file
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Guild index module for paginated guild browsing
+"""
+
+import base64
+import json
+import os
+from bisect import bisect_left, bisect_right
+
+from file_locks import file_lock
+
+# Fields the index can order by. "subject_focus" groups guilds by subject,
+# newest first within a subject when paged in descending order.
+INDEX_FIELDS = ("level", "member_count", "created_at", "subject_focus")
+
+# Fields that also get a per-subject index, so a subject filter is a key range
+SUBJECT_INDEX_FIELDS = ("level", "member_count", "created_at")
+
+# Fields kept in a guild summary (everything a listing row needs)
+SUMMARY_FIELDS = ("id", "name", "level", "member_count", "subject_focus", "created_at")
+
+
+def guild_summary(guild_data):
+    """Build the small summary record stored in the index
+    
+    Args:
+        guild_data (dict): Full guild data from Guild.to_dict()
+        
+    Returns:
+        dict: Guild summary
+    """
+    return {
+        "id": guild_data["id"],
+        "name": guild_data["name"],
+        "level": guild_data.get("level", 1),
+        "member_count": len(guild_data.get("members", {})),
+        "subject_focus": guild_data.get("subject_focus"),
+        "created_at": guild_data.get("created_at", 0)
+    }
+
+
+def encode_cursor(key):
+    """Encode an index key as an opaque cursor string
+    
+    Args:
+        key (tuple): Index key of the last row on a page
+        
+    Returns:
+        str: Cursor string
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor string back into an index key
+    
+    Args:
+        cursor (str): Cursor string from encode_cursor
+        
+    Returns:
+        tuple: Index key
+    """
+    return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii"))))
+
+
+def index_key(field, summary):
+    """Get the sort key of a guild summary in one index
+    
+    Args:
+        field (str): Index field
+        summary (dict): Guild summary
+        
+    Returns:
+        tuple: Sort key, always ending with the guild ID so keys are unique
+    """
+    if field == "subject_focus":
+        return (summary["subject_focus"] or "", summary["created_at"], summary["id"])
+    return (summary[field], summary["id"])
+
+
+def subject_index_key(field, summary):
+    """Get the sort key of a guild summary in the per-subject index of a field
+    
+    Args:
+        field (str): Index field from SUBJECT_INDEX_FIELDS
+        summary (dict): Guild summary
+        
+    Returns:
+        tuple: Index key prefixed with the guild's subject focus
+    """
+    return (summary["subject_focus"] or "",) + index_key(field, summary)
+
+
+class GuildIndex:
+    """In-memory secondary indexes over guild summaries
+    
+    Each index is a sorted list of keys, so a page is a binary search plus a
+    slice. Every ordering also has a copy grouped by subject focus, so a
+    page filtered to one subject searches only that subject's range. Changes are appended to a log file and the log is compacted once
+    it holds far more lines than there are guilds.
+    """
+    
+    def __init__(self, log_path=None):
+        """Initialize the index
+        
+        Args:
+            log_path (Path, optional): Append-only log file for persistence. Defaults to None.
+        """
+        self.log_path = log_path
+        self.summaries = {}  # Guild ID -> summary
+        self._keys = {field: [] for field in INDEX_FIELDS}
+        self._subject_keys = {field: [] for field in SUBJECT_INDEX_FIELDS}
+        self._log_lines = 0
+    
+    def __len__(self):
+        return len(self.summaries)
+    
+    def load(self):
+        """Replay the log file into memory
+        
+        Returns:
+            bool: True if a log file was found, False otherwise
+        """
+        if not self.log_path or not os.path.exists(self.log_path):
+            return False
+        
+        self._replay()
+        return True
+    
+    def _replay(self):
+        """Replace the in-memory indexes with the log's contents"""
+        summaries = {}
+        lines = 0
+        with open(self.log_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn final write; everything before it is valid
+                lines += 1
+                if entry.get("deleted"):
+                    summaries.pop(entry["id"], None)
+                else:
+                    summaries[entry["id"]] = entry
+        
+        self.summaries = summaries
+        self._log_lines = lines
+        self._rebuild()
+    
+    def rebuild_from(self, guild_records):
+        """Replace the index contents and rewrite the log
+        
+        Args:
+            guild_records (iterable): Full guild data dictionaries
+        """
+        self.summaries = {}
+        for guild_data in guild_records:
+            summary = guild_summary(guild_data)
+            self.summaries[summary["id"]] = summary
+        self._rebuild()
+        if self.log_path:
+            with file_lock(self._lock_path()):
+                self._rewrite()
+    
+    def _rebuild(self):
+        for field in INDEX_FIELDS:
+            self._keys[field] = sorted(index_key(field, s) for s in self.summaries.values())
+        for field in SUBJECT_INDEX_FIELDS:
+            self._subject_keys[field] = sorted(subject_index_key(field, s) for s in self.summaries.values())
+    
+    def _index_keys(self, summary):
+        """Yield (sorted key list, key of the summary in it) for every index"""
+        for field in INDEX_FIELDS:
+            yield self._keys[field], index_key(field, summary)
+        for field in SUBJECT_INDEX_FIELDS:
+            yield self._subject_keys[field], subject_index_key(field, summary)
+    
+    def put(self, guild_data):
+        """Add or update a guild
+        
+        Args:
+            guild_data (dict): Full guild data from Guild.to_dict()
+        """
+        summary = guild_summary(guild_data)
+        old = self.summaries.get(summary["id"])
+        if old == summary:
+            return
+        
+        if old is not None:
+            for keys, old_key in self._index_keys(old):
+                self._discard(keys, old_key)
+        for keys, new_key in self._index_keys(summary):
+            keys.insert(bisect_left(keys, new_key), new_key)
+        
+        self.summaries[summary["id"]] = summary
+        self._append(summary)
+    
+    def remove(self, guild_id):
+        """Remove a guild
+        
+        Args:
+            guild_id (str): ID of the guild to remove
+        """
+        old = self.summaries.pop(guild_id, None)
+        if old is None:
+            return
+        
+        for keys, old_key in self._index_keys(old):
+            self._discard(keys, old_key)
+        self._append({"id": guild_id, "deleted": True})
+    
+    @staticmethod
+    def _discard(keys, key):
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+    
+    def page(self, order_by="created_at", cursor=None, limit=20, descending=False, subject_focus=None):
+        """Get one page of guild summaries
+        
+        Args:
+            order_by (str, optional): Index field to order by. Defaults to "created_at".
+            cursor (str, optional): Cursor returned with the previous page. Defaults to None.
+            limit (int, optional): Page size. Defaults to 20.
+            descending (bool, optional): Highest values first. Defaults to False.
+            subject_focus (str, optional): Only guilds with this subject focus. Defaults to None.
+                
+        Returns:
+            tuple: (list of guild summaries, cursor for the next page or None)
+        """
+        keys = self._keys[order_by]
+        
+        # Range of the index the query may touch
+        low, high = 0, len(keys)
+        if subject_focus is not None:
+            if order_by != "subject_focus":
+                keys = self._subject_keys[order_by]
+            low = bisect_left(keys, (subject_focus,))
+            high = bisect_left(keys, (subject_focus, float("inf")))
+        
+        if descending:
+            end = high
+            if cursor:
+                end = max(low, min(high, bisect_left(keys, decode_cursor(cursor))))
+            start = max(low, end - limit)
+            selected = keys[start:end][::-1]
+            has_more = start > low
+        else:
+            start = low
+            if cursor:
+                start = min(high, max(low, bisect_right(keys, decode_cursor(cursor))))
+            end = min(high, start + limit)
+            selected = keys[start:end]
+            has_more = end < high
+        
+        rows = [self.summaries[key[-1]] for key in selected]
+        next_cursor = encode_cursor(selected[-1]) if selected and has_more else None
+        return rows, next_cursor
+    
+    def _lock_path(self):
+        return f"{self.log_path}.lock"
+    
+    def _append(self, entry):
+        if not self.log_path:
+            return
+        
+        # Locked so a compaction in another process cannot drop the line
+        with file_lock(self._lock_path()):
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        self._log_lines += 1
+        
+        # Compact once the log is mostly superseded entries
+        if self._log_lines > 2 * len(self.summaries) + 1000:
+            self.compact()
+    
+    def compact(self):
+        """Rewrite the log with one line per live guild
+        
+        Other processes may have appended since this one loaded the log, so
+        the log is replayed under the lock first and rewritten from that.
+        """
+        if not self.log_path:
+            return
+        
+        with file_lock(self._lock_path()):
+            if os.path.exists(self.log_path):
+                self._replay()
+            self._rewrite()
+    
+    def _rewrite(self):
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for summary in self.summaries.values():
+                f.write(json.dumps(summary) + "\n")
+        os.replace(tmp_path, self.log_path)
+        self._log_lines = len(self.summaries)
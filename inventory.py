@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Inventory module for stacking items by catalog ID
+"""
+
+from items import custom_item, find_item_id, get_item, thaw
+
+
+class Inventory:
+    """Item stacks keyed by catalog ID
+    
+    Only IDs and quantities are stored; item details come from the shared
+    catalog, so a hundred identical drops cost one dictionary entry. Items
+    the catalog does not ship are kept on the inventory that holds them and
+    saved with their definitions.
+    """
+    
+    def __init__(self, counts=None, custom_items=None):
+        """Initialize an inventory
+        
+        Args:
+            counts (dict, optional): Item ID -> quantity. Defaults to empty.
+            custom_items (dict, optional): Item ID -> item data for non-catalog items. Defaults to none.
+        """
+        self._counts = {}
+        self._custom = {}  # Item ID -> read-only item, for items missing from the catalog
+        for item_id, definition in (custom_items or {}).items():
+            if get_item(item_id) is None:
+                self._custom[item_id] = custom_item(dict(definition, id=item_id))
+        for item_id, quantity in (counts or {}).items():
+            if quantity > 0:
+                self._counts[item_id] = quantity
+    
+    def __len__(self):
+        """Number of distinct items"""
+        return len(self._counts)
+    
+    def __bool__(self):
+        return bool(self._counts)
+    
+    def __contains__(self, item):
+        return self.find(item) in self._counts
+    
+    def __iter__(self):
+        """Iterate (item, quantity) pairs in the order items were first added"""
+        for item_id, quantity in self._counts.items():
+            item = self.get(item_id)
+            if item is None:
+                # Item from an older save whose definition was never stored
+                item = self._custom[item_id] = custom_item({"id": item_id})
+            yield item, quantity
+    
+    def find(self, item):
+        """Look up the ID of an item reference in the catalog or among this inventory's custom items
+        
+        Args:
+            item (str or dict): Item ID, item name or item data
+            
+        Returns:
+            str: Item ID, or None if the item is unknown
+        """
+        item_id = find_item_id(item)
+        if item_id is not None:
+            return item_id
+        
+        if isinstance(item, str):
+            item_id, name = item, item
+        else:
+            item_id, name = item.get("id"), item.get("name")
+        if item_id in self._custom:
+            return item_id
+        for custom in self._custom.values():
+            if custom["name"] == name:
+                return custom["id"]
+        return None
+    
+    def get(self, item_id):
+        """Look up an item by ID in the catalog or among this inventory's custom items
+        
+        Args:
+            item_id (str): Item ID
+            
+        Returns:
+            MappingProxyType: Read-only item, or None if unknown
+        """
+        item = get_item(item_id)
+        return item if item is not None else self._custom.get(item_id)
+    
+    def add(self, item, quantity=1):
+        """Add items
+        
+        Args:
+            item (str or dict): Item ID, name or item data
+            quantity (int, optional): How many to add. Defaults to 1.
+            
+        Returns:
+            str: ID of the added item
+        """
+        item_id = self.find(item)
+        if item_id is None:
+            custom = custom_item(item)
+            item_id = custom["id"]
+            self._custom[item_id] = custom
+        self._counts[item_id] = self._counts.get(item_id, 0) + quantity
+        return item_id
+    
+    def remove(self, item, quantity=1):
+        """Remove items
+        
+        Args:
+            item (str or dict): Item ID, name or item data
+            quantity (int, optional): How many to remove. Defaults to 1.
+            
+        Returns:
+            bool: True if removed, False if there were not enough
+        """
+        item_id = self.find(item)
+        held = self._counts.get(item_id, 0)
+        if held < quantity:
+            return False
+        
+        if held == quantity:
+            del self._counts[item_id]
+            self._custom.pop(item_id, None)
+        else:
+            self._counts[item_id] = held - quantity
+        return True
+    
+    def count(self, item):
+        """Get how many of an item are held
+        
+        Args:
+            item (str or dict): Item ID, name or item data
+            
+        Returns:
+            int: Quantity held
+        """
+        return self._counts.get(self.find(item), 0)
+    
+    def total(self):
+        """Get the number of items counting every stack in full
+        
+        Returns:
+            int: Total quantity
+        """
+        return sum(self._counts.values())
+    
+    def to_dict(self):
+        """Convert the inventory to a dictionary for saving
+        
+        Returns:
+            dict: Item ID -> quantity
+        """
+        return dict(self._counts)
+    
+    def custom_items(self):
+        """Get definitions of held items that are not part of the shipped catalog
+        
+        Returns:
+            dict: Item ID -> item data, saved next to the stacks
+        """
+        return {item_id: thaw(item) for item_id, item in self._custom.items() if item_id in self._counts}
+    
+    @classmethod
+    def from_dict(cls, data, custom_items=None):
+        """Create an inventory from saved data
+        
+        Args:
+            data (dict): Item ID -> quantity
+            custom_items (dict, optional): Item ID -> item data for non-catalog items
+            
+        Returns:
+            Inventory: New inventory
+        """
+        return cls(data, custom_items)
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Items module with the shared item catalog
+"""
+
+import re
+from types import MappingProxyType
+
+from sampling import AliasSampler
+
+
+def _freeze(value):
+    """Make a nested item definition read-only
+    
+    Args:
+        value: Dictionary, list or plain value
+        
+    Returns:
+        Read-only equivalent of the value
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Get a plain, JSON-serializable copy of a catalog item
+    
+    Args:
+        value: Read-only item (or part of one)
+        
+    Returns:
+        Mutable copy of the value
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def item_id_for(name):
+    """Derive a catalog ID from an item name
+    
+    Args:
+        name (str): Item name
+        
+    Returns:
+        str: Item ID, e.g. "math_textbook"
+    """
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+_ITEM_DEFINITIONS = [
+    # Battle drops
+    {
+        "name": "Math Textbook",
+        "type": "book",
+        "subject": "math",
+        "effect": {"trait_bonus": {"math": 5}},
+        "description": "A comprehensive math textbook. Grants +5 to Math trait.",
+        "drop_weight": 1  # Relative chance to drop in battle
+    },
+    {
+        "name": "Science Journal",
+        "type": "book",
+        "subject": "science",
+        "effect": {"trait_bonus": {"science": 5}},
+        "description": "A scientific journal with the latest discoveries. Grants +5 to Science trait.",
+        "drop_weight": 1  # Relative chance to drop in battle
+    },
+    {
+        "name": "History Scroll",
+        "type": "book",
+        "subject": "history",
+        "effect": {"trait_bonus": {"history": 5}},
+        "description": "An ancient scroll containing historical knowledge. Grants +5 to History trait.",
+        "drop_weight": 1  # Relative chance to drop in battle
+    },
+    {
+        "name": "Precision Compass",
+        "type": "tool",
+        "subject": "math",
+        "effect": {"damage_bonus": 2},
+        "description": "A precision drawing compass. Increases Math damage by 2.",
+        "drop_weight": 1  # Relative chance to drop in battle
+    },
+    {
+        "name": "Microscope",
+        "type": "tool",
+        "subject": "science",
+        "effect": {"damage_bonus": 2},
+        "description": "A powerful microscope. Increases Science damage by 2.",
+        "drop_weight": 1  # Relative chance to drop in battle
+    },
+    {
+        "name": "Antique Map",
+        "type": "tool",
+        "subject": "history",
+        "effect": {"damage_bonus": 2},
+        "description": "An antique map with historical routes. Increases History damage by 2.",
+        "drop_weight": 1  # Relative chance to drop in battle
+    },
+    # Guild quest rewards
+    {
+        "name": "Advanced Calculator",
+        "type": "tool",
+        "subject": "math",
+        "effect": {"trait_bonus": {"math": 10}},
+        "description": "A calculator fit for a Math Marathon champion. Grants +10 to Math trait."
+    },
+    {
+        "name": "Lab Equipment",
+        "type": "tool",
+        "subject": "science",
+        "effect": {"trait_bonus": {"science": 8}},
+        "description": "A full set of lab equipment. Grants +8 to Science trait."
+    },
+    {
+        "name": "Ancient Artifact",
+        "type": "tool",
+        "subject": "history",
+        "effect": {"trait_bonus": {"history": 9}},
+        "description": "A relic recovered by a history expedition. Grants +9 to History trait."
+    },
+    {
+        "name": "Knowledge Orb",
+        "type": "artifact",
+        "subject": "all",
+        "effect": {"xp_bonus": 0.1},
+        "description": "A glowing orb of collected wisdom. Grants +10% XP."
+    },
+]
+
+# Item ID -> read-only item; shared by every inventory
+CATALOG = {}
+_IDS_BY_NAME = {}
+BATTLE_DROPS = []  # IDs of items enemies can drop
+_drop_samplers = {}  # (subject, subject_bias) -> AliasSampler, cleared when drops change
+
+
+def register_item(definition):
+    """Add an item definition to the catalog, or find the one already there
+    
+    Args:
+        definition (dict): Item data with at least a "name"
+        
+    Returns:
+        str: ID of the catalog item
+    """
+    item_id = definition.get("id") or item_id_for(definition["name"])
+    if item_id not in CATALOG:
+        item = {"id": item_id, "description": "", "effect": {}}
+        item.update(definition)
+        item["id"] = item_id
+        CATALOG[item_id] = _freeze(item)
+        _IDS_BY_NAME[item["name"]] = item_id
+        if item.get("drop_weight", 0) > 0:
+            BATTLE_DROPS.append(item_id)
+            _drop_samplers.clear()
+    return item_id
+
+
+def get_item(item_id):
+    """Look up a catalog item
+    
+    Args:
+        item_id (str): Item ID
+        
+    Returns:
+        MappingProxyType: Read-only item, or None if unknown
+    """
+    return CATALOG.get(item_id)
+
+
+def drop_sampler(subject, subject_bias=0.7):
+    """Get a sampler for battle drops that favours one subject
+    
+    With probability subject_bias the drop comes from the subject's items,
+    otherwise from every droppable item, each weighted by drop_weight. Both
+    steps are folded into a single alias table built once per subject.
+    
+    Args:
+        subject (str): Subject of the defeated enemy
+        subject_bias (float, optional): Chance of a subject-specific drop. Defaults to 0.7.
+        
+    Returns:
+        AliasSampler: Sampler over item IDs
+    """
+    key = (subject, subject_bias)
+    sampler = _drop_samplers.get(key)
+    if sampler is None:
+        all_weight = sum(CATALOG[item_id]["drop_weight"] for item_id in BATTLE_DROPS)
+        subject_weight = sum(
+            CATALOG[item_id]["drop_weight"] for item_id in BATTLE_DROPS if CATALOG[item_id].get("subject") == subject
+        )
+        if not subject_weight:
+            subject_bias = 0.0  # No items for this subject; draw from every drop
+        
+        weighted = []
+        for item_id in BATTLE_DROPS:
+            weight = CATALOG[item_id]["drop_weight"]
+            chance = (1 - subject_bias) * weight / all_weight
+            if CATALOG[item_id].get("subject") == subject:
+                chance += subject_bias * weight / subject_weight
+            weighted.append((item_id, chance))
+        sampler = _drop_samplers[key] = AliasSampler(weighted)
+    return sampler
+
+
+def find_item_id(item):
+    """Look up the catalog ID of an item reference
+    
+    Args:
+        item (str or dict): Item ID, item name or item data
+        
+    Returns:
+        str: Item ID, or None if the item is not in the catalog
+    """
+    if isinstance(item, str):
+        return item if item in CATALOG else _IDS_BY_NAME.get(item)
+    if item.get("id") in CATALOG:
+        return item["id"]
+    return _IDS_BY_NAME.get(item.get("name"))
+
+
+def custom_item(definition):
+    """Build a read-only item for a definition the catalog does not ship
+    
+    Custom items belong to the inventory that holds them and are never
+    added to the shared catalog. Any drop_weight is discarded, so a saved
+    definition cannot turn into a battle drop for other players.
+    
+    Args:
+        definition (str or dict): Item name or item data with a "name" or "id"
+        
+    Returns:
+        MappingProxyType: Read-only item
+    """
+    if isinstance(definition, str):
+        definition = {"name": definition}
+    item_id = definition.get("id") or item_id_for(definition["name"])
+    item = {"description": "", "effect": {}, "name": item_id.replace("_", " ").title()}
+    item.update(definition)
+    item.pop("drop_weight", None)
+    item["id"] = item_id
+    return _freeze(item)
+
+
+for _definition in _ITEM_DEFINITIONS:
+    register_item(_definition)
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Leaderboard module for ranking guilds and players
+"""
+
+import random
+
+MAX_SKIP_LEVEL = 32  # Enough levels for billions of entries
+
+
+class _SkipNode:
+    """Node of an indexable skip list"""
+    
+    __slots__ = ("key", "next", "width")
+    
+    def __init__(self, key, height):
+        self.key = key
+        self.next = [None] * height  # Forward link per level
+        self.width = [1] * height  # Number of bottom-level hops each link spans
+
+
+class IndexableSkipList:
+    """Sorted container with O(log n) insert, remove, rank and index lookups
+    
+    Every forward link also records how many entries it skips over, which lets
+    us compute the position of a key while walking down the list.
+    """
+    
+    def __init__(self, seed=None):
+        """Initialize an empty skip list
+        
+        Args:
+            seed (int, optional): Seed for the level generator. Defaults to None.
+        """
+        self._rng = random.Random(seed)
+        self._head = _SkipNode(None, MAX_SKIP_LEVEL)
+        self._level = 1
+        self._size = 0
+    
+    def __len__(self):
+        return self._size
+    
+    def _random_height(self):
+        """Pick a node height with a geometric distribution (p = 0.5)"""
+        height = 1
+        while height < MAX_SKIP_LEVEL and self._rng.random() < 0.5:
+            height += 1
+        return height
+    
+    def insert(self, key):
+        """Insert a key
+        
+        Args:
+            key (tuple): Comparable key to insert
+        """
+        update = [self._head] * MAX_SKIP_LEVEL
+        steps = [0] * MAX_SKIP_LEVEL  # Position reached at each level
+        node = self._head
+        position = 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            update[level] = node
+            steps[level] = position
+        
+        height = self._random_height()
+        if height > self._level:
+            for level in range(self._level, height):
+                update[level] = self._head
+                steps[level] = 0
+                self._head.width[level] = self._size + 1
+            self._level = height
+        
+        new_node = _SkipNode(key, height)
+        for level in range(height):
+            prev = update[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            # Split the span of the previous link around the new node
+            skipped = position - steps[level]
+            new_node.width[level] = prev.width[level] - skipped
+            prev.width[level] = skipped + 1
+        
+        # Links above the new node now span one more entry
+        for level in range(height, self._level):
+            update[level].width[level] += 1
+        
+        self._size += 1
+    
+    def remove(self, key):
+        """Remove a key
+        
+        Args:
+            key (tuple): Key to remove
+            
+        Returns:
+            bool: True if removed, False if not found
+        """
+        update = [self._head] * MAX_SKIP_LEVEL
+        node = self._head
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            update[level] = node
+        
+        target = node.next[0]
+        if target is None or target.key != key:
+            return False
+        
+        for level in range(self._level):
+            prev = update[level]
+            if prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            else:
+                prev.width[level] -= 1
+        
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        
+        self._size -= 1
+        return True
+    
+    def index_of(self, key):
+        """Get the 0-based position of a key
+        
+        Args:
+            key (tuple): Key to look up
+            
+        Returns:
+            int: Position of the key, or -1 if not found
+        """
+        node = self._head
+        position = 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key <= key:
+                position += node.width[level]
+                node = node.next[level]
+            if node is not self._head and node.key == key:
+                return position - 1
+        return -1
+    
+    def iter_from(self, index):
+        """Iterate keys starting at a 0-based position
+        
+        Args:
+            index (int): Position to start from
+            
+        Yields:
+            tuple: Keys in sorted order
+        """
+        if index < 0 or index >= self._size:
+            return
+        
+        # Walk down to the node just before the requested position
+        node = self._head
+        position = 0
+        for level in range(self._level - 1, -1, -1):
+            while node.next[level] is not None and position + node.width[level] <= index:
+                position += node.width[level]
+                node = node.next[level]
+        
+        node = node.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    """Ranking of entities by level and XP, highest first"""
+    
+    def __init__(self, name):
+        """Initialize a leaderboard
+        
+        Args:
+            name (str): Leaderboard name (e.g. "guilds")
+        """
+        self.name = name
+        self._entries = IndexableSkipList()
+        self._keys = {}  # Entity ID -> current sort key
+        self._names = {}  # Entity ID -> display name
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, entity_id):
+        return entity_id in self._keys
+    
+    @staticmethod
+    def _make_key(entity_id, xp, level):
+        # Negate so ascending skip list order puts the best entries first;
+        # the ID breaks ties so every key is unique
+        return (-level, -xp, entity_id)
+    
+    def update(self, entity_id, xp, level, name=None):
+        """Insert or move an entity
+        
+        Args:
+            entity_id (str): Entity ID
+            xp (int): Current XP
+            level (int): Current level
+            name (str, optional): Display name. Defaults to the entity ID.
+        """
+        key = self._make_key(entity_id, xp, level)
+        old_key = self._keys.get(entity_id)
+        if old_key == key:
+            return
+        
+        if old_key is not None:
+            self._entries.remove(old_key)
+        self._entries.insert(key)
+        self._keys[entity_id] = key
+        if name is not None or entity_id not in self._names:
+            self._names[entity_id] = name or entity_id
+    
+    def remove(self, entity_id):
+        """Remove an entity from the leaderboard
+        
+        Args:
+            entity_id (str): Entity ID
+            
+        Returns:
+            bool: True if removed, False if not ranked
+        """
+        key = self._keys.pop(entity_id, None)
+        if key is None:
+            return False
+        
+        self._names.pop(entity_id, None)
+        return self._entries.remove(key)
+    
+    def rank_of(self, entity_id):
+        """Get the 1-based rank of an entity
+        
+        Args:
+            entity_id (str): Entity ID
+            
+        Returns:
+            int: Rank, or None if not ranked
+        """
+        key = self._keys.get(entity_id)
+        if key is None:
+            return None
+        return self._entries.index_of(key) + 1
+    
+    def top(self, k=10, offset=0):
+        """Get the top entries
+        
+        Args:
+            k (int, optional): Number of entries. Defaults to 10.
+            offset (int, optional): Number of entries to skip. Defaults to 0.
+            
+        Returns:
+            list: Entry dictionaries with rank, id, name, level and xp
+        """
+        results = []
+        rank = offset + 1
+        for key in self._entries.iter_from(offset):
+            if len(results) >= k:
+                break
+            level, xp, entity_id = -key[0], -key[1], key[2]
+            results.append({
+                "rank": rank,
+                "id": entity_id,
+                "name": self._names.get(entity_id, entity_id),
+                "level": level,
+                "xp": xp
+            })
+            rank += 1
+        return results
+
+
+class LeaderboardService:
+    """Keeps guild and player leaderboards in sync with XP events"""
+    
+    def __init__(self):
+        """Initialize the leaderboard service"""
+        self.guilds = Leaderboard("guilds")
+        self.players = Leaderboard("players")
+        self._tracked_guilds = {}  # Guild ID -> Guild whose events are followed
+    
+    def track_guild(self, guild):
+        """Rank a guild and follow its XP changes
+        
+        Args:
+            guild (Guild): Guild to track
+        """
+        self.guilds.update(guild.id, guild.xp, guild.level, guild.name)
+        previous = self._tracked_guilds.get(guild.id)
+        if previous is not None and previous is not guild:
+            previous.remove_listener(self._on_guild_event)
+        self._tracked_guilds[guild.id] = guild
+        guild.add_listener(self._on_guild_event)
+    
+    def untrack_guild(self, guild_id):
+        """Stop ranking a guild and following its events
+        
+        Args:
+            guild_id (str): ID of the guild
+        """
+        self.guilds.remove(guild_id)
+        guild = self._tracked_guilds.pop(guild_id, None)
+        if guild is not None:
+            guild.remove_listener(self._on_guild_event)
+    
+    def track_player(self, player):
+        """Rank a player and follow their XP changes
+        
+        Args:
+            player (Player): Player to track
+        """
+        self.players.update(player.name, player.xp, player.level)  # Using player name as ID for simplicity
+        player.add_listener(self._on_player_event)
+    
+    def _on_guild_event(self, event, guild, payload):
+        if event == "xp_gained" and guild.id in self._tracked_guilds:
+            self.guilds.update(guild.id, guild.xp, guild.level, guild.name)
+    
+    def _on_player_event(self, event, player, payload):
+        if event == "xp_gained":
+            self.players.update(player.name, player.xp, player.level)
+
+
+# For testing
+if __name__ == "__main__":
+    import time
+    
+    board = Leaderboard("test")
+    rng = random.Random(42)
+    count = 100000
+    
+    start = time.perf_counter()
+    for i in range(count):
+        board.update(f"guild{i}", rng.randint(0, 50000), rng.randint(1, 50))
+    for i in range(0, count, 3):
+        board.update(f"guild{i}", rng.randint(0, 50000), rng.randint(1, 50))
+    elapsed = time.perf_counter() - start
+    print(f"{count + count // 3} updates in {elapsed:.2f}s")
+    
+    # Check ranks against a full sort
+    expected = sorted(board._keys.values())
+    for position in (0, 1, count // 2, count - 1):
+        assert board.rank_of(expected[position][2]) == position + 1
+    assert [entry["id"] for entry in board.top(5, offset=10)] == [key[2] for key in expected[10:15]]
+    print("Top 3:", board.top(3))
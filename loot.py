@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Loot module for data-driven battle drops
+"""
+
+import json
+import random
+from pathlib import Path
+
+from items import drop_sampler, get_item
+from sampling import AliasSampler
+
+LOOT_TABLES_FILE = Path(__file__).parent / "content" / "loot_tables.json"
+NOTHING = "nothing"  # Outcome name used in tables and counters for "no drop"
+
+
+class LootTable:
+    """One weighted table of drops, sampled in O(1)"""
+    
+    def __init__(self, name, items, nothing=0):
+        """Build a loot table
+        
+        Args:
+            name (str): Table name
+            items (dict): Item ID -> weight
+            nothing (int, optional): Weight of dropping nothing. Defaults to 0.
+        """
+        unknown = [item_id for item_id in items if get_item(item_id) is None]
+        if unknown:
+            raise ValueError(f"Loot table {name} refers to unknown items: {', '.join(unknown)}")
+        
+        self.name = name
+        weighted = list(items.items()) + [(NOTHING, nothing)]
+        total = float(sum(weight for _, weight in weighted))
+        self.expected = {outcome: weight / total for outcome, weight in weighted if weight > 0}
+        self._sampler = AliasSampler(weighted)
+    
+    def roll(self, rng=random):
+        """Roll the table
+        
+        Args:
+            rng (random.Random, optional): Random number generator. Defaults to the random module.
+            
+        Returns:
+            str: Item ID, or None if nothing dropped
+        """
+        outcome = self._sampler.sample(rng)
+        return None if outcome == NOTHING else outcome
+
+
+class LootTables:
+    """Loot tables per enemy template and difficulty, with drop counters
+    
+    Tables are picked by enemy template and difficulty, falling back to the
+    template's default table, then the subject's table, then the global
+    default. Without a content file, drops fall back to a 30% chance of a
+    catalog drop biased towards the enemy's subject.
+    """
+    
+    def __init__(self, path=LOOT_TABLES_FILE):
+        """Load loot tables
+        
+        Args:
+            path (Path, optional): Loot table file. Defaults to content/loot_tables.json.
+        """
+        self.tables = {}
+        self.enemies = {}
+        self.subjects = {}
+        self.default = None
+        self.rolls = {}  # Table name -> number of rolls
+        self.drops = {}  # Table name -> {outcome: count}
+        self._choices = {}  # (template_id, subject, difficulty) -> LootTable
+        
+        if path and Path(path).exists():
+            with open(path, "r") as f:
+                data = json.load(f)
+            for name, table in data.get("tables", {}).items():
+                self.tables[name] = LootTable(name, table.get("items", {}), table.get("nothing", 0))
+            self.enemies = data.get("enemies", {})
+            self.subjects = data.get("subjects", {})
+            self.default = data.get("default")
+    
+    def table_for(self, template_id, subject, difficulty):
+        """Find the loot table for an enemy
+        
+        Args:
+            template_id (str): Enemy template ID
+            subject (str): Enemy subject
+            difficulty (int): Battle difficulty
+            
+        Returns:
+            LootTable: The table, or None if no table applies
+        """
+        key = (template_id, subject, difficulty)
+        if key not in self._choices:
+            by_difficulty = self.enemies.get(template_id, {})
+            name = (
+                by_difficulty.get(str(difficulty))
+                or by_difficulty.get("default")
+                or self.subjects.get(subject)
+                or self.default
+            )
+            self._choices[key] = self.tables.get(name)
+        return self._choices[key]
+    
+    def roll(self, enemy, rng=random):
+        """Roll the drop for a defeated enemy and count the outcome
+        
+        Args:
+            enemy (Enemy): Defeated enemy
+            rng (random.Random, optional): Random number generator. Defaults to the random module.
+            
+        Returns:
+            str: Item ID, or None if nothing dropped
+        """
+        table = self.table_for(getattr(enemy, "template_id", None), enemy.subject, getattr(enemy, "difficulty", None))
+        if table is not None:
+            name = table.name
+            item_id = table.roll(rng)
+        else:
+            name = f"fallback:{enemy.subject}"
+            item_id = drop_sampler(enemy.subject).sample(rng) if rng.random() < 0.3 else None
+        
+        self.rolls[name] = self.rolls.get(name, 0) + 1
+        counts = self.drops.setdefault(name, {})
+        outcome = item_id or NOTHING
+        counts[outcome] = counts.get(outcome, 0) + 1
+        return item_id
+    
+    def drop_rates(self):
+        """Get observed drop rates next to the designed ones
+        
+        Returns:
+            dict: Table name -> {"rolls", "observed": {outcome: rate}, "expected": {outcome: rate}}
+        """
+        report = {}
+        for name, rolls in self.rolls.items():
+            table = self.tables.get(name)
+            report[name] = {
+                "rolls": rolls,
+                "observed": {outcome: count / rolls for outcome, count in self.drops[name].items()},
+                "expected": dict(table.expected) if table else {}
+            }
+        return report
+    
+    def export_drop_rates(self, path):
+        """Write the drop rate report as JSON
+        
+        Args:
+            path (Path): Output file
+        """
+        with open(path, "w") as f:
+            json.dump(self.drop_rates(), f, indent=2)
+    
+    def reset_counters(self):
+        """Clear the drop counters"""
+        self.rolls.clear()
+        self.drops.clear()
+
+
+_shared_tables = None
+
+
+def get_loot_tables():
+    """Get the loot tables shared by every combat system, loading them once
+    
+    Returns:
+        LootTables: Shared loot tables
+    """
+    global _shared_tables
+    if _shared_tables is None:
+        _shared_tables = LootTables()
+    return _shared_tables
+
+
+# For testing
+if __name__ == "__main__":
+    import sys
+    import time
+    
+    battles = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    loot = LootTables()
+    rng = random.Random(5)
+    
+    class SimulatedEnemy:
+        def __init__(self, template_id, subject, difficulty):
+            self.template_id = template_id
+            self.subject = subject
+            self.difficulty = difficulty
+    
+    subjects = {
+        "polynomial_golem": "math", "fraction_phantom": "math",
+        "chemical_construct": "science", "physics_phantom": "science",
+        "chronos_guardian": "history", "ancient_archivist": "history"
+    }
+    enemies = [SimulatedEnemy(t, s, d) for t, s in subjects.items() for d in (1, 2, 3, 4)]
+    
+    start = time.perf_counter()
+    for i in range(battles):
+        loot.roll(enemies[i % len(enemies)], rng)
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {battles} battles in {elapsed:.2f}s ({battles / elapsed:.0f} drops/sec)")
+    
+    worst = 0.0
+    for name, report in sorted(loot.drop_rates().items()):
+        deviation = max(abs(report["observed"].get(o, 0.0) - p) for o, p in report["expected"].items())
+        worst = max(worst, deviation)
+        print(f"  {name:<18} {report['rolls']:>8} rolls, drop rate "
+              f"{1 - report['observed'].get(NOTHING, 0.0):.3f} (designed {1 - report['expected'].get(NOTHING, 0.0):.3f}), "
+              f"max deviation {deviation:.4f}")
+    print(f"Largest deviation from the designed rates: {worst:.4f}")
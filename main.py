@@ -4,19 +4,24 @@ EduRPG - Text-Based Educational RPG
 Main entry point for the terminal application
 """
 
+import argparse
 import os
 import sys
-import time
+import tempfile
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
-from rich.prompt import Prompt, Confirm
 
 # Import game modules
 from player import Player
 from combat import CombatSystem
 from guild import GuildSystem
 from database import Database
+from metrics import get_registry
+from pacing import get_pacing
+from profiler import SamplingProfiler
+from session import RecordingSession, ReplaySession, get_session, play, set_session
+from sync import SyncedDatabase
 from ui import UI
 
 # Initialize console
@@ -25,10 +30,17 @@ console = Console()
 class Game:
     """Main game class for EduRPG"""
     
-    def __init__(self):
-        """Initialize the game"""
-        self.ui = UI()
-        self.db = Database()
+    def __init__(self, session=None, database=None):
+        """Initialize the game
+        
+        Args:
+            session (Session, optional): Source of input, random numbers and time. Defaults to the shared session.
+            database (Database, optional): Database to use. Defaults to a new one.
+        """
+        self.session = session or get_session()
+        self.ui = UI(self.session)
+        self.pacing = get_pacing()
+        self.db = database or Database()
         self.player = None
         self.combat = None
         self.guild = None
@@ -60,16 +72,16 @@ class Game:
     
     def new_game(self):
         """Create a new game"""
-        name = Prompt.ask("[bold cyan]Enter your character name[/bold cyan]")
+        name = self.session.ask("[bold cyan]Enter your character name[/bold cyan]")
         grade_options = ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "college"]
         grade = self.ui.select_option("Select your grade", grade_options)
         
         self.player = Player(name, grade)
-        self.combat = CombatSystem(self.player)
-        self.guild = GuildSystem(self.player, self.db)
+        self.combat = CombatSystem(self.player, session=self.session)
+        self.guild = GuildSystem(self.player, self.db, session=self.session)
         
         console.print(f"\n[green]Welcome, {name}! You are now a Level 1 student in grade {grade}.[/green]")
-        time.sleep(1)
+        self.pacing.pause(1)
         self.game_menu()
     
     def load_game(self):
@@ -93,7 +105,7 @@ class Game:
             elif choice == "save":
                 self.save_game()
             elif choice == "main_menu":
-                if Confirm.ask("Return to main menu? Your progress will be lost if not saved"):
+                if self.session.confirm("Return to main menu? Your progress will be lost if not saved"):
                     break
     
     def guild_menu(self):
@@ -103,8 +115,8 @@ class Game:
     def save_game(self):
         """Save the current game"""
         console.print("[yellow]Saving game...[/yellow]")
-        # Placeholder for saving functionality
-        console.print("[green]Game saved successfully![/green]")
+        if self.db.save_player(self.player.to_dict()):
+            console.print("[green]Game saved successfully![/green]")
     
     def help_menu(self):
         """Display the help menu"""
@@ -113,19 +125,77 @@ class Game:
     def exit_game(self):
         """Exit the game"""
         if self.player:
-            if Confirm.ask("Exit game? Your progress will be lost if not saved"):
+            if self.session.confirm("Exit game? Your progress will be lost if not saved"):
                 self.running = False
         else:
             self.running = False
         console.print("[green]Thank you for playing EduRPG![/green]")
 
 
+def parse_args(argv=None):
+    """Parse the command line
+    
+    Args:
+        argv (list, optional): Arguments. Defaults to sys.argv[1:].
+        
+    Returns:
+        argparse.Namespace: Parsed options
+    """
+    parser = argparse.ArgumentParser(description="EduRPG - Text-Based Educational RPG")
+    parser.add_argument("--record", metavar="SESSION", help="record the session to a .json file for session.py replay")
+    parser.add_argument("--metrics", metavar="PATH", help="record latencies and write them to a .prom or .json file on exit")
+    parser.add_argument("--profile", metavar="PATH", help="sample the game's stacks and write flamegraph input to PATH")
+    parser.add_argument("--replay", metavar="SESSION", help="play back a recorded session headless instead (e.g. to profile it)")
+    parser.add_argument("--sync", action="store_true", help="play from local storage and sync it with Firestore in the background")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    game = Game()
+    args = parse_args()
+    record_path = args.record
+    if record_path:
+        set_session(RecordingSession())
+    
+    metrics_path = args.metrics
+    if metrics_path:
+        get_registry().enabled = True
+    
+    profile_path = args.profile
+    replay_path = args.replay
+    profiler = SamplingProfiler() if profile_path else None
+    
+    database = SyncedDatabase() if args.sync else None
+    sync_engine = database.sync_engine if database else None
+    if sync_engine:
+        sync_engine.start()
+    
+    if profiler:
+        profiler.start()
     try:
-        game.start()
+        if replay_path:
+            with tempfile.TemporaryDirectory() as data_dir:
+                play(ReplaySession.load(replay_path), data_dir)
+        else:
+            Game(database=database).start()
     except KeyboardInterrupt:
         console.print("\n[yellow]Game interrupted. Exiting...[/yellow]")
     except Exception as e:
         console.print(f"\n[red]An error occurred: {e}[/red]")
+    finally:
+        if record_path:
+            get_session().save(record_path)
+            console.print(f"[green]Session recorded to {record_path}[/green]")
+        if metrics_path:
+            get_registry().write(metrics_path)
+            console.print(f"[green]Metrics written to {metrics_path}[/green]")
+        if profiler:
+            profiler.stop()
+            for path in profiler.write_collapsed(profile_path):
+                console.print(f"[green]Collapsed stacks written to {path}[/green]")
+            profiler.print_summary()
+        if sync_engine:
+            sync_engine.stop()
+            stats = sync_engine.sync()
+            if stats["pending"]:
+                console.print(f"[yellow]{stats['pending']} changes will sync next time.[/yellow]")
     sys.exit(0)
\ No newline at end of file
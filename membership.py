@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Membership module for player-to-guild lookups
+"""
+
+import json
+import os
+
+from file_locks import file_lock
+
+
+class MembershipIndex:
+    """Reverse index of guild membership
+    
+    Answers "which guild is this player in" and "who is in these guilds"
+    without loading guild documents. Changes are appended to a log file and
+    the log is compacted once it holds far more lines than there are players.
+    """
+    
+    def __init__(self, log_path=None):
+        """Initialize the index
+        
+        Args:
+            log_path (Path, optional): Append-only log file for persistence. Defaults to None.
+        """
+        self.log_path = log_path
+        self._player_guild = {}  # Player ID -> guild ID
+        self._player_grade = {}  # Player ID -> grade
+        self._guild_members = {}  # Guild ID -> set of player IDs
+        self._grade_guilds = {}  # Grade -> {guild ID: number of members in that grade}
+        self._log_lines = 0
+    
+    def __len__(self):
+        return len(self._player_guild)
+    
+    def load(self):
+        """Replay the log file into memory
+        
+        Returns:
+            bool: True if a log file was found, False otherwise
+        """
+        if not self.log_path or not os.path.exists(self.log_path):
+            return False
+        
+        self._replay()
+        return True
+    
+    def _replay(self):
+        """Replace the in-memory index with the log's contents"""
+        self._player_guild, self._player_grade, self._guild_members, self._grade_guilds = {}, {}, {}, {}
+        self._log_lines = 0
+        with open(self.log_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn final write; everything before it is valid
+                self._log_lines += 1
+                if entry.get("guild_id") is None:
+                    self._unlink(entry["player_id"])
+                else:
+                    self._link(entry["player_id"], entry["guild_id"], entry.get("grade"))
+    
+    def rebuild_from(self, guild_records):
+        """Replace the index contents from guild documents and rewrite the log
+        
+        Args:
+            guild_records (iterable): Full guild data dictionaries
+        """
+        for player_id in list(self._player_guild):
+            self._unlink(player_id)
+        for guild_data in guild_records:
+            for player_id in guild_data.get("members", {}):
+                self._link(player_id, guild_data["id"], None)
+        if self.log_path:
+            with file_lock(self._lock_path()):
+                self._rewrite()
+    
+    def set(self, player_id, guild_id, grade=None):
+        """Record that a player is in a guild
+        
+        Args:
+            player_id (str): Player ID
+            guild_id (str): Guild ID
+            grade (str, optional): Player's grade. Defaults to the known grade.
+        """
+        if grade is None:
+            grade = self._player_grade.get(player_id)
+        if self._player_guild.get(player_id) == guild_id and self._player_grade.get(player_id) == grade:
+            return
+        
+        self._link(player_id, guild_id, grade)
+        self._append({"player_id": player_id, "guild_id": guild_id, "grade": grade})
+    
+    def remove(self, player_id):
+        """Record that a player left their guild
+        
+        Args:
+            player_id (str): Player ID
+        """
+        if player_id not in self._player_guild:
+            return
+        
+        self._unlink(player_id)
+        self._append({"player_id": player_id, "guild_id": None})
+    
+    def guild_of(self, player_id):
+        """Get the guild of a player
+        
+        Args:
+            player_id (str): Player ID
+            
+        Returns:
+            str: Guild ID, or None if not in a guild
+        """
+        return self._player_guild.get(player_id)
+    
+    def members_of(self, guild_ids):
+        """Get the members of several guilds at once
+        
+        Args:
+            guild_ids (iterable): Guild IDs
+            
+        Returns:
+            dict: Guild ID -> list of {"player_id", "grade"} dictionaries
+        """
+        return {
+            guild_id: [
+                {"player_id": player_id, "grade": self._player_grade.get(player_id)}
+                for player_id in sorted(self._guild_members.get(guild_id, ()))
+            ]
+            for guild_id in guild_ids
+        }
+    
+    def guilds_with_grade(self, grade):
+        """Get the guilds that have at least one member in a grade
+        
+        Args:
+            grade (str): Grade level
+            
+        Returns:
+            list: Guild IDs
+        """
+        return sorted(self._grade_guilds.get(str(grade), {}))
+    
+    def _link(self, player_id, guild_id, grade):
+        self._unlink(player_id)
+        grade = str(grade) if grade is not None else None
+        self._player_guild[player_id] = guild_id
+        self._guild_members.setdefault(guild_id, set()).add(player_id)
+        if grade is not None:
+            self._player_grade[player_id] = grade
+            by_guild = self._grade_guilds.setdefault(grade, {})
+            by_guild[guild_id] = by_guild.get(guild_id, 0) + 1
+    
+    def _unlink(self, player_id):
+        guild_id = self._player_guild.pop(player_id, None)
+        grade = self._player_grade.pop(player_id, None)
+        if guild_id is None:
+            return
+        
+        members = self._guild_members.get(guild_id)
+        if members is not None:
+            members.discard(player_id)
+            if not members:
+                del self._guild_members[guild_id]
+        
+        if grade is not None:
+            by_guild = self._grade_guilds[grade]
+            by_guild[guild_id] -= 1
+            if not by_guild[guild_id]:
+                del by_guild[guild_id]
+    
+    def _lock_path(self):
+        return f"{self.log_path}.lock"
+    
+    def _append(self, entry):
+        if not self.log_path:
+            return
+        
+        # Locked so a compaction in another process cannot drop the line
+        with file_lock(self._lock_path()):
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        self._log_lines += 1
+        
+        # Compact once the log is mostly superseded entries
+        if self._log_lines > 2 * len(self._player_guild) + 1000:
+            self.compact()
+    
+    def compact(self):
+        """Rewrite the log with one line per member
+        
+        Other processes may have appended since this one loaded the log, so
+        the log is replayed under the lock first and rewritten from that.
+        """
+        if not self.log_path:
+            return
+        
+        with file_lock(self._lock_path()):
+            if os.path.exists(self.log_path):
+                self._replay()
+            self._rewrite()
+    
+    def _rewrite(self):
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, "w") as f:
+            for player_id, guild_id in self._player_guild.items():
+                entry = {"player_id": player_id, "guild_id": guild_id, "grade": self._player_grade.get(player_id)}
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.log_path)
+        self._log_lines = len(self._player_guild)
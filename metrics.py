@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Metrics module with counters, latency histograms and timing decorators
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+# Upper bounds (seconds) of the latency buckets; every histogram also has +Inf
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Buckets for steps that wait on the player, such as answering a question
+INTERACTION_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames, values, extra=None):
+    """Format a Prometheus label set
+    
+    Args:
+        labelnames (tuple): Label names
+        values (tuple): Label values
+        extra (tuple, optional): One more (name, value) pair. Defaults to None.
+        
+    Returns:
+        str: "{name="value",...}", or "" without labels
+    """
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count, optionally split by labels"""
+    
+    kind = "counter"
+    
+    def __init__(self, registry, name, documentation="", labelnames=()):
+        """Initialize a counter
+        
+        Args:
+            registry (MetricsRegistry): Registry the counter belongs to
+            name (str): Metric name
+            documentation (str, optional): Help text. Defaults to "".
+            labelnames (tuple, optional): Label names. Defaults to no labels.
+        """
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # Label values -> count
+        self._lock = threading.Lock()
+    
+    def inc(self, *label_values, amount=1):
+        """Add to the counter
+        
+        Args:
+            *label_values: One value per label name
+            amount (int, optional): Amount to add. Defaults to 1.
+        """
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def value(self, *label_values):
+        """Get the count for a label set
+        
+        Returns:
+            int: Current count
+        """
+        return self._values.get(label_values, 0)
+    
+    def reset(self):
+        """Drop every count"""
+        with self._lock:
+            self._values.clear()
+    
+    def _prometheus_lines(self):
+        for label_values, count in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, label_values)} {_format_number(count)}"
+    
+    def _to_dict(self):
+        return [{"labels": dict(zip(self.labelnames, label_values)), "value": count}
+                for label_values, count in sorted(self._values.items())]
+
+
+class Histogram:
+    """Observations counted into fixed buckets, optionally split by labels
+    
+    The bucket bounds never change, so an observation is one binary search
+    and an increment: no samples are stored.
+    """
+    
+    kind = "histogram"
+    
+    def __init__(self, registry, name, documentation="", labelnames=(), buckets=LATENCY_BUCKETS):
+        """Initialize a histogram
+        
+        Args:
+            registry (MetricsRegistry): Registry the histogram belongs to
+            name (str): Metric name
+            documentation (str, optional): Help text. Defaults to "".
+            labelnames (tuple, optional): Label names. Defaults to no labels.
+            buckets (tuple, optional): Ascending bucket upper bounds. Defaults to LATENCY_BUCKETS.
+        """
+        if list(buckets) != sorted(buckets):
+            raise ValueError(f"Buckets of {name} must be in ascending order")
+        
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # Label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *label_values):
+        """Record an observation
+        
+        Args:
+            value (float): Observed value
+            *label_values: One value per label name
+        """
+        if not self.registry.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+    
+    def count(self, *label_values):
+        """Get the number of observations for a label set
+        
+        Returns:
+            int: Number of observations
+        """
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+    
+    def reset(self):
+        """Drop every observation"""
+        with self._lock:
+            self._series.clear()
+    
+    def _prometheus_lines(self):
+        bounds = self.buckets + (float("inf"),)
+        for label_values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, label_values, ("le", _format_number(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, label_values)
+            yield f"{self.name}_sum{labels} {_format_number(series[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+    
+    def _to_dict(self):
+        return [{"labels": dict(zip(self.labelnames, label_values)),
+                 "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], series[:-1])),
+                 "count": sum(series[:-1]),
+                 "sum": series[-1]}
+                for label_values, series in sorted(self._series.items())]
+
+
+class MetricsRegistry:
+    """Named counters and histograms, exportable as Prometheus text or JSON
+    
+    While disabled every inc() and observe() returns at once and timing
+    decorators call straight through, so instrumented code pays one
+    attribute check per call.
+    """
+    
+    def __init__(self, enabled=None):
+        """Initialize the registry
+        
+        Args:
+            enabled (bool, optional): Whether to record anything. Defaults to the
+                EDURPG_METRICS environment variable being set (and not "0").
+        """
+        if enabled is None:
+            enabled = os.environ.get("EDURPG_METRICS", "0").lower() not in ("", "0", "off", "false")
+        self.enabled = enabled
+        self._metrics = {}  # Name -> Counter or Histogram
+        self._lock = threading.Lock()
+    
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(self, name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+    
+    def counter(self, name, documentation="", labelnames=()):
+        """Get or create a counter
+        
+        Args:
+            name (str): Metric name
+            documentation (str, optional): Help text. Defaults to "".
+            labelnames (tuple, optional): Label names. Defaults to no labels.
+            
+        Returns:
+            Counter: The counter
+        """
+        return self._register(Counter, name, documentation, labelnames)
+    
+    def histogram(self, name, documentation="", labelnames=(), buckets=LATENCY_BUCKETS):
+        """Get or create a histogram
+        
+        Args:
+            name (str): Metric name
+            documentation (str, optional): Help text. Defaults to "".
+            labelnames (tuple, optional): Label names. Defaults to no labels.
+            buckets (tuple, optional): Ascending bucket upper bounds. Defaults to LATENCY_BUCKETS.
+            
+        Returns:
+            Histogram: The histogram
+        """
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+    
+    def reset(self):
+        """Drop every recorded value, keeping the metrics registered"""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+    
+    def to_prometheus(self):
+        """Export every metric in the Prometheus text exposition format
+        
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            if metric.documentation:
+                lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric._prometheus_lines())
+        return "\n".join(lines) + "\n"
+    
+    def to_dict(self):
+        """Export every metric as a dictionary
+        
+        Returns:
+            dict: Metric name -> {"type", "help", "series"}
+        """
+        return {name: {"type": metric.kind, "help": metric.documentation, "series": metric._to_dict()}
+                for name, metric in sorted(self._metrics.items())}
+    
+    def write(self, path):
+        """Write the metrics to a file, as JSON for .json paths and Prometheus text otherwise
+        
+        Args:
+            path (str): Output file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            if path.suffix == ".json":
+                json.dump(self.to_dict(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+
+_shared_registry = None
+
+
+def get_registry():
+    """Get the registry shared by every instrumented module
+    
+    Returns:
+        MetricsRegistry: Shared registry
+    """
+    global _shared_registry
+    if _shared_registry is None:
+        _shared_registry = MetricsRegistry()
+    return _shared_registry
+
+
+def timed(name, documentation="", buckets=LATENCY_BUCKETS, registry=None, **labels):
+    """Decorator recording how long each call takes in a histogram
+    
+    Calls that raise are timed too. Keyword arguments become fixed labels,
+    so many functions can share one histogram:
+    
+        @timed("edurpg_database_seconds", operation="save_player")
+        
+    Args:
+        name (str): Histogram name
+        documentation (str, optional): Help text. Defaults to "".
+        buckets (tuple, optional): Bucket upper bounds in seconds. Defaults to LATENCY_BUCKETS.
+        registry (MetricsRegistry, optional): Registry to record in. Defaults to the shared registry.
+        **labels: Label values of this function's series
+        
+    Returns:
+        callable: Decorator
+    """
+    def decorate(func):
+        target = registry or get_registry()
+        histogram = target.histogram(name, documentation, tuple(labels), buckets)
+        label_values = tuple(labels.values())
+        perf_counter = time.perf_counter
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not target.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - start, *label_values)
+        return wrapper
+    return decorate
+
+
+def counted(name, documentation="", registry=None, **labels):
+    """Decorator counting the calls of a function
+    
+    Args:
+        name (str): Counter name
+        documentation (str, optional): Help text. Defaults to "".
+        registry (MetricsRegistry, optional): Registry to record in. Defaults to the shared registry.
+        **labels: Label values of this function's series
+        
+    Returns:
+        callable: Decorator
+    """
+    def decorate(func):
+        target = registry or get_registry()
+        counter = target.counter(name, documentation, tuple(labels))
+        label_values = tuple(labels.values())
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if target.enabled:
+                counter.inc(*label_values)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# For testing
+if __name__ == "__main__":
+    registry = MetricsRegistry(enabled=True)
+    
+    def work():
+        return sum(range(20))
+    
+    @timed("demo_work_seconds", "Time spent in work()", registry=registry, step="work")
+    def timed_work():
+        return sum(range(20))
+    
+    # Cost of the decorator per call, enabled and disabled
+    calls = 200000
+    rates = {}
+    for label, func, enabled in (("plain", work, True), ("disabled", timed_work, False), ("enabled", timed_work, True)):
+        registry.enabled = enabled
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        rates[label] = (time.perf_counter() - start) / calls * 1e9
+    print(f"plain {rates['plain']:.0f}ns/call, timed+disabled {rates['disabled']:.0f}ns/call "
+          f"(+{rates['disabled'] - rates['plain']:.0f}ns), timed+enabled {rates['enabled']:.0f}ns/call "
+          f"(+{rates['enabled'] - rates['plain']:.0f}ns)")
+    
+    errors = registry.counter("demo_errors_total", "Errors by operation", ("operation",))
+    errors.inc("save")
+    errors.inc("save")
+    errors.inc("load")
+    print()
+    print(registry.to_prometheus())
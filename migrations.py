@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Migrations module for upgrading saved players and guilds between schema versions
+"""
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from rich.console import Console
+
+from items import custom_item, find_item_id, thaw
+from quest_archive import empty_quest_stats
+
+console = Console()
+
+PLAYER_SCHEMA_VERSION = 3
+GUILD_SCHEMA_VERSION = 2
+
+# Kind -> {from_version: function upgrading a record to from_version + 1}
+_MIGRATIONS = {"player": {}, "guild": {}}
+_CURRENT_VERSIONS = {"player": PLAYER_SCHEMA_VERSION, "guild": GUILD_SCHEMA_VERSION}
+
+
+def migration(kind, from_version):
+    """Register a function that upgrades a record by one schema version
+    
+    Args:
+        kind (str): "player" or "guild"
+        from_version (int): Schema version the function upgrades from
+        
+    Returns:
+        callable: Decorator registering the function
+    """
+    def register(func):
+        _MIGRATIONS[kind][from_version] = func
+        return func
+    return register
+
+
+def upgrade(kind, data):
+    """Bring a saved record up to the current schema version
+    
+    Records saved before versioning existed count as version 1.
+    
+    Args:
+        kind (str): "player" or "guild"
+        data (dict): Saved record (not modified)
+        
+    Returns:
+        dict: Record at the current schema version
+    """
+    current = _CURRENT_VERSIONS[kind]
+    version = data.get("schema_version", 1)
+    if version == current:
+        return data
+    if version > current:
+        raise ValueError(f"{kind.capitalize()} was saved by a newer version of EduRPG (schema {version})")
+    
+    data = dict(data)
+    while version < current:
+        data = _MIGRATIONS[kind][version](data)
+        version += 1
+        data["schema_version"] = version
+    return data
+
+
+def upgrade_player(data):
+    """Bring a saved player up to the current schema version
+    
+    Args:
+        data (dict): Saved player
+        
+    Returns:
+        dict: Player data at the current schema version
+    """
+    return upgrade("player", data)
+
+
+def upgrade_guild(data):
+    """Bring a saved guild up to the current schema version
+    
+    Args:
+        data (dict): Saved guild
+        
+    Returns:
+        dict: Guild data at the current schema version
+    """
+    return upgrade("guild", data)
+
+
+def needs_upgrade(kind, data):
+    """Check whether a saved record is behind the current schema
+    
+    Args:
+        kind (str): "player" or "guild"
+        data (dict): Saved record
+        
+    Returns:
+        bool: True if upgrade() would change the record
+    """
+    return data.get("schema_version", 1) < _CURRENT_VERSIONS[kind]
+
+
+@migration("player", 1)
+def _player_fill_defaults(data):
+    """Early saves could miss traits, skills or the guild link"""
+    traits = {"math": 0, "science": 0, "history": 0, "language": 0, "arts": 0}
+    traits.update(data.get("traits") or {})
+    data["traits"] = traits
+    data.setdefault("level", 1)
+    data.setdefault("xp", 0)
+    data.setdefault("inventory", [])
+    data.setdefault("skills", [])
+    data.setdefault("guild_id", None)
+    return data
+
+
+@migration("player", 2)
+def _player_stack_inventory(data):
+    """Inventories became item ID -> quantity instead of a list of item dictionaries"""
+    inventory = data.get("inventory") or []
+    if isinstance(inventory, list):
+        counts = {}
+        custom_items = data.get("custom_items") or {}
+        for item in inventory:
+            item_id = find_item_id(item)
+            if item_id is None:
+                # Keep the full definition; the stack only records the ID
+                definition = custom_item(item)
+                item_id = definition["id"]
+                custom_items.setdefault(item_id, thaw(definition))
+            counts[item_id] = counts.get(item_id, 0) + 1
+        data["inventory"] = counts
+        if custom_items:
+            data["custom_items"] = custom_items
+    return data
+
+
+@migration("guild", 1)
+def _guild_summarize_quests(data):
+    """Add the fields introduced alongside quest archiving and leveling"""
+    data.setdefault("subject_focus", None)
+    data.setdefault("quests", [])
+    data.setdefault("completed_quests", [])
+    data.setdefault("chat_history", [])
+    data.setdefault("member_xp", {})
+    data.setdefault("version", 0)
+    data.setdefault("xp", 0)
+    data.setdefault("level", 1)
+    
+    if "quest_stats" not in data:
+        # Older saves kept every completed quest inline; summarize them
+        # here and they move to the archive with the next batch
+        stats = empty_quest_stats()
+        for quest in data["completed_quests"]:
+            stats["completed"] += 1
+            stats["xp_earned"] += quest.get("xp_reward", 0)
+            subject = quest.get("subject", "all")
+            stats["by_subject"][subject] = stats["by_subject"].get(subject, 0) + 1
+            stats["last_completed_at"] = quest.get("completed_at")
+        data["quest_stats"] = stats
+    return data
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def migrate_collection(database, collection, workers=4, batch_size=100, dry_run=False, progress=None):
+    """Upgrade every stored record of a collection to the current schema
+    
+    Records stream from the database in batches; at most two batches per
+    worker are in flight, so memory stays flat however large the collection.
+    Guilds are written back with a version check so a guild changed by a
+    live session mid-migration is left for lazy upgrade instead of clobbered.
+    
+    Args:
+        database: Database object
+        collection (str): "players" or "guilds"
+        workers (int, optional): Parallel worker threads. Defaults to 4.
+        batch_size (int, optional): Records per batch. Defaults to 100.
+        dry_run (bool, optional): Count records needing an upgrade without writing. Defaults to False.
+        progress (callable, optional): Called with the running stats after each batch. Defaults to None.
+        
+    Returns:
+        dict: scanned, migrated, skipped, failed, seconds and records_per_second
+    """
+    kind = {"players": "player", "guilds": "guild"}[collection]
+    stats = {"scanned": 0, "migrated": 0, "skipped": 0, "failed": 0}
+    
+    def migrate_batch(batch):
+        counts = {"scanned": len(batch), "migrated": 0, "skipped": 0, "failed": 0}
+        for data in batch:
+            if not needs_upgrade(kind, data):
+                counts["skipped"] += 1
+                continue
+            if dry_run:
+                counts["migrated"] += 1
+                continue
+            try:
+                upgraded = upgrade(kind, data)
+                if kind == "guild":
+                    upgraded["version"] = data.get("version", 0) + 1
+                    saved = database.save_guild(upgraded, expected_version=data.get("version", 0))
+                else:
+                    saved = database.save_player(upgraded)
+            except ValueError:
+                saved = False
+            counts["migrated" if saved else "failed"] += 1
+        return counts
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for batch in _chunks(database.iter_documents(collection), batch_size):
+            in_flight.append(executor.submit(migrate_batch, batch))
+            while len(in_flight) >= 2 * workers:
+                _add_counts(stats, in_flight.popleft().result(), progress, start)
+        while in_flight:
+            _add_counts(stats, in_flight.popleft().result(), progress, start)
+    
+    stats["seconds"] = time.perf_counter() - start
+    stats["records_per_second"] = stats["scanned"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def _add_counts(stats, counts, progress, start):
+    for key, value in counts.items():
+        stats[key] += value
+    if progress:
+        elapsed = time.perf_counter() - start
+        progress({**stats, "seconds": elapsed, "records_per_second": stats["scanned"] / elapsed if elapsed else 0.0})
+
+
+# For testing
+if __name__ == "__main__":
+    import sys
+    from database import Database
+    
+    collections = sys.argv[1:2] or ["players", "guilds"]
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    
+    db = Database()
+    for name in collections:
+        result = migrate_collection(db, name, workers=workers)
+        console.print(
+            f"[green]{name}: scanned {result['scanned']}, migrated {result['migrated']}, "
+            f"failed {result['failed']} in {result['seconds']:.2f}s "
+            f"({result['records_per_second']:.0f} records/sec)[/green]"
+        )
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Pacing module deciding how long dramatic pauses and animations take
+"""
+
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+
+INTERACTIVE = "interactive"  # Full-length pauses for a player at the keyboard
+FAST = "fast"  # Pauses cut to a tenth, for demos and quick play
+HEADLESS = "headless"  # No pauses at all, for scripts and tests
+PACING_MODES = (INTERACTIVE, FAST, HEADLESS)
+
+_SCALE = {INTERACTIVE: 1.0, FAST: 0.1, HEADLESS: 0.0}
+
+
+class Animation:
+    """Handle on a running animation"""
+    
+    def __init__(self):
+        self._done = threading.Event()
+    
+    @property
+    def done(self):
+        """Whether the animation has finished"""
+        return self._done.is_set()
+    
+    def wait(self, timeout=None):
+        """Block until the animation finishes
+        
+        Args:
+            timeout (float, optional): Most seconds to wait. Defaults to no limit.
+            
+        Returns:
+            bool: True if the animation finished
+        """
+        return self._done.wait(timeout)
+
+
+class AnimationScheduler:
+    """One background thread driving every animation frame
+    
+    Animations register a frame callback and a duration; the thread wakes
+    only when the next frame is due, so any number of animations cost one
+    thread and no busy loops, and callers are free to keep working.
+    """
+    
+    def __init__(self, fps=20, clock=time.monotonic):
+        """Initialize the scheduler
+        
+        Args:
+            fps (int, optional): Frames per second of each animation. Defaults to 20.
+            clock (callable, optional): Monotonic clock. Defaults to time.monotonic.
+        """
+        self.frame_interval = 1.0 / fps
+        self.clock = clock
+        self._queue = []  # (due, sequence, start, duration, on_frame, animation)
+        self._sequence = itertools.count()
+        self._wakeup = threading.Condition()
+        self._thread = None
+    
+    def animate(self, duration, on_frame):
+        """Run an animation
+        
+        Args:
+            duration (float): Seconds the animation lasts
+            on_frame (callable): Called with the progress (0.0-1.0) of each frame; the last call gets 1.0
+            
+        Returns:
+            Animation: Handle to wait on
+        """
+        animation = Animation()
+        now = self.clock()
+        with self._wakeup:
+            heapq.heappush(self._queue, (now, next(self._sequence), now, duration, on_frame, animation))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="animation-scheduler", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+        return animation
+    
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._queue or self._queue[0][0] > self.clock():
+                    self._wakeup.wait(self._queue[0][0] - self.clock() if self._queue else None)
+                due, _, start, duration, on_frame, animation = heapq.heappop(self._queue)
+            
+            progress = min((self.clock() - start) / duration, 1.0) if duration > 0 else 1.0
+            try:
+                on_frame(progress)
+            except Exception:
+                progress = 1.0  # A broken callback ends its animation, not the scheduler
+            
+            if progress >= 1.0:
+                animation._done.set()
+            else:
+                with self._wakeup:
+                    next_due = min(due + self.frame_interval, start + duration)
+                    heapq.heappush(self._queue, (next_due, next(self._sequence), start, duration, on_frame, animation))
+
+
+class Pacing:
+    """Pacing policy consulted by every pause and animation in the game
+    
+    Interactive mode keeps the original timings, fast mode cuts them to a
+    tenth and headless mode skips them entirely, so automated sessions run
+    at full speed.
+    """
+    
+    def __init__(self, mode=None, sleep=time.sleep, scheduler=None):
+        """Initialize the pacing policy
+        
+        Args:
+            mode (str, optional): One of PACING_MODES. Defaults to the EDURPG_PACING
+                environment variable, or headless when stdout is not a terminal.
+            sleep (callable, optional): Blocking sleep function. Defaults to time.sleep.
+            scheduler (AnimationScheduler, optional): Animation scheduler. Defaults to a new one.
+        """
+        if mode is None:
+            mode = os.environ.get("EDURPG_PACING", "").lower() or (INTERACTIVE if sys.stdout.isatty() else HEADLESS)
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode: {mode}")
+        
+        self.mode = mode
+        self.sleep = sleep
+        self.scheduler = scheduler or AnimationScheduler()
+    
+    def scaled(self, seconds):
+        """Get how long a pause really lasts in this mode
+        
+        Args:
+            seconds (float): Interactive duration
+            
+        Returns:
+            float: Duration in this mode
+        """
+        return seconds * _SCALE[self.mode]
+    
+    def pause(self, seconds):
+        """Hold the screen for a dramatic pause
+        
+        Args:
+            seconds (float): Interactive duration
+        """
+        delay = self.scaled(seconds)
+        if delay > 0:
+            self.sleep(delay)
+    
+    def animate(self, seconds, on_frame):
+        """Run an animation on the shared scheduler
+        
+        Args:
+            seconds (float): Interactive duration
+            on_frame (callable): Called with the progress (0.0-1.0) of each frame
+            
+        Returns:
+            Animation: Handle to wait on; already finished in headless mode
+        """
+        duration = self.scaled(seconds)
+        if duration <= 0:
+            on_frame(1.0)
+            animation = Animation()
+            animation._done.set()
+            return animation
+        return self.scheduler.animate(duration, on_frame)
+
+
+_shared_pacing = None
+
+
+def get_pacing():
+    """Get the pacing policy shared by the UI, combat and game loop
+    
+    Returns:
+        Pacing: Shared pacing policy
+    """
+    global _shared_pacing
+    if _shared_pacing is None:
+        _shared_pacing = Pacing()
+    return _shared_pacing
+
+
+def set_pacing_mode(mode):
+    """Switch the shared pacing policy to another mode
+    
+    Args:
+        mode (str): One of PACING_MODES
+    """
+    if mode not in PACING_MODES:
+        raise ValueError(f"Unknown pacing mode: {mode}")
+    get_pacing().mode = mode
+
+
+# For testing
+if __name__ == "__main__":
+    for mode in PACING_MODES:
+        pacing = Pacing(mode)
+        frames = []
+        start = time.perf_counter()
+        pacing.pause(1.5)
+        pacing.animate(1.0, frames.append).wait()
+        print(f"{mode:<12} pause(1.5) + animate(1.0): {time.perf_counter() - start:.2f}s, {len(frames)} frames")
+    
+    # Many concurrent animations still share one thread
+    pacing = Pacing(INTERACTIVE)
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    handles = [pacing.animate(0.5, lambda progress: None) for _ in range(200)]
+    for handle in handles:
+        handle.wait()
+    print(f"200 concurrent animations: {time.perf_counter() - start:.2f}s on {threading.active_count() - threads_before} new thread(s)")
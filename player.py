@@ -7,6 +7,10 @@ Player module for character management and progression
 import json
 from rich.console import Console
 
+from codec import encode_player, decode_player
+from inventory import Inventory
+from migrations import upgrade_player, PLAYER_SCHEMA_VERSION
+
 console = Console()
 
 class Player:
@@ -30,13 +34,34 @@ class Player:
             "language": 0,
             "arts": 0
         }
-        self.inventory = []
+        self.inventory = Inventory()
         self.skills = []
         self.guild_id = None
+        self._listeners = []  # Callbacks notified of player events
+        self._effective_stats = None  # Traits plus item bonuses, rebuilt after inventory changes
         
         # Initialize level thresholds
         self.level_thresholds = self._generate_level_thresholds()
     
+    def add_listener(self, callback):
+        """Register a callback for player events
+        
+        Args:
+            callback (callable): Called as callback(event, player, payload)
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+    
+    def _emit(self, event, **payload):
+        """Notify listeners of a player event
+        
+        Args:
+            event (str): Event name
+            **payload: Event data
+        """
+        for callback in self._listeners:
+            callback(event, self, payload)
+    
     def _generate_level_thresholds(self):
         """Generate XP thresholds for each level
         
@@ -59,11 +84,18 @@ class Player:
         Returns:
             bool: True if player leveled up, False otherwise
         """
+        # Apply item XP bonuses
+        xp_bonus = self.get_effective_stats()["xp_bonus"]
+        if xp_bonus:
+            amount += int(amount * xp_bonus)
+        
         self.xp += amount
         
         # Add trait points if subject is specified
         if subject and subject in self.traits:
-            self.traits[subject] += amount // 10  # 10% of XP goes to trait
+            trait_gain = amount // 10  # 10% of XP goes to trait
+            self.traits[subject] += trait_gain
+            self._effective_stats["traits"][subject] += trait_gain
         
         # Check for level up
         leveled_up = False
@@ -77,6 +109,7 @@ class Player:
             for skill in new_skills:
                 console.print(f"[bold cyan]🔓 New Skill Unlocked: {skill}[/bold cyan]")
         
+        self._emit("xp_gained", amount=amount, subject=subject, leveled_up=leveled_up)
         return leveled_up
     
     def _check_skill_unlocks(self):
@@ -125,32 +158,68 @@ class Player:
         
         return new_skills
     
-    def add_to_inventory(self, item):
+    def add_to_inventory(self, item, quantity=1):
         """Add an item to the player's inventory
         
         Args:
-            item (dict): Item to add to inventory
+            item (str or dict): Item ID, name or item data
+            quantity (int, optional): How many to add. Defaults to 1.
+            
+        Returns:
+            MappingProxyType: The item that was added
         """
-        self.inventory.append(item)
-        console.print(f"[green]Added {item['name']} to your inventory![/green]")
+        item_id = self.inventory.add(item, quantity)
+        self._effective_stats = None
+        added = self.inventory.get(item_id)
+        console.print(f"[green]Added {added['name']} to your inventory![/green]")
+        self._emit("inventory_changed", item_id=item_id, quantity=quantity)
+        return added
     
-    def remove_from_inventory(self, item_name):
+    def remove_from_inventory(self, item_name, quantity=1):
         """Remove an item from the player's inventory
         
         Args:
-            item_name (str): Name of the item to remove
+            item_name (str): Name or ID of the item to remove
+            quantity (int, optional): How many to remove. Defaults to 1.
             
         Returns:
-            dict: The removed item, or None if not found
+            MappingProxyType: The removed item, or None if not found
+        """
+        item_id = self.inventory.find(item_name)
+        removed = self.inventory.get(item_id) if item_id is not None else None
+        if removed is None or not self.inventory.remove(item_id, quantity):
+            console.print(f"[red]Item {item_name} not found in inventory.[/red]")
+            return None
+        self._effective_stats = None
+        
+        console.print(f"[yellow]Removed {removed['name']} from your inventory.[/yellow]")
+        self._emit("inventory_changed", item_id=item_id, quantity=-quantity)
+        return removed
+    
+    def get_effective_stats(self):
+        """Get traits and bonuses with every item effect applied
+        
+        The result is cached and only rebuilt after the inventory changes,
+        so combat can read it on every hit. Each distinct item counts once,
+        however many copies are held.
+        
+        Returns:
+            dict: "traits" (trait -> value), "damage_bonus" (subject -> flat damage) and "xp_bonus" (fraction)
         """
-        for i, item in enumerate(self.inventory):
-            if item["name"] == item_name:
-                removed_item = self.inventory.pop(i)
-                console.print(f"[yellow]Removed {item_name} from your inventory.[/yellow]")
-                return removed_item
-        
-        console.print(f"[red]Item {item_name} not found in inventory.[/red]")
-        return None
+        if self._effective_stats is None:
+            traits = dict(self.traits)
+            damage_bonus = {}
+            xp_bonus = 0.0
+            for item, _ in self.inventory:
+                effect = item["effect"]
+                for trait, bonus in effect.get("trait_bonus", {}).items():
+                    traits[trait] = traits.get(trait, 0) + bonus
+                if "damage_bonus" in effect:
+                    subject = item.get("subject", "all")
+                    damage_bonus[subject] = damage_bonus.get(subject, 0) + effect["damage_bonus"]
+                xp_bonus += effect.get("xp_bonus", 0)
+            self._effective_stats = {"traits": traits, "damage_bonus": damage_bonus, "xp_bonus": xp_bonus}
+        return self._effective_stats
     
     def join_guild(self, guild_id):
         """Join a guild
@@ -203,16 +272,21 @@ class Player:
         Returns:
             dict: Player data as dictionary
         """
-        return {
+        data = {
             "name": self.name,
             "grade": self.grade,
             "level": self.level,
             "xp": self.xp,
             "traits": self.traits,
-            "inventory": self.inventory,
+            "inventory": self.inventory.to_dict(),
             "skills": self.skills,
-            "guild_id": self.guild_id
+            "guild_id": self.guild_id,
+            "schema_version": PLAYER_SCHEMA_VERSION
         }
+        custom_items = self.inventory.custom_items()
+        if custom_items:
+            data["custom_items"] = custom_items  # Definitions the catalog cannot rebuild
+        return data
     
     @classmethod
     def from_dict(cls, data):
@@ -224,15 +298,37 @@ class Player:
         Returns:
             Player: New player instance
         """
+        data = upgrade_player(data)
         player = cls(data["name"], data["grade"])
         player.level = data["level"]
         player.xp = data["xp"]
         player.traits = data["traits"]
-        player.inventory = data["inventory"]
+        player.inventory = Inventory.from_dict(data["inventory"], data.get("custom_items"))
         player.skills = data["skills"]
         player.guild_id = data["guild_id"]
+        player._effective_stats = None
         return player
     
+    def to_bytes(self):
+        """Convert player data to the compact binary format
+        
+        Returns:
+            bytes: Encoded player data
+        """
+        return encode_player(self.to_dict())
+    
+    @classmethod
+    def from_bytes(cls, blob):
+        """Create a player from the compact binary format
+        
+        Args:
+            blob (bytes): Encoded player data
+            
+        Returns:
+            Player: New player instance
+        """
+        return cls.from_dict(decode_player(blob))
+    
     def save_to_file(self, filename):
         """Save player data to a JSON file
         
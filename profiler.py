@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Profiler module sampling the game's call stacks without extra tooling
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# Game modules whose functions time is attributed to
+COMPONENTS = ("player", "combat", "guild", "database", "ui")
+OTHER = "other"
+
+_GAME_DIR = Path(__file__).resolve().parent
+
+
+def _thread_cpu_clock(thread_id):
+    """Get a function reading the CPU time of another thread
+    
+    Args:
+        thread_id (int): Thread identifier
+        
+    Returns:
+        callable: Returns CPU seconds; falls back to the whole process's CPU time
+            where per-thread clocks are unavailable (Windows, macOS)
+    """
+    try:
+        clock_id = time.pthread_getcpuclockid(thread_id)
+        time.clock_gettime(clock_id)
+        return lambda: time.clock_gettime(clock_id)
+    except (AttributeError, OSError):
+        return time.process_time
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling one thread's stack at a fixed interval
+    
+    A background thread looks at the target thread's stack every interval
+    and charges the wall and CPU time elapsed since the previous sample to
+    that stack. The game is never traced, so it runs at nearly full speed,
+    and only the standard library is needed.
+    """
+    
+    def __init__(self, interval=0.005, thread_id=None, components=COMPONENTS):
+        """Initialize the profiler
+        
+        Args:
+            interval (float, optional): Seconds between samples. Defaults to 0.005.
+            thread_id (int, optional): Thread to sample. Defaults to the thread creating the profiler.
+            components (tuple, optional): Module names time is attributed to. Defaults to COMPONENTS.
+        """
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.components = components
+        self.samples = 0
+        self._stacks = {}  # Stack of frame labels, outermost first -> [samples, wall seconds, cpu seconds]
+        self._cpu_clock = _thread_cpu_clock(self.thread_id)
+        self._stop = threading.Event()
+        self._thread = None
+        self._code_labels = {}  # Code object -> frame label
+        self._label_components = {}  # Frame label -> component, for frames of game modules
+    
+    def start(self):
+        """Start sampling"""
+        self._stop.clear()
+        self._last_wall = time.perf_counter()
+        self._last_cpu = self._cpu_clock()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+    
+    def _label(self, code):
+        label = self._code_labels.get(code)
+        if label is None:
+            if code.co_filename.startswith("<"):  # <frozen ...>, <string>
+                module, path = code.co_filename.strip("<>"), None
+            else:
+                path = Path(code.co_filename).resolve()
+                module = path.stem
+            label = self._code_labels[code] = f"{module}:{code.co_qualname}"
+            if module in self.components and path is not None and path.parent == _GAME_DIR:
+                self._label_components[label] = module
+        return label
+    
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        wall = time.perf_counter()
+        cpu = self._cpu_clock()
+        if frame is None:
+            return  # The thread has finished
+        
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        
+        totals = self._stacks.get(tuple(stack))
+        if totals is None:
+            totals = self._stacks[tuple(stack)] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += wall - self._last_wall
+        totals[2] += max(cpu - self._last_cpu, 0.0)
+        self._last_wall, self._last_cpu = wall, cpu
+        self.samples += 1
+    
+    def _component_of(self, stack):
+        """Get the component a stack's time belongs to: that of its innermost game frame
+        
+        Args:
+            stack (tuple): Frame labels, outermost first
+            
+        Returns:
+            str: Component name, or OTHER
+        """
+        for label in reversed(stack):
+            component = self._label_components.get(label)
+            if component:
+                return component
+        return OTHER
+    
+    def summary(self):
+        """Get the time attributed to each component
+        
+        Returns:
+            dict: Component -> {"samples", "wall_seconds", "cpu_seconds"}
+        """
+        totals = {component: {"samples": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+                  for component in self.components + (OTHER,)}
+        for stack, (samples, wall, cpu) in self._stacks.items():
+            entry = totals[self._component_of(stack)]
+            entry["samples"] += samples
+            entry["wall_seconds"] += wall
+            entry["cpu_seconds"] += cpu
+        return totals
+    
+    def collapsed(self, weight="wall"):
+        """Get the samples as collapsed stacks, the input format of flamegraph tools
+        
+        Args:
+            weight (str, optional): "wall" or "cpu" microseconds, or "samples". Defaults to "wall".
+            
+        Returns:
+            list: Lines of "frame;frame;frame weight"
+        """
+        column = {"samples": 0, "wall": 1, "cpu": 2}[weight]
+        lines = []
+        for stack, totals in sorted(self._stacks.items()):
+            value = totals[column] if column == 0 else round(totals[column] * 1e6)
+            if value > 0:
+                lines.append(f"{';'.join(stack)} {value}")
+        return lines
+    
+    def write_collapsed(self, path):
+        """Write wall-time collapsed stacks to path and CPU-time ones next to it
+        
+        Args:
+            path (str): Output file, e.g. profile.collapsed; CPU stacks go to profile.cpu.collapsed
+            
+        Returns:
+            list: Paths written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cpu_path = path.with_name(f"{path.stem}.cpu{path.suffix}")
+        for output, weight in ((path, "wall"), (cpu_path, "cpu")):
+            with open(output, "w") as f:
+                f.write("\n".join(self.collapsed(weight)) + "\n")
+        return [path, cpu_path]
+    
+    def print_summary(self, out=None):
+        """Print the time attributed to each component
+        
+        Args:
+            out (Console, optional): Console to print on. Defaults to the module console.
+        """
+        totals = self.summary()
+        wall_total = sum(entry["wall_seconds"] for entry in totals.values()) or 1.0
+        cpu_total = sum(entry["cpu_seconds"] for entry in totals.values()) or 1.0
+        
+        table = Table(title=f"Profile ({self.samples} samples every {self.interval * 1000:g}ms)")
+        table.add_column("Component", style="cyan")
+        table.add_column("Wall s", justify="right")
+        table.add_column("Wall %", justify="right")
+        table.add_column("CPU s", justify="right")
+        table.add_column("CPU %", justify="right")
+        for component, entry in sorted(totals.items(), key=lambda item: -item[1]["wall_seconds"]):
+            table.add_row(
+                component,
+                f"{entry['wall_seconds']:.3f}",
+                f"{100 * entry['wall_seconds'] / wall_total:.1f}",
+                f"{entry['cpu_seconds']:.3f}",
+                f"{100 * entry['cpu_seconds'] / cpu_total:.1f}"
+            )
+        (out or console).print(table)
+
+
+def profile_call(func, output_path=None, interval=0.005):
+    """Run a function under the sampling profiler
+    
+    Args:
+        func (callable): Function to profile; runs on the calling thread
+        output_path (str, optional): Where to write collapsed stacks. Defaults to not writing them.
+        interval (float, optional): Seconds between samples. Defaults to 0.005.
+        
+    Returns:
+        SamplingProfiler: The stopped profiler
+    """
+    profiler = SamplingProfiler(interval)
+    try:
+        with profiler:
+            func()
+    finally:
+        if output_path:
+            for path in profiler.write_collapsed(output_path):
+                console.print(f"[green]Collapsed stacks written to {path}[/green]")
+    return profiler
+
+
+# For testing
+if __name__ == "__main__":
+    import io
+    import tempfile
+    
+    from session import ScriptedSession, play
+    
+    # Profile scripted games: new character, battles, then the guild menu
+    script = ["1", "Ada", "10", "1"] + ["1", "42"] * 6 + ["3", True, "5", True, "5", True]
+    
+    def play_games():
+        for seed in range(20):
+            with tempfile.TemporaryDirectory() as data_dir:
+                play(ScriptedSession(list(script), seed=seed), data_dir)
+    
+    output = Path(tempfile.gettempdir()) / "edurpg-selftest.collapsed"
+    profiler = profile_call(play_games, output, interval=0.001)
+    profiler.print_summary()
+    print(f"{len(profiler.collapsed())} distinct stacks; render with flamegraph.pl {output} > profile.svg")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Quest archive module for cold storage of completed guild quests
+"""
+
+import json
+import zlib
+
+SEGMENT_SIZE = 100  # Completed quests per compressed segment
+
+
+def encode_segment(records):
+    """Compress a list of quest records
+    
+    Args:
+        records (list): Completed quest dictionaries
+        
+    Returns:
+        bytes: Compressed segment
+    """
+    return zlib.compress(json.dumps(records, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def decode_segment(blob):
+    """Decompress a segment
+    
+    Args:
+        blob (bytes): Compressed segment
+        
+    Returns:
+        list: Completed quest dictionaries
+    """
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def empty_quest_stats():
+    """Get the hot summary counters of a guild with no completed quests
+    
+    Returns:
+        dict: Quest statistics
+    """
+    return {
+        "completed": 0,  # Quests ever completed
+        "archived": 0,  # Of those, how many are in cold storage
+        "xp_earned": 0,
+        "by_subject": {},  # Subject -> completed count
+        "last_completed_at": None
+    }
+
+
+class QuestArchive:
+    """Append-only cold storage of completed quests, one series per guild
+    
+    Record N of a guild always lives at position N % SEGMENT_SIZE of segment
+    N // SEGMENT_SIZE, so writing the same records twice (for example when a
+    guild save is retried) overwrites rather than duplicates them. Anything
+    past the guild's archived count is ignored on read.
+    """
+    
+    def __init__(self, database):
+        """Initialize the archive
+        
+        Args:
+            database: Database object for segment storage
+        """
+        self.db = database
+    
+    def append(self, guild_id, archived_count, records):
+        """Write completed quests after the ones already archived
+        
+        Args:
+            guild_id (str): Guild ID
+            archived_count (int): Number of records already archived
+            records (list): Completed quests to add
+            
+        Returns:
+            bool: True if every segment was written, False otherwise
+        """
+        position = archived_count
+        pending = list(records)
+        while pending:
+            segment_no, offset = divmod(position, SEGMENT_SIZE)
+            chunk = pending[:SEGMENT_SIZE - offset]
+            
+            def merge(blob, offset=offset, chunk=chunk):
+                segment = decode_segment(blob) if blob else []
+                if len(segment) < offset:
+                    return None  # Earlier records are missing; don't write a gap
+                merged = segment[:offset] + chunk
+                # Keep records past ours: another session wrote them from a newer guild
+                # version, and a given position always holds the same record
+                merged.extend(segment[len(merged):])
+                return encode_segment(merged)
+            
+            if not self.db.update_archive_segment(guild_id, segment_no, merge):
+                return False
+            
+            position += len(chunk)
+            pending = pending[len(chunk):]
+        
+        return True
+    
+    def history(self, guild_id, archived_count, subject=None, since=None, limit=None):
+        """Iterate archived quests, newest first
+        
+        Only the segments needed to satisfy the query are read.
+        
+        Args:
+            guild_id (str): Guild ID
+            archived_count (int): Number of archived records
+            subject (str, optional): Only quests of this subject. Defaults to None.
+            since (float, optional): Only quests completed at or after this time. Defaults to None.
+            limit (int, optional): Maximum number of quests. Defaults to no limit.
+            
+        Yields:
+            dict: Completed quest
+        """
+        if archived_count <= 0:
+            return
+        
+        returned = 0
+        last_segment = (archived_count - 1) // SEGMENT_SIZE
+        for segment_no in range(last_segment, -1, -1):
+            segment = self._read_segment(guild_id, segment_no)
+            # Drop records written by a save that never committed
+            segment = segment[:archived_count - segment_no * SEGMENT_SIZE]
+            
+            for record in reversed(segment):
+                if since is not None and record.get("completed_at", 0) < since:
+                    return  # Records are in completion order, so nothing older matches
+                if subject is not None and record.get("subject") != subject:
+                    continue
+                yield record
+                returned += 1
+                if limit is not None and returned >= limit:
+                    return
+    
+    def _read_segment(self, guild_id, segment_no):
+        blob = self.db.get_archive_segment(guild_id, segment_no)
+        return decode_segment(blob) if blob else []
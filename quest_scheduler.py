@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Quest scheduler module for expiring guild quests
+"""
+
+import heapq
+import time
+
+
+class QuestExpiryScheduler:
+    """Min-heap of quest deadlines across all loaded guilds
+    
+    Cancelled or rescheduled entries stay in the heap and are skipped when
+    they surface, so every operation is O(log n) and a tick only touches the
+    quests that are actually due.
+    """
+    
+    def __init__(self):
+        """Initialize an empty scheduler"""
+        self._heap = []  # (expires_at, sequence, guild_id, quest_id)
+        self._deadlines = {}  # (guild_id, quest_id) -> expires_at of the live entry
+        self._sequence = 0  # Keeps heap ordering stable for equal deadlines
+    
+    def __len__(self):
+        return len(self._deadlines)
+    
+    def schedule(self, guild_id, quest):
+        """Schedule a quest's expiry, replacing any earlier schedule
+        
+        Args:
+            guild_id (str): ID of the guild owning the quest
+            quest (dict): Quest data with "id" and "expires_at"
+        """
+        expires_at = quest.get("expires_at")
+        if expires_at is None:
+            return
+        
+        key = (guild_id, quest["id"])
+        if self._deadlines.get(key) == expires_at:
+            return
+        
+        self._deadlines[key] = expires_at
+        self._sequence += 1
+        heapq.heappush(self._heap, (expires_at, self._sequence, guild_id, quest["id"]))
+    
+    def cancel(self, guild_id, quest_id):
+        """Stop tracking a quest (completed, expired or guild unloaded)
+        
+        Args:
+            guild_id (str): ID of the guild owning the quest
+            quest_id (str): ID of the quest
+        """
+        self._deadlines.pop((guild_id, quest_id), None)
+        
+        # Rebuild once cancelled entries dominate the heap
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [entry for entry in self._heap if self._deadlines.get((entry[2], entry[3])) == entry[0]]
+            heapq.heapify(self._heap)
+    
+    def cancel_guild(self, guild_id, quest_ids):
+        """Stop tracking several quests of one guild
+        
+        Args:
+            guild_id (str): ID of the guild
+            quest_ids (iterable): IDs of the quests
+        """
+        for quest_id in quest_ids:
+            self.cancel(guild_id, quest_id)
+    
+    def next_deadline(self):
+        """Get the earliest pending deadline
+        
+        Returns:
+            float: Timestamp of the next expiry, or None if nothing is scheduled
+        """
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+    
+    def pop_due(self, now=None, limit=None):
+        """Remove and return every quest whose deadline has passed
+        
+        Args:
+            now (float, optional): Current time. Defaults to time.time().
+            limit (int, optional): Maximum number of quests to return. Defaults to no limit.
+            
+        Returns:
+            list: (guild_id, quest_id) tuples in deadline order
+        """
+        if now is None:
+            now = time.time()
+        
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            expires_at, _, guild_id, quest_id = heapq.heappop(self._heap)
+            key = (guild_id, quest_id)
+            if self._deadlines.get(key) != expires_at:
+                continue  # Cancelled or rescheduled
+            del self._deadlines[key]
+            due.append(key)
+        return due
+    
+    def _drop_stale(self):
+        while self._heap:
+            expires_at, _, guild_id, quest_id = self._heap[0]
+            if self._deadlines.get((guild_id, quest_id)) == expires_at:
+                return
+            heapq.heappop(self._heap)
+
+
+# For testing
+if __name__ == "__main__":
+    import random
+    
+    scheduler = QuestExpiryScheduler()
+    rng = random.Random(7)
+    guild_count = 5000
+    quests_per_guild = 20
+    
+    for g in range(guild_count):
+        for q in range(quests_per_guild):
+            scheduler.schedule(f"guild{g}", {"id": f"q{q}", "expires_at": rng.uniform(0, 1000)})
+    
+    # Complete a third of the quests before they expire
+    for g in range(0, guild_count, 3):
+        scheduler.cancel_guild(f"guild{g}", [f"q{q}" for q in range(quests_per_guild)])
+    
+    start = time.perf_counter()
+    expired = 0
+    ticks = 0
+    for tick in range(1, 1001):
+        expired += len(scheduler.pop_due(now=tick))
+        ticks += 1
+    elapsed = time.perf_counter() - start
+    
+    print(f"{expired} expirations over {ticks} ticks in {elapsed * 1000:.1f}ms "
+          f"({expired / elapsed:.0f} expirations/sec), {len(scheduler)} left")
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Question server module serving question pools over HTTP with ETag caching
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from guild_index import decode_cursor, encode_cursor
+from questions import QUESTIONS_DB
+
+DIFFICULTIES = ("easy", "medium", "hard")
+POINTS = {"easy": 10, "medium": 20, "hard": 30}  # Score for a correct answer
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+GZIP_MIN_BYTES = 512  # Smaller bodies are sent uncompressed
+MAX_CACHED_RESPONSES = 256  # Least recently used responses are dropped beyond this
+
+
+def grade_difficulty(grade):
+    """Map a grade level to a question difficulty
+    
+    Args:
+        grade (str): Grade level (1-12 or college)
+        
+    Returns:
+        str: "easy" for grades 1-4, "medium" for 5-9, "hard" for 10 and up
+    """
+    try:
+        number = int(grade)
+    except (TypeError, ValueError):
+        return "hard"  # College
+    if number <= 4:
+        return "easy"
+    if number <= 9:
+        return "medium"
+    return "hard"
+
+
+def cursor_offset(cursor):
+    """Decode a question page cursor into its list offset
+    
+    Args:
+        cursor (str): Cursor from a previous page
+        
+    Returns:
+        int: Offset of the page's first question
+        
+    Raises:
+        ValueError: If the cursor is not a valid page cursor
+    """
+    try:
+        key = decode_cursor(cursor)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if len(key) != 1 or type(key[0]) is not int or key[0] < 0:
+        raise ValueError("Invalid cursor")
+    return key[0]
+
+
+class QuestionStore:
+    """Every question flattened once, with each response body cached
+    
+    Questions come from the built-in questions module, overlaid with the
+    ones in the database. A response depends only on its query, so the
+    encoded body, its gzipped form and its ETag are built on first request
+    and reused until reload(). Queries come from clients, so only the
+    max_responses most recently used responses are kept.
+    """
+    
+    def __init__(self, database=None, max_responses=MAX_CACHED_RESPONSES):
+        """Load the questions
+        
+        Args:
+            database (Database, optional): Database with extra questions. Defaults to None.
+            max_responses (int, optional): Most responses cached. Defaults to MAX_CACHED_RESPONSES.
+        """
+        self.database = database
+        self.max_responses = max_responses
+        self._lock = threading.Lock()
+        self._responses = OrderedDict()  # Normalized query -> (etag, body, gzipped body or None)
+        self.questions = []
+        self.reload()
+    
+    def reload(self):
+        """Reload the questions and drop every cached response"""
+        sources = {subject: dict(grades) for subject, grades in QUESTIONS_DB.items()}
+        if self.database is not None:
+            for subject, grades in self.database.get_all_questions().items():
+                sources.setdefault(subject, {}).update(grades)
+        
+        questions = []
+        for subject in sorted(sources):
+            for grade in sorted(sources[subject], key=lambda g: (not g.isdigit(), int(g) if g.isdigit() else 0, g)):
+                difficulty = grade_difficulty(grade)
+                for number, question in enumerate(sources[subject][grade]):
+                    entry = {
+                        "id": f"{subject}-{grade.lower()}-{number}",
+                        "subject": subject,
+                        "grade": grade,
+                        "difficulty": difficulty,
+                        "points": POINTS[difficulty]
+                    }
+                    entry.update(question)
+                    questions.append(entry)
+        
+        with self._lock:
+            self.questions = questions
+            self._responses = OrderedDict()
+    
+    def _filter(self, subject=None, grade=None, difficulty=None):
+        return [
+            question for question in self.questions
+            if (subject is None or question["subject"] == subject)
+            and (grade is None or question["grade"].lower() == grade.lower())
+            and (difficulty is None or question["difficulty"] == difficulty)
+        ]
+    
+    def page(self, subject=None, grade=None, difficulty=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+        """Get one page of questions
+        
+        Args:
+            subject (str, optional): Only this subject. Defaults to every subject.
+            grade (str, optional): Only this grade. Defaults to every grade.
+            difficulty (str, optional): Only this difficulty. Defaults to every difficulty.
+            cursor (str, optional): Cursor from the previous page. Defaults to the first page.
+            page_size (int, optional): Questions per page. Defaults to DEFAULT_PAGE_SIZE.
+            
+        Returns:
+            dict: {"questions": [...], "total": int, "next_cursor": str or None}
+            
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        matches = self._filter(subject, grade, difficulty)
+        start = cursor_offset(cursor) if cursor else 0
+        end = start + page_size
+        return {
+            "questions": matches[start:end],
+            "total": len(matches),
+            "next_cursor": encode_cursor((end,)) if end < len(matches) else None
+        }
+    
+    def pools(self, subject=None, grade=None, difficulties=DIFFICULTIES):
+        """Get whole question pools, one per difficulty
+        
+        Args:
+            subject (str, optional): Only this subject. Defaults to every subject.
+            grade (str, optional): Only this grade. Defaults to every grade.
+            difficulties (tuple, optional): Pools to include. Defaults to all three.
+            
+        Returns:
+            dict: Difficulty -> list of questions
+        """
+        matches = self._filter(subject, grade)
+        return {
+            difficulty: [question for question in matches if question["difficulty"] == difficulty]
+            for difficulty in difficulties
+        }
+    
+    def response(self, route, query):
+        """Get the cached response for a request, building it on first use
+        
+        Args:
+            route (str): "questions" or "pools"
+            query (tuple): Normalized, hashable query parameters
+            
+        Returns:
+            tuple: (etag, body, gzipped body or None)
+        """
+        key = (route, query)
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                return cached
+        
+        params = dict(query)
+        if route == "pools":
+            payload = self.pools(params.get("subject"), params.get("grade"), params["difficulties"])
+        else:
+            payload = self.page(
+                params.get("subject"), params.get("grade"), params.get("difficulty"),
+                params.get("cursor"), params["page_size"]
+            )
+        
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        gzipped = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        cached = (etag, body, gzipped)
+        with self._lock:
+            self._responses[key] = cached
+            while len(self._responses) > self.max_responses:
+                self._responses.popitem(last=False)
+        return cached
+
+
+def _etag_matches(header, etag):
+    """Check an If-None-Match header against an ETag (weak comparison)
+    
+    Args:
+        header (str): If-None-Match header value
+        etag (str): Current ETag of the representation
+        
+    Returns:
+        bool: True if the client's copy is current
+    """
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def _accepts_gzip(header):
+    """Check whether an Accept-Encoding header allows gzip
+    
+    Args:
+        header (str): Accept-Encoding header value
+        
+    Returns:
+        bool: True if gzip is acceptable
+    """
+    for coding in header.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class QuestionRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler for the question API
+    
+    GET /questions?subject=&grade=&difficulty=&cursor=&page_size=
+        One page of questions.
+    GET /questions/pools?subject=&grade=&difficulties=easy,medium,hard
+        Every requested difficulty pool in one response.
+    """
+    
+    store = None  # QuestionStore, set by make_server()
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        
+        try:
+            if url.path == "/questions":
+                route = "questions"
+                query = self._page_query(params)
+            elif url.path == "/questions/pools":
+                route = "pools"
+                query = self._pools_query(params)
+            elif url.path == "/health":
+                self._send_json(200, {"status": "ok", "questions": len(self.store.questions)})
+                return
+            else:
+                self._send_json(404, {"error": f"Unknown path: {url.path}"})
+                return
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        
+        etag, body, gzipped = self.store.response(route, query)
+        use_gzip = gzipped is not None and _accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        if use_gzip:
+            body = gzipped
+            etag = etag[:-1] + '-gzip"'  # Strong ETags differ per content coding
+        
+        if _etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(304)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+        
+        self.send_response(200)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self._send_cache_headers(etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "If-None-Match")
+        self.send_header("Access-Control-Max-Age", "86400")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+    
+    def _page_query(self, params):
+        difficulty = params.get("difficulty")
+        if difficulty is not None and difficulty not in DIFFICULTIES:
+            raise ValueError(f"Unknown difficulty: {difficulty}")
+        
+        try:
+            page_size = int(params.get("page_size", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ValueError("page_size must be a number")
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+        
+        cursor = params.get("cursor")
+        if cursor:
+            cursor_offset(cursor)
+        
+        return (
+            ("cursor", cursor), ("difficulty", difficulty), ("grade", params.get("grade")),
+            ("page_size", page_size), ("subject", params.get("subject"))
+        )
+    
+    def _pools_query(self, params):
+        requested = params.get("difficulties")
+        difficulties = tuple(requested.split(",")) if requested else DIFFICULTIES
+        unknown = [difficulty for difficulty in difficulties if difficulty not in DIFFICULTIES]
+        if unknown:
+            raise ValueError(f"Unknown difficulty: {', '.join(unknown)}")
+        return (("difficulties", difficulties), ("grade", params.get("grade")), ("subject", params.get("subject")))
+    
+    def _send_cache_headers(self, etag):
+        # no-cache: clients keep their copy but revalidate it, which costs a 304
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+    
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet; one line per request is too noisy
+
+
+def make_server(host="127.0.0.1", port=8765, database=None):
+    """Create a question server
+    
+    Args:
+        host (str, optional): Address to bind. Defaults to localhost.
+        port (int, optional): Port to bind, 0 for any free port. Defaults to 8765.
+        database (Database, optional): Database with extra questions. Defaults to None.
+        
+    Returns:
+        ThreadingHTTPServer: Server, not yet started
+    """
+    handler = type("BoundQuestionRequestHandler", (QuestionRequestHandler,), {"store": QuestionStore(database)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# For testing
+if __name__ == "__main__":
+    import argparse
+    import time
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+    
+    parser = argparse.ArgumentParser(description="Question API server")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    serve_parser = commands.add_parser("serve", help="serve the question API until interrupted")
+    serve_parser.add_argument("port", nargs="?", type=int, default=8765, help="port to listen on (default: 8765)")
+    serve_parser.add_argument("--host", default="0.0.0.0", help="address to bind (default: 0.0.0.0)")
+    commands.add_parser("selftest", help="run the self-test against a local server (the default)")
+    args = parser.parse_args()
+    
+    if args.command == "serve":
+        server = make_server(args.host, args.port)
+        print(f"Serving {len(server.RequestHandlerClass.store.questions)} questions on port {args.port}")
+        server.serve_forever()
+    
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    def fetch(path, headers=None):
+        try:
+            with urlopen(Request(base + path, headers=headers or {})) as response:
+                return response.status, dict(response.headers), response.read()
+        except HTTPError as e:
+            return e.code, dict(e.headers), e.read()
+    
+    status, headers, body = fetch("/questions/pools", {"Accept-Encoding": "gzip"})
+    pools = json.loads(gzip.decompress(body))
+    print(f"First load: {status}, {len(body)} bytes gzipped, "
+          f"{', '.join(f'{d}={len(pools[d])}' for d in DIFFICULTIES)}")
+    
+    status, _, body = fetch("/questions/pools", {"Accept-Encoding": "gzip", "If-None-Match": headers["ETag"]})
+    print(f"Repeat load: {status}, {len(body)} bytes")
+    
+    for cursor in (encode_cursor((-5,)), encode_cursor(("x",)), encode_cursor((1, 2)), "not-a-cursor"):
+        status, _, _ = fetch(f"/questions?cursor={cursor}")
+        assert status == 400, (cursor, status)
+    for number in range(MAX_CACHED_RESPONSES + 50):
+        fetch(f"/questions?subject=unknown{number}")
+    cached = len(server.RequestHandlerClass.store._responses)
+    print(f"Bad cursors rejected with 400; {cached} responses cached after {MAX_CACHED_RESPONSES + 50} distinct queries")
+    assert cached <= MAX_CACHED_RESPONSES
+    
+    requests = 2000
+    start = time.perf_counter()
+    for _ in range(requests):
+        fetch("/questions/pools", {"Accept-Encoding": "gzip", "If-None-Match": headers["ETag"]})
+    elapsed = time.perf_counter() - start
+    print(f"{requests} revalidations in {elapsed:.2f}s ({requests / elapsed:.0f}/sec)")
+    server.shutdown()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Render cache module for memoized Rich renderables and row-level redraws
+"""
+
+from collections import OrderedDict
+
+from rich import box
+from rich.panel import Panel
+from rich.segment import Segments
+from rich.table import Table
+
+
+def _lines_to_renderable(lines):
+    """Wrap pre-rendered lines so the console can print them as-is
+    
+    Args:
+        lines (list): Lines of segments, each ending with a newline segment
+        
+    Returns:
+        Segments: Renderable that just replays the segments
+    """
+    return Segments([segment for line in lines for segment in line])
+
+
+class RenderCache:
+    """Renderables pre-rendered once into segments and replayed
+    
+    Rendering a Panel or Table means measuring, wrapping and styling every
+    cell; replaying cached segments skips all of it. Entries are keyed by
+    the console width, so a resized terminal renders afresh, and the least
+    recently used entries are dropped beyond max_entries.
+    """
+    
+    def __init__(self, console, enabled=True, max_entries=256):
+        """Initialize the cache
+        
+        Args:
+            console (Console): Console the renderables are printed on
+            enabled (bool, optional): Whether to cache at all. Defaults to True.
+            max_entries (int, optional): Most renderables kept. Defaults to 256.
+        """
+        self.console = console
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lines = OrderedDict()  # (key, console width) -> rendered lines
+        self._tables = {}  # Key -> RowTable
+    
+    def static(self, key, build):
+        """Get a renderable that never changes for a key
+        
+        Args:
+            key (hashable): Cache key; include everything the renderable depends on
+            build (callable): Builds the renderable on a cache miss
+            
+        Returns:
+            Renderable: Cached segments, or the built renderable when disabled
+        """
+        if not self.enabled:
+            return build()
+        
+        cache_key = (key, self.console.width)
+        lines = self._lines.get(cache_key)
+        if lines is None:
+            self.misses += 1
+            lines = self._lines[cache_key] = self.console.render_lines(build(), self.console.options, pad=False, new_lines=True)
+            if len(self._lines) > self.max_entries:
+                self._lines.popitem(last=False)
+        else:
+            self.hits += 1
+            self._lines.move_to_end(cache_key)
+        return _lines_to_renderable(lines)
+    
+    def table(self, key, columns, panel=None, table_box=box.SIMPLE):
+        """Get the row table registered under a key, creating it on first use
+        
+        Args:
+            key (hashable): Table key
+            columns (list): (header, style, width) for each column
+            panel (dict, optional): Panel keyword arguments, or None for a bare table. Defaults to None.
+            table_box (Box, optional): Table box style. Defaults to box.SIMPLE.
+            
+        Returns:
+            RowTable: The table
+        """
+        row_table = self._tables.get(key)
+        if row_table is None:
+            row_table = self._tables[key] = RowTable(self, columns, panel, table_box)
+        return row_table
+    
+    def clear(self):
+        """Drop every cached entry"""
+        self._lines.clear()
+        self._tables.clear()
+
+
+class RowTable:
+    """A table, optionally in a panel, that only re-renders changed rows
+    
+    Columns have fixed widths and never wrap, so every row is exactly one
+    line and a changed row can be rendered on its own and spliced into the
+    previous frame. Rendered rows are also kept by value, so rows that come
+    back (HP bars, for one) are not rendered again.
+    """
+    
+    MAX_CACHED_ROWS = 512
+    
+    def __init__(self, cache, columns, panel=None, table_box=box.SIMPLE):
+        """Initialize a row table
+        
+        Args:
+            cache (RenderCache): Cache holding the console and the enabled flag
+            columns (list): (header, style, width) for each column
+            panel (dict, optional): Panel keyword arguments, or None for a bare table. Defaults to None.
+            table_box (Box, optional): Table box style. Defaults to box.SIMPLE.
+        """
+        self.cache = cache
+        self.columns = columns
+        self.panel = panel
+        self.table_box = table_box
+        self.rows_rendered = 0  # Rows rendered since creation, for benchmarks
+        self._rows = None
+        self._lines = None
+        self._width = None
+        self._row_lines = {}  # Row tuple -> rendered line
+        # Lines above the first row: panel top, table top edge, header and its separator
+        self._row_offset = (1 if panel else 0) + (1 if table_box else 0) + 2
+    
+    def _build(self, rows, show_header=True):
+        table = Table(box=self.table_box, show_header=show_header)
+        for header, style, width in self.columns:
+            table.add_column(header, style=style, width=width, no_wrap=True, overflow="ellipsis")
+        for row in rows:
+            table.add_row(*row)
+        if self.panel is None:
+            return table
+        return Panel(table, **self.panel)
+    
+    def render(self, rows):
+        """Get a renderable for the table with these rows
+        
+        Args:
+            rows (list): Row tuples of cell strings (Rich markup allowed)
+            
+        Returns:
+            Renderable: Table renderable
+        """
+        rows = [tuple(row) for row in rows]
+        if not self.cache.enabled:
+            self.rows_rendered += len(rows)
+            return self._build(rows)
+        
+        console = self.cache.console
+        if self._lines is None or self._width != console.width or len(rows) != len(self._rows):
+            self._lines = console.render_lines(self._build(rows), console.options, pad=False, new_lines=True)
+            self._rows = rows
+            if self._width != console.width:
+                self._row_lines.clear()
+                self._width = console.width
+            self.rows_rendered += len(rows)
+            if len(self._lines) != self._row_offset + len(rows) + 1 + (1 if self.panel else 0):
+                self._lines = None  # Unexpected layout; render whole frames from now on
+                return self._build(rows)
+            return _lines_to_renderable(self._lines)
+        
+        changed = [i for i, row in enumerate(rows) if row != self._rows[i]]
+        if changed:
+            lines = list(self._lines)
+            for i in changed:
+                lines[self._row_offset + i] = self._render_row(rows[i])
+            self._lines = lines
+            self._rows = rows
+        return _lines_to_renderable(self._lines)
+    
+    def _render_row(self, row):
+        line = self._row_lines.get(row)
+        if line is None:
+            if len(self._row_lines) >= self.MAX_CACHED_ROWS:
+                self._row_lines.clear()
+            # One headerless row has the same frame lines, minus the header and its separator
+            console = self.cache.console
+            single = console.render_lines(self._build([row], show_header=False), console.options, pad=False, new_lines=True)
+            line = self._row_lines[row] = single[self._row_offset - 2]
+            self.rows_rendered += 1
+        return line
+
+
+# For testing
+if __name__ == "__main__":
+    import io
+    import time
+    from rich.console import Console
+    
+    from combat import Enemy
+    from player import Player
+    from ui import UI
+    
+    def make_ui(cached):
+        ui = UI()
+        ui.console = Console(file=io.StringIO(), width=100, force_terminal=True, color_system="truecolor")
+        ui.render_cache = RenderCache(ui.console, enabled=cached)
+        return ui
+    
+    player = Player("Bench", "10")
+    player.inventory.add("Math Textbook")  # Not add_to_inventory, which prints a message
+    player.inventory.add("Microscope", 2)
+    enemy = Enemy("Fraction Phantom", "  (o_o)\n  /| |\\\n  / \\", "math", 60, [])
+    guilds = [{"name": f"Guild {i}", "member_count": i % 20, "level": 1 + i % 7} for i in range(10)]
+    
+    def draw_stats(ui, frame):
+        player.xp = frame % 100  # One row changes per frame
+        ui.display_player_stats(player)
+    
+    screens = {
+        "title": lambda ui, frame: ui.display_title(),
+        "menu": lambda ui, frame: ui.console.print(ui._menu_frame("Main Menu", ["New Game", "Load Game", "Options", "Exit"])),
+        "player stats": draw_stats,
+        "inventory": lambda ui, frame: ui.display_inventory(player),
+        "combat status": lambda ui, frame: ui.display_combat_status(100 - frame % 50, 60 - frame % 60, enemy.name),
+        "guild list": lambda ui, frame: ui.console.print(ui._guild_table(guilds)),
+    }
+    
+    frames = 2000
+    print(f"{'Screen':<14} {'uncached fps':>13} {'cached fps':>11} {'speedup':>8}")
+    for name, draw in screens.items():
+        rates = []
+        outputs = []
+        for cached in (False, True):
+            ui = make_ui(cached)
+            start = time.perf_counter()
+            for frame in range(frames):
+                draw(ui, frame)
+            rates.append(frames / (time.perf_counter() - start))
+            
+            # The cached and uncached frames must look identical
+            ui.console.file = io.StringIO()
+            draw(ui, frames)
+            outputs.append(ui.console.file.getvalue())
+        same = "" if outputs[0] == outputs[1] else "  OUTPUT DIFFERS"
+        print(f"{name:<14} {rates[0]:>13.0f} {rates[1]:>11.0f} {rates[1] / rates[0]:>7.1f}x{same}")
@@ -0,0 +1,651 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Resilience module with deadlines, retries, a circuit breaker and a write queue for Firestore
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+from metrics import get_registry
+
+console = Console()
+
+# Errors worth retrying, by class name so google.api_core need not be importable
+TRANSIENT_ERRORS = {
+    "ServiceUnavailable", "DeadlineExceeded", "InternalServerError", "Aborted",
+    "ResourceExhausted", "TooManyRequests", "GatewayTimeout", "RetryError",
+}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_registry = get_registry()
+_retries = _registry.counter("edurpg_firestore_retries_total", "Firestore calls retried after a transient error")
+_breaker_opens = _registry.counter("edurpg_firestore_circuit_opens_total", "Times the Firestore circuit breaker opened")
+_queued_writes = _registry.counter("edurpg_firestore_queued_writes_total", "Firestore writes queued during outages")
+_replayed_writes = _registry.counter("edurpg_firestore_replayed_writes_total",
+                                     "Queued Firestore writes replayed, by outcome", ("outcome",))
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a Firestore call does not finish within its deadline"""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Firestore while the circuit breaker is open"""
+
+
+def is_transient(error):
+    """Check whether an error may go away if the call is retried
+    
+    Args:
+        error (Exception): Error raised by a call
+        
+    Returns:
+        bool: True for timeouts, connection problems and retryable Firestore errors
+    """
+    if isinstance(error, (DeadlineExceeded, ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+    
+    def __init__(self, attempts=4, base_delay=0.1, max_delay=2.0, rng=None):
+        """Initialize the policy
+        
+        Args:
+            attempts (int, optional): Calls made before giving up, first one included. Defaults to 4.
+            base_delay (float, optional): Largest wait before the first retry. Defaults to 0.1.
+            max_delay (float, optional): Cap on any wait. Defaults to 2.0.
+            rng (random.Random, optional): Source of jitter. Defaults to a new one.
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+    
+    def delay(self, retry):
+        """Get how long to wait before a retry
+        
+        Args:
+            retry (int): Retry number, starting at 0
+            
+        Returns:
+            float: Seconds, drawn uniformly up to the exponential backoff
+        """
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+
+class CircuitBreaker:
+    """Stops calling a failing service until it has had time to recover
+    
+    After failure_threshold consecutive failures the breaker opens and
+    calls fail fast. Once reset_timeout has passed it lets one probe call
+    through (half-open): success closes it, failure opens it again.
+    """
+    
+    def __init__(self, failure_threshold=3, reset_timeout=15.0, clock=time.monotonic):
+        """Initialize the breaker
+        
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the breaker. Defaults to 3.
+            reset_timeout (float, optional): Seconds open before probing. Defaults to 15.0.
+            clock (callable, optional): Monotonic clock. Defaults to time.monotonic.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Check whether a call may go ahead, claiming the probe when half-open
+        
+        Returns:
+            bool: True if the call may be made
+        """
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+    
+    @property
+    def available(self):
+        """Whether calls would currently be let through, without claiming the probe"""
+        return self.state == CLOSED or (self.state == OPEN and self.clock() - self._opened_at >= self.reset_timeout)
+    
+    def record_success(self):
+        """Note a successful call"""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+    
+    def record_failure(self):
+        """Note a failed call, opening the breaker if there were too many"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    _breaker_opens.inc()
+                self.state = OPEN
+                self._opened_at = self.clock()
+
+
+class WriteQueue:
+    """Durable FIFO of Firestore writes made while Firestore was unreachable
+    
+    Entries are appended to a JSON-lines file as they are queued, so an
+    outage outlasting the program loses nothing; the file is rewritten as
+    entries are replayed.
+    """
+    
+    def __init__(self, path):
+        """Initialize the queue, loading entries left by a previous run
+        
+        Args:
+            path (Path): Queue file
+        """
+        self.path = Path(path)
+        self.entries = []
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def append(self, entry):
+        """Queue a write
+        
+        Args:
+            entry (dict): {"path", "op", "data", "merge", "expected_version"}
+        """
+        with self._lock:
+            self.entries.append(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def pending(self, path):
+        """Get the queued writes to one document, oldest first
+        
+        Args:
+            path (str): Document path
+            
+        Returns:
+            list: Queue entries
+        """
+        return [entry for entry in self.entries if entry["path"] == path]
+    
+    def pop(self, count):
+        """Drop replayed entries from the front of the queue
+        
+        Args:
+            count (int): Number of entries replayed
+        """
+        with self._lock:
+            del self.entries[:count]
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                for entry in self.entries:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.path)
+
+
+class _QueuedSnapshot:
+    """Document snapshot built from queued writes while Firestore is unreachable"""
+    
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+    
+    @property
+    def exists(self):
+        return self._data is not None
+    
+    def get(self, field):
+        return (self._data or {}).get(field)
+    
+    def to_dict(self):
+        return json.loads(json.dumps(self._data)) if self._data is not None else None
+
+
+class _QueryProxy:
+    """Collection or query whose reads go through the resilience layer"""
+    
+    def __init__(self, resilient, query):
+        self._resilient = resilient
+        self.raw = query
+    
+    def __getattr__(self, name):
+        # Query builders (where, order_by, select, limit, start_after) return wrapped queries
+        method = getattr(self.raw, name)
+        return lambda *args, **kwargs: _QueryProxy(self._resilient, method(*args, **kwargs))
+    
+    def document(self, doc_id):
+        return _DocumentProxy(self._resilient, self.raw.document(doc_id))
+    
+    def stream(self):
+        # Read everything inside the deadline; a lazy stream could stall later
+        return iter(self._resilient.call(lambda: list(self.raw.stream(**self._resilient.call_options))))
+
+
+class _DocumentProxy:
+    """Document whose reads and writes go through the resilience layer"""
+    
+    def __init__(self, resilient, reference):
+        self._resilient = resilient
+        self.raw = reference
+        self.id = reference.id
+        self.path = reference.path
+    
+    def collection(self, name):
+        return _QueryProxy(self._resilient, self.raw.collection(name))
+    
+    def get(self):
+        return self._resilient.read_document(self)
+    
+    def set(self, data, merge=False):
+        self._resilient.write(self, "set", data, merge=merge)
+    
+    def delete(self):
+        self._resilient.write(self, "delete")
+
+
+class ResilientFirestore:
+    """Firestore client wrapper adding deadlines, retries, a breaker and a write queue
+    
+    Every client call is made with the deadline as its timeout, and
+    transient failures are retried with backoff. Client calls made through
+    call() should pass call_options so they get the deadline too; a call
+    that is never abandoned cannot land behind its own retry. Consecutive
+    failures open the circuit breaker; while it is
+    open, reads fail fast and writes go to a local queue, from which
+    queued documents are also served. The queue is replayed in order
+    once Firestore answers again.
+    """
+    
+    def __init__(self, client, module, queue_path, deadline=5.0, retry=None, breaker=None):
+        """Initialize the wrapper
+        
+        Args:
+            client: Firestore client
+            module: Module providing Increment, DELETE_FIELD and transactional
+            queue_path (Path): File of the local write queue
+            deadline (float, optional): Seconds each call may take. Defaults to 5.0.
+            retry (RetryPolicy, optional): Retry policy. Defaults to RetryPolicy().
+            breaker (CircuitBreaker, optional): Circuit breaker. Defaults to CircuitBreaker().
+        """
+        self.client = client
+        self.module = module
+        self.deadline = deadline
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.queue = WriteQueue(queue_path)
+        self.conflicts = []  # Queued versioned writes dropped on replay because the document had moved on
+        self.sleep = time.sleep
+        self._replay_lock = threading.Lock()
+    
+    @property
+    def available(self):
+        """Whether Firestore is believed reachable"""
+        return self.breaker.available
+    
+    def collection(self, name):
+        return _QueryProxy(self, self.client.collection(name))
+    
+    def transaction(self):
+        return self.client.transaction()
+    
+    @property
+    def call_options(self):
+        """Keyword arguments giving a client call the deadline; retrying is left to the retry policy"""
+        return {"timeout": self.deadline, "retry": None}
+    
+    def _call_once(self, func):
+        try:
+            return func()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # Clients report their own timeouts differently; treat them all alike
+            if isinstance(e, TimeoutError) or type(e).__name__ == "DeadlineExceeded":
+                raise DeadlineExceeded(f"Firestore call took longer than {self.deadline}s") from e
+            raise
+    
+    def call(self, func, idempotent=True):
+        """Call Firestore with a deadline, retries and the circuit breaker
+        
+        Args:
+            func (callable): Makes the call, passing call_options to each client method
+            idempotent (bool, optional): Whether repeating the call is harmless. A
+                timed-out call may still have been applied, so non-idempotent
+                calls are not retried after a timeout. Defaults to True.
+                
+        Returns:
+            The value returned by func
+            
+        Raises:
+            CircuitOpenError: If the breaker is open
+            Exception: The last error once retries are exhausted, or any non-transient error
+        """
+        self._replay_queue()
+        return self._attempt(func, idempotent)
+    
+    def _attempt(self, func, idempotent=True):
+        for attempt in range(self.retry.attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError("Firestore is unavailable; circuit breaker is open")
+            try:
+                result = self._call_once(func)
+            except Exception as e:
+                if not is_transient(e):
+                    self.breaker.record_success()  # Firestore answered, just not the way we hoped
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.retry.attempts - 1 or (not idempotent and isinstance(e, DeadlineExceeded)):
+                    raise
+                _retries.inc()
+                self.sleep(self.retry.delay(attempt))
+                continue
+            self.breaker.record_success()
+            return result
+    
+    def read_document(self, document):
+        """Read a document, layering queued writes over it
+        
+        Args:
+            document (_DocumentProxy): Document to read
+            
+        Returns:
+            Document snapshot
+        """
+        self._replay_queue()
+        pending = self.queue.pending(document.path)
+        if not pending:
+            return self._attempt(lambda: document.raw.get(**self.call_options))
+        
+        # Queued writes are newer than anything stored; a full set or delete hides the stored data
+        base = None
+        if pending[0]["op"] == "set" and pending[0]["merge"]:
+            try:
+                base = self._attempt(lambda: document.raw.get(**self.call_options)).to_dict()
+            except (CircuitOpenError, DeadlineExceeded):
+                pass
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+        return _QueuedSnapshot(document.id, _apply_queued(base, pending))
+    
+    def write(self, document, op, data=None, merge=False, expected_version=None):
+        """Write a document, or queue the write when Firestore is unreachable
+        
+        Args:
+            document (_DocumentProxy): Document to write
+            op (str): "set" or "delete"
+            data (dict, optional): Data to set. Defaults to None.
+            merge (bool, optional): Merge into the stored document. Defaults to False.
+            expected_version (int, optional): Version the stored document must have
+                when the queued write is replayed. Defaults to None.
+        """
+        idempotent = not any(isinstance(value, self.module.Increment) for value in (data or {}).values())
+        if self._replay_queue():
+            try:
+                if op == "delete":
+                    return self._attempt(lambda: document.raw.delete(**self.call_options))
+                return self._attempt(lambda: document.raw.set(data, merge=merge, **self.call_options), idempotent)
+            except Exception as e:
+                # Writes that may have landed are not queued, so they cannot be applied twice
+                if not is_transient(e) and not isinstance(e, CircuitOpenError):
+                    raise
+                if not idempotent and isinstance(e, DeadlineExceeded):
+                    raise
+        
+        # Queue behind any earlier queued writes so they replay in order
+        self.queue.append({
+            "path": document.path,
+            "op": op,
+            "data": self._encode(data),
+            "merge": merge,
+            "expected_version": expected_version,
+            "queued_at": time.time()
+        })
+        _queued_writes.inc()
+    
+    def _encode(self, data):
+        if data is None:
+            return None
+        encoded = {}
+        for field, value in data.items():
+            if value is self.module.DELETE_FIELD:
+                value = {"$delete_field": True}
+            elif isinstance(value, self.module.Increment):
+                value = {"$increment": value.value}
+            encoded[field] = value
+        return encoded
+    
+    def _decode(self, data):
+        if data is None:
+            return None
+        decoded = {}
+        for field, value in data.items():
+            if isinstance(value, dict) and "$delete_field" in value:
+                value = self.module.DELETE_FIELD
+            elif isinstance(value, dict) and "$increment" in value:
+                value = self.module.Increment(value["$increment"])
+            decoded[field] = value
+        return decoded
+    
+    def _replay_queue(self):
+        """Replay queued writes in order, stopping at the first failure
+        
+        Returns:
+            bool: True if the queue is empty
+        """
+        if not self.queue.entries or not self.breaker.available:
+            return not self.queue.entries
+        if not self._replay_lock.acquire(blocking=False):
+            return False  # Another thread is replaying
+        
+        try:
+            replayed = 0
+            for entry in list(self.queue.entries):
+                try:
+                    outcome = self._replay_entry(entry)
+                except Exception as e:
+                    console.print(f"[yellow]Replaying queued Firestore writes paused: {e}[/yellow]")
+                    break
+                _replayed_writes.inc(outcome)
+                replayed += 1
+            if replayed:
+                self.queue.pop(replayed)
+            return not self.queue.entries
+        finally:
+            self._replay_lock.release()
+    
+    def _replay_entry(self, entry):
+        reference = self.client.document(entry["path"])
+        if entry["op"] == "delete":
+            self._attempt(lambda: reference.delete(**self.call_options))
+            return "applied"
+        
+        data = self._decode(entry["data"])
+        if entry["expected_version"] is None:
+            self._attempt(lambda: reference.set(data, merge=entry["merge"], **self.call_options))
+            return "applied"
+        
+        @self.module.transactional
+        def write_if_current(transaction):
+            stored = reference.get(transaction=transaction, **self.call_options).to_dict()
+            if (stored or {}).get("version", 0) != entry["expected_version"]:
+                # A replay that timed out after committing finds its own write in place
+                return not entry["merge"] and stored == data
+            transaction.set(reference, data, merge=entry["merge"])
+            return True
+        
+        # A timeout pauses the replay; the next one checks whether the commit landed
+        if self._attempt(lambda: write_if_current(self.client.transaction()), idempotent=False):
+            return "applied"
+        self.conflicts.append(entry)
+        console.print(f"[yellow]Queued write to {entry['path']} dropped: it was changed elsewhere during the outage[/yellow]")
+        return "conflict"
+    
+    def flush(self):
+        """Replay the write queue now
+        
+        Returns:
+            bool: True if every queued write was replayed
+        """
+        return self._replay_queue()
+
+
+def _apply_queued(base, entries):
+    """Apply queued writes to a document
+    
+    Args:
+        base (dict): Stored data, or None
+        entries (list): Queue entries for the document, oldest first
+        
+    Returns:
+        dict: Document data, or None if deleted
+    """
+    data = json.loads(json.dumps(base)) if base is not None else None
+    for entry in entries:
+        if entry["op"] == "delete":
+            data = None
+            continue
+        data = dict(data or {}) if entry["merge"] else {}
+        for field, value in entry["data"].items():
+            if isinstance(value, dict) and "$delete_field" in value:
+                data.pop(field, None)
+            elif isinstance(value, dict) and "$increment" in value:
+                data[field] = data.get(field, 0) + value["$increment"]
+            else:
+                data[field] = json.loads(json.dumps(value))
+    return data
+
+
+# For testing
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import tempfile
+    
+    from database import Database
+    from fake_firestore import FakeFirestore
+    from guild import Guild, GuildSystem
+    from player import Player
+    
+    results = []
+    
+    def check(name, ok):
+        results.append(ok)
+        print(f"{'PASS' if ok else 'FAIL'}  {name}")
+    
+    with tempfile.TemporaryDirectory() as data_dir:
+        fake = FakeFirestore()
+        client = fake.fake_client
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = Database(data_dir=data_dir, firestore_module=fake)
+        firestore_db = db.db
+        firestore_db.deadline = 0.2
+        firestore_db.retry = RetryPolicy(attempts=3, base_delay=0.01)
+        firestore_db.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.5)
+        
+        check("healthy write", db.save_player({"name": "ada", "level": 1}) and client.dump()["players/ada"]["level"] == 1)
+        
+        client.fail_next(2)
+        check("two transient failures are retried", db.save_player({"name": "ada", "level": 2})
+              and client.dump()["players/ada"]["level"] == 2)
+        
+        guild = {**Guild("Owls", "Night readers", "ada").to_dict(), "id": "g1", "version": 1}
+        db.save_guild(guild)
+        
+        client.latency = 0.5
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            slow = db.get_player("ada")
+        elapsed = time.perf_counter() - start
+        check(f"slow calls hit the deadline ({elapsed:.2f}s for 3 attempts)", slow is None and elapsed < 1.0)
+        check("repeated failures open the breaker", firestore_db.breaker.state == OPEN)
+        client.latency = 0.0
+        
+        client.outage = True
+        check("writes are queued during the outage", db.save_player({"name": "ada", "level": 3}) and len(firestore_db.queue) == 1)
+        check("queued writes are read back", db.get_player("ada")["level"] == 3)
+        db.increment_quest_progress("g1", "q1", 5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            saved = db.save_guild({**guild, "members": {"ada": "Leader", "bo": "Member"}, "version": 2}, expected_version=1)
+        check("versioned guild saves fail instead of queueing", not saved and len(firestore_db.queue) == 2)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            listed = db.list_players()
+        check("reads fail fast while the breaker is open", listed == [] and time.perf_counter() - start < 0.05)
+        
+        client.outage = False
+        time.sleep(0.6)
+        db.get_player("ada")  # The probe succeeds and the queue is replayed first
+        stored = client.dump()
+        check("queue replayed in order on recovery", len(firestore_db.queue) == 0
+              and stored["players/ada"]["level"] == 3
+              and stored["guilds/g1/counters/quests"]["q1"] == 5
+              and stored["guilds/g1"]["version"] == 1)
+        
+        # Each call fits the deadline but a whole transaction does not; none is abandoned and retried
+        player = Player("ada", "7")
+        player.guild_id = "g1"
+        guild_system = GuildSystem(player, db)
+        client.latency = 0.12
+        with contextlib.redirect_stdout(io.StringIO()):
+            guild_system.send_chat_message("hello")
+        client.latency = 0.0
+        chat = [message["message"] for message in client.dump()["guilds/g1"]["chat_history"]]
+        check("slow chat transaction stores the message once", chat == ["hello"])
+        
+        client.lose_commit_replies(1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sent = guild_system.send_chat_message("again")
+        chat = [message["message"] for message in client.dump()["guilds/g1"]["chat_history"]]
+        check("timed-out commit that landed is confirmed, not repeated", sent and chat == ["hello", "again"])
+        
+        # A versioned write queued while another device changed the guild is dropped, not applied
+        stored = client.dump()
+        version = stored["guilds/g1"]["version"]
+        firestore_db.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+        client.outage = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.get_player("ada")
+        firestore_db.write(firestore_db.collection("guilds").document("g1"), "set",
+                           {**stored["guilds/g1"], "name": "Stale Owls", "version": version + 1}, expected_version=version)
+        client.outage = False
+        client.document("guilds/g1").set({**stored["guilds/g1"], "name": "Night Owls", "version": version + 1})
+        time.sleep(0.15)
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.get_player("ada")
+        check("conflicting queued write is dropped", client.dump()["guilds/g1"]["name"] == "Night Owls"
+              and len(firestore_db.conflicts) == 1)
+    
+    print(f"{sum(results)}/{len(results)} checks passed")
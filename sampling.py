@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Sampling module for weighted random choices in constant time
+"""
+
+import random
+
+
+class AliasSampler:
+    """Weighted random choice using Vose's alias method
+    
+    Building the tables is O(n); every draw afterwards is O(1) no matter
+    how many outcomes there are: one uniform pick of a column and one coin
+    flip between the column's own outcome and its alias.
+    """
+    
+    def __init__(self, weighted_outcomes):
+        """Build the alias tables
+        
+        Args:
+            weighted_outcomes (iterable): (outcome, weight) pairs with non-negative weights
+        """
+        pairs = [(outcome, weight) for outcome, weight in weighted_outcomes if weight > 0]
+        if not pairs:
+            raise ValueError("AliasSampler needs at least one outcome with positive weight")
+        
+        self.outcomes = [outcome for outcome, _ in pairs]
+        count = len(pairs)
+        total = float(sum(weight for _, weight in pairs))
+        scaled = [weight * count / total for _, weight in pairs]
+        
+        self._probability = [1.0] * count
+        self._alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Leftovers are 1.0 up to rounding error and keep their defaults
+    
+    def __len__(self):
+        return len(self.outcomes)
+    
+    def sample(self, rng=random):
+        """Draw one outcome
+        
+        Args:
+            rng (random.Random, optional): Random number generator. Defaults to the random module.
+            
+        Returns:
+            A randomly chosen outcome
+        """
+        column = int(rng.random() * len(self.outcomes))
+        if rng.random() < self._probability[column]:
+            return self.outcomes[column]
+        return self.outcomes[self._alias[column]]
+
+
+# For testing
+if __name__ == "__main__":
+    import time
+    from collections import Counter
+    
+    weights = {"common": 70, "uncommon": 20, "rare": 9, "legendary": 1}
+    sampler = AliasSampler(weights.items())
+    rng = random.Random(11)
+    
+    draws = 1000000
+    start = time.perf_counter()
+    counts = Counter(sampler.sample(rng) for _ in range(draws))
+    elapsed = time.perf_counter() - start
+    
+    print(f"{draws} draws in {elapsed:.2f}s ({draws / elapsed:.0f}/sec)")
+    for outcome, weight in weights.items():
+        print(f"  {outcome:<10} expected {weight / 100:.3f}  observed {counts[outcome] / draws:.3f}")
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Session module for recording play sessions and replaying them deterministically
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from rich.prompt import Confirm, Prompt
+
+SESSION_FORMAT = 1
+
+
+class SessionEnded(Exception):
+    """Raised when a replayed session runs out of recorded input"""
+
+
+class Session:
+    """Source of input, randomness and time for one play session
+    
+    Game, CombatSystem and GuildSystem draw every random number from rng,
+    read the time from clock() and ask the player through ask()/confirm(),
+    so a session can be recorded and replayed.
+    """
+    
+    def __init__(self, seed=None):
+        """Initialize a live session
+        
+        Args:
+            seed (int, optional): Seed of the session's random numbers. Defaults to a random seed.
+        """
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+    
+    def clock(self):
+        """Get the current time
+        
+        Returns:
+            float: Seconds since the epoch
+        """
+        return time.time()
+    
+    def new_id(self):
+        """Generate a short unique ID from the session's random numbers
+        
+        Returns:
+            str: 8 hexadecimal characters
+        """
+        return f"{self.rng.getrandbits(32):08x}"
+    
+    def ask(self, prompt, choices=None, default=None, console=None):
+        """Ask the player for text
+        
+        Args:
+            prompt (str): Prompt text
+            choices (list, optional): Allowed answers. Defaults to any answer.
+            default (str, optional): Default answer. Defaults to None.
+            console (Console, optional): Console to prompt on. Defaults to Rich's console.
+            
+        Returns:
+            str: Player's answer
+        """
+        return Prompt.ask(prompt, choices=choices, default=default, console=console)
+    
+    def confirm(self, prompt, console=None):
+        """Ask the player a yes/no question
+        
+        Args:
+            prompt (str): Prompt text
+            console (Console, optional): Console to prompt on. Defaults to Rich's console.
+            
+        Returns:
+            bool: Player's answer
+        """
+        return Confirm.ask(prompt, console=console)
+
+
+class RecordingSession(Session):
+    """A session that logs every input and clock reading for later replay"""
+    
+    def __init__(self, source=None):
+        """Initialize a recording
+        
+        Args:
+            source (Session, optional): Session supplying the real input and time. Defaults to a live session.
+        """
+        self.source = source or Session()
+        super().__init__(self.source.seed)
+        self.inputs = []  # [kind, prompt, answer]
+        self.clock_readings = []
+        self.started_at = time.time()
+    
+    def clock(self):
+        reading = self.source.clock()
+        self.clock_readings.append(reading)
+        return reading
+    
+    def ask(self, prompt, choices=None, default=None, console=None):
+        answer = self.source.ask(prompt, choices, default, console)
+        self.inputs.append(["ask", prompt, answer])
+        return answer
+    
+    def confirm(self, prompt, console=None):
+        answer = self.source.confirm(prompt, console)
+        self.inputs.append(["confirm", prompt, answer])
+        return answer
+    
+    def to_dict(self):
+        """Convert the recording to a dictionary for saving
+        
+        Returns:
+            dict: Session data
+        """
+        return {
+            "format": SESSION_FORMAT,
+            "seed": self.seed,
+            "recorded_at": self.started_at,
+            "inputs": self.inputs,
+            "clock": self.clock_readings
+        }
+    
+    def save(self, path):
+        """Write the recording to a file
+        
+        Args:
+            path (str): Session file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+class ReplaySession(Session):
+    """A session that plays back a recording at full speed
+    
+    Inputs and clock readings are consumed in recorded order. A prompt
+    that differs from the recording (the game changed since) is noted in
+    mismatches but still answered; running out of input ends the session.
+    """
+    
+    def __init__(self, data):
+        """Initialize a replay
+        
+        Args:
+            data (dict): Session data from RecordingSession.to_dict()
+        """
+        if data.get("format") != SESSION_FORMAT:
+            raise ValueError(f"Unsupported session format: {data.get('format')}")
+        
+        super().__init__(data["seed"])
+        self._inputs = iter(data["inputs"])
+        self._clock = iter(data["clock"])
+        self._last_reading = data["clock"][-1] if data["clock"] else data.get("recorded_at", 0.0)
+        self.mismatches = []
+    
+    @classmethod
+    def load(cls, path):
+        """Load a session file
+        
+        Args:
+            path (str): Session file
+            
+        Returns:
+            ReplaySession: The replay
+        """
+        with open(path, "r") as f:
+            return cls(json.load(f))
+    
+    def clock(self):
+        # Extra readings by newer code repeat the last recorded time
+        return next(self._clock, self._last_reading)
+    
+    def _next_input(self, kind, prompt):
+        recorded = next(self._inputs, None)
+        if recorded is None:
+            raise SessionEnded("Recorded input exhausted")
+        if recorded[0] != kind or recorded[1] != prompt:
+            self.mismatches.append({"expected": recorded[:2], "actual": [kind, prompt]})
+        return recorded[2]
+    
+    def ask(self, prompt, choices=None, default=None, console=None):
+        return self._next_input("ask", prompt)
+    
+    def confirm(self, prompt, console=None):
+        return bool(self._next_input("confirm", prompt))
+
+
+class ScriptedSession(Session):
+    """A session answering prompts from a fixed list, for generating sessions"""
+    
+    def __init__(self, answers, seed=0, start=1700000000.0, tick=1.5):
+        """Initialize a scripted session
+        
+        Args:
+            answers (list): Answers in prompt order; bools answer confirmations
+            seed (int, optional): Random seed. Defaults to 0.
+            start (float, optional): First clock reading. Defaults to 1700000000.0.
+            tick (float, optional): Seconds the clock advances per reading. Defaults to 1.5.
+        """
+        super().__init__(seed)
+        self._answers = iter(answers)
+        self._now = start
+        self._tick = tick
+    
+    def clock(self):
+        self._now += self._tick
+        return self._now
+    
+    def ask(self, prompt, choices=None, default=None, console=None):
+        answer = next(self._answers, None)
+        if answer is None:
+            raise SessionEnded("Script exhausted")
+        return answer
+    
+    def confirm(self, prompt, console=None):
+        return bool(self.ask(prompt))
+
+
+_shared_session = None
+
+
+def get_session():
+    """Get the session shared by the game's components
+    
+    Returns:
+        Session: Shared session, live unless another was installed
+    """
+    global _shared_session
+    if _shared_session is None:
+        _shared_session = Session()
+    return _shared_session
+
+
+def set_session(session):
+    """Install the session components pick up by default
+    
+    Args:
+        session (Session): Session to share
+    """
+    global _shared_session
+    _shared_session = session
+
+
+def play(session, data_dir):
+    """Play a game driven by a session
+    
+    Args:
+        session (Session): Session supplying input, randomness and time
+        data_dir (str): Directory for the game's local storage
+        
+    Returns:
+        str: Everything the game printed
+    """
+    from database import Database
+    from main import Game
+    from pacing import HEADLESS, get_pacing
+    
+    pacing = get_pacing()
+    mode = pacing.mode
+    pacing.mode = HEADLESS  # Replays never wait
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            game = Game(session=session, database=Database(use_firebase=False, data_dir=data_dir))
+            try:
+                game.start()
+            except SessionEnded:
+                pass
+            game.db.close()
+    finally:
+        pacing.mode = mode
+    return output.getvalue()
+
+
+def replay(data, trace_memory=False):
+    """Replay a session in a scratch data directory and measure it
+    
+    Args:
+        data (dict): Session data
+        trace_memory (bool, optional): Also measure allocations with tracemalloc (slower). Defaults to False.
+        
+    Returns:
+        dict: cpu_seconds, wall_seconds, inputs, output_sha256, mismatches and,
+            when tracing, peak_kib and retained_kib
+    """
+    session = ReplaySession(data)
+    with tempfile.TemporaryDirectory() as data_dir:
+        if trace_memory:
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        
+        output = play(session, data_dir)
+        
+        result = {
+            "cpu_seconds": time.process_time() - cpu_start,
+            "wall_seconds": time.perf_counter() - wall_start,
+            "inputs": len(data["inputs"]),
+            "output_sha256": hashlib.sha256(output.encode("utf-8")).hexdigest(),
+            "mismatches": len(session.mismatches)
+        }
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["peak_kib"] = round((peak - baseline) / 1024, 1)
+            result["retained_kib"] = round((current - baseline) / 1024, 1)
+    return result
+
+
+def replay_file(path):
+    """Replay a session file twice: once for time, once for memory
+    
+    Args:
+        path (str): Session file
+        
+    Returns:
+        dict: Combined measurements, with deterministic=True if both runs printed the same output
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    timed = replay(data)
+    traced = replay(data, trace_memory=True)
+    timed.update({
+        "session": str(path),
+        "peak_kib": traced["peak_kib"],
+        "retained_kib": traced["retained_kib"],
+        "deterministic": timed["output_sha256"] == traced["output_sha256"]
+    })
+    return timed
+
+
+# For testing
+if __name__ == "__main__":
+    import argparse
+    import sys
+    
+    parser = argparse.ArgumentParser(description="Record and replay EduRPG sessions")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    replay_parser = commands.add_parser("replay", help="replay recorded sessions and measure them")
+    replay_parser.add_argument("paths", nargs="+", metavar="SESSION", help="recorded session file")
+    replay_parser.add_argument("--label", help="label stored with each result")
+    replay_parser.add_argument("--output", metavar="PATH", help="append results to a JSON-lines file")
+    commands.add_parser("selftest", help="record a scripted session and check its replays (the default)")
+    args = parser.parse_args()
+    
+    if args.command == "replay":
+        print(f"{'Session':<40} {'CPU s':>8} {'Peak KiB':>9} {'Inputs':>7}  Deterministic")
+        for path in args.paths:
+            result = replay_file(path)
+            result["label"] = args.label
+            result["measured_at"] = time.time()
+            print(f"{Path(path).name:<40} {result['cpu_seconds']:>8.3f} {result['peak_kib']:>9.1f} "
+                  f"{result['inputs']:>7}  {'yes' if result['deterministic'] else 'NO'}")
+            if args.output:
+                with open(args.output, "a") as f:
+                    f.write(json.dumps(result) + "\n")
+        sys.exit(0)
+    
+    # Record a scripted session, then check that replays reproduce it
+    script = ["1", "Ada", "10", "1"] + ["1", "42"] * 6 + ["3", True, "5", True, "5", True]
+    recording = RecordingSession(ScriptedSession(script, seed=7))
+    with tempfile.TemporaryDirectory() as data_dir:
+        recorded_output = play(recording, data_dir)
+    
+    path = Path(tempfile.gettempdir()) / "edurpg-selftest-session.json"
+    recording.save(path)
+    print(f"Recorded {len(recording.inputs)} inputs and {len(recording.clock_readings)} clock readings to {path}")
+    
+    result = replay_file(path)
+    matches = result["output_sha256"] == hashlib.sha256(recorded_output.encode("utf-8")).hexdigest()
+    print(f"Replay: {result['cpu_seconds'] * 1000:.1f}ms CPU, {result['peak_kib']} KiB peak, "
+          f"deterministic={result['deterministic']}, matches recording={matches}, prompt mismatches={result['mismatches']}")
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Storage engine module: write-ahead log with group commit and snapshots
+"""
+
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+
+from file_locks import try_lock_file, unlock_file
+
+LOCK_FILE = "LOCK"
+SNAPSHOT_FILE = "snapshot.json"
+WAL_PREFIX = "wal."
+WAL_SUFFIX = ".log"
+
+
+def _encode_record(record):
+    """Encode a log record as one checksummed line
+    
+    Args:
+        record (dict): Log record
+        
+    Returns:
+        bytes: Encoded line
+    """
+    body = json.dumps(record, separators=(",", ":"))
+    return f"{zlib.crc32(body.encode('utf-8')):08x} {body}\n".encode("utf-8")
+
+
+def _decode_record(line):
+    """Decode a log line, rejecting torn or corrupted writes
+    
+    Args:
+        line (bytes): Encoded line
+        
+    Returns:
+        dict: Log record, or None if the line is damaged
+    """
+    try:
+        text = line.decode("utf-8").rstrip("\n")
+        checksum, body = text.split(" ", 1)
+        if int(checksum, 16) != zlib.crc32(body.encode("utf-8")):
+            return None
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+class Transaction:
+    """A group of puts and deletes committed atomically"""
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.ops = []
+    
+    def get(self, collection, doc_id):
+        """Read a document, seeing this transaction's own writes
+        
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+            
+        Returns:
+            dict: Document, or None if not found
+        """
+        for op in reversed(self.ops):
+            if op["collection"] == collection and op["id"] == doc_id:
+                return op.get("data")
+        return self.engine.get(collection, doc_id)
+    
+    def put(self, collection, doc_id, data):
+        """Write a document
+        
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+            data (dict): Document data
+        """
+        self.ops.append({"op": "put", "collection": collection, "id": doc_id, "data": data})
+    
+    def delete(self, collection, doc_id):
+        """Delete a document
+        
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+        """
+        self.ops.append({"op": "delete", "collection": collection, "id": doc_id})
+
+
+class StorageEngine:
+    """Embedded document store with a write-ahead log
+    
+    Every commit is one checksummed line in the log, so a transaction is
+    either fully replayed or not at all. A background thread writes and
+    fsyncs whatever commits have queued up since its last flush (group
+    commit), and the log is periodically folded into a snapshot so
+    recovery only replays the tail. Committers wait until their group is
+    fsynced, so a save that returned survives a crash.
+    
+    One process at a time may open a directory: its log would be corrupted
+    by two writers.
+    """
+    
+    def __init__(self, directory, commit_interval=0.0, snapshot_every=10000):
+        """Open (or create) a storage engine and recover its state
+        
+        Args:
+            directory (Path): Directory for the snapshot and log files
+            commit_interval (float, optional): Extra seconds the flusher waits to gather a group.
+                Defaults to 0: commits made during one fsync already form the next group.
+            snapshot_every (int, optional): Commits between automatic snapshots. Defaults to 10000.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._dir_lock = try_lock_file(self.directory / LOCK_FILE)
+        if self._dir_lock is None:
+            raise RuntimeError(f"Storage engine directory {self.directory} is in use by another process")
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        
+        self.tables = {}  # Collection -> {document ID -> data}
+        self.lsn = 0  # Sequence number of the last commit
+        self.durable_lsn = 0  # Sequence number of the last fsynced commit
+        self.fsync_count = 0
+        self._commits_since_snapshot = 0
+        
+        self._lock = threading.RLock()  # Serializes transactions and state changes
+        self._wal_lock = threading.Lock()  # Serializes writes to the log file; taken after _lock
+        self._snapshot_lock = threading.RLock()  # One snapshot at a time; taken before _lock
+        self._flushed = threading.Condition(threading.Lock())
+        self._pending = []  # (sequence number, encoded record) not yet written
+        self._wal_file = None
+        self._closed = False
+        
+        self._recover()
+        self._open_wal(self.lsn + 1)
+        
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+        self._flusher.start()
+    
+    # Reading
+    def get(self, collection, doc_id):
+        """Get a document
+        
+        Args:
+            collection (str): Collection name
+            doc_id (str): Document ID
+            
+        Returns:
+            dict: Document, or None if not found
+        """
+        return self.tables.get(collection, {}).get(doc_id)
+    
+    def list_ids(self, collection):
+        """List the document IDs of a collection
+        
+        Args:
+            collection (str): Collection name
+            
+        Returns:
+            list: Document IDs
+        """
+        return list(self.tables.get(collection, {}))
+    
+    # Writing
+    def transaction(self):
+        """Start a transaction
+        
+        Use as a context manager; the transaction commits when the block
+        exits without an exception. Other transactions wait meanwhile, so a
+        check-then-write inside the block is atomic.
+        
+        Returns:
+            _TransactionContext: Context manager yielding a Transaction
+        """
+        return _TransactionContext(self)
+    
+    def commit(self, ops, wait=True):
+        """Apply and log a list of operations as one transaction
+        
+        Must not be called while holding the engine lock when waiting, since
+        the flusher needs the lock to write the group.
+        
+        Args:
+            ops (list): Operations built by Transaction.put/delete
+            wait (bool, optional): Block until the commit is on disk. Defaults to True.
+            
+        Returns:
+            int: Sequence number of the commit, or None if there was nothing to commit
+        """
+        lsn = self._log_commit(ops)
+        if lsn is None:
+            return None
+        
+        if wait:
+            self.commit_done(lsn)
+        else:
+            self._maybe_snapshot()
+        return lsn
+    
+    def _log_commit(self, ops):
+        """Apply operations and queue their log record for the flusher
+        
+        Returns:
+            int: Sequence number of the commit, or None if there was nothing to commit
+        """
+        if not ops:
+            return None
+        
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Storage engine is closed")
+            
+            self.lsn += 1
+            lsn = self.lsn
+            record = {"lsn": lsn, "ops": ops}
+            self._apply(record)
+            with self._flushed:
+                self._pending.append((lsn, _encode_record(record)))
+            self._commits_since_snapshot += 1
+        
+        self._wake.set()
+        return lsn
+    
+    def commit_done(self, lsn):
+        """Wait for a logged commit to be durable, then snapshot if one is due
+        
+        Args:
+            lsn (int): Sequence number from _log_commit
+        """
+        self.wait_durable(lsn)
+        self._maybe_snapshot()
+    
+    def _maybe_snapshot(self):
+        # Committers that find a snapshot already running carry on instead of queueing behind it
+        if self._commits_since_snapshot < self.snapshot_every:
+            return
+        if not self._snapshot_lock.acquire(blocking=False):
+            return
+        try:
+            if self._commits_since_snapshot >= self.snapshot_every:
+                self.snapshot()
+        finally:
+            self._snapshot_lock.release()
+    
+    def wait_durable(self, lsn=None):
+        """Block until a commit has been fsynced
+        
+        Args:
+            lsn (int, optional): Commit to wait for. Defaults to the latest commit.
+        """
+        lsn = self.lsn if lsn is None else lsn
+        self._wake.set()
+        with self._flushed:
+            while self.durable_lsn < lsn and not self._closed:
+                self._flushed.wait(0.1)
+    
+    def _apply(self, record):
+        for op in record["ops"]:
+            table = self.tables.setdefault(op["collection"], {})
+            if op["op"] == "put":
+                table[op["id"]] = op["data"]
+            else:
+                table.pop(op["id"], None)
+    
+    # Group commit
+    def _flush_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self.commit_interval:
+                # Give concurrent committers a moment to join this group
+                self._wake.wait(self.commit_interval)
+            self._flush_pending()
+            if self._closed:
+                return
+    
+    def _flush_pending(self):
+        # Only the log file is locked, so transactions keep committing during the fsync
+        with self._wal_lock:
+            with self._flushed:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            self._wal_file.write(b"".join(line for _, line in batch))
+            self._wal_file.flush()
+            os.fsync(self._wal_file.fileno())
+            self.fsync_count += 1
+            with self._flushed:
+                self.durable_lsn = max(self.durable_lsn, batch[-1][0])
+                self._flushed.notify_all()
+    
+    # Snapshots and recovery
+    def snapshot(self):
+        """Fold the log into a snapshot and start a fresh log file
+        
+        Returns:
+            int: Sequence number covered by the snapshot
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                self._flush_pending()
+                snapshot_lsn = self.lsn
+                state = json.dumps({"lsn": snapshot_lsn, "tables": self.tables}, separators=(",", ":"))
+                with self._wal_lock:
+                    self._wal_file.close()
+                    self._open_wal(snapshot_lsn + 1)
+                self._commits_since_snapshot = 0
+            
+            tmp_path = self.directory / f"{SNAPSHOT_FILE}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(state)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.directory / SNAPSHOT_FILE)
+            
+            # Logs fully covered by the snapshot are no longer needed
+            for start_lsn, path in self._wal_files():
+                if start_lsn <= snapshot_lsn:
+                    path.unlink()
+            return snapshot_lsn
+    
+    def _recover(self):
+        snapshot_path = self.directory / SNAPSHOT_FILE
+        if snapshot_path.exists():
+            with open(snapshot_path, "r") as f:
+                state = json.load(f)
+            self.tables = state["tables"]
+            self.lsn = state["lsn"]
+        
+        for _, path in self._wal_files():
+            valid_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    record = _decode_record(line)
+                    if record is None:
+                        break  # Torn tail from a crash; later lines never committed
+                    valid_bytes += len(line)
+                    if record["lsn"] <= self.lsn:
+                        continue
+                    self._apply(record)
+                    self.lsn = record["lsn"]
+                    self._commits_since_snapshot += 1
+            if valid_bytes < path.stat().st_size:
+                with open(path, "r+b") as f:
+                    f.truncate(valid_bytes)
+        
+        self.durable_lsn = self.lsn
+    
+    def _wal_files(self):
+        files = []
+        for path in self.directory.glob(f"{WAL_PREFIX}*{WAL_SUFFIX}"):
+            try:
+                files.append((int(path.name[len(WAL_PREFIX):-len(WAL_SUFFIX)]), path))
+            except ValueError:
+                continue
+        return sorted(files)
+    
+    def _open_wal(self, start_lsn):
+        path = self.directory / f"{WAL_PREFIX}{start_lsn:012d}{WAL_SUFFIX}"
+        self._wal_file = open(path, "ab")
+    
+    def close(self):
+        """Flush outstanding commits and stop the flusher thread"""
+        if self._closed:
+            return
+        
+        self._flush_pending()
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self._wal_file.close()
+        unlock_file(self._dir_lock)
+
+
+class _TransactionContext:
+    """Holds the engine lock for the duration of a transaction block
+    
+    The block exits once its commit is durable. The lock is released
+    before waiting, so other transactions can join the same group commit.
+    """
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.transaction = None
+    
+    def __enter__(self):
+        self.engine._lock.acquire()
+        self.transaction = Transaction(self.engine)
+        return self.transaction
+    
+    def __exit__(self, exc_type, exc, tb):
+        lsn = None
+        try:
+            if exc_type is None:
+                lsn = self.engine._log_commit(self.transaction.ops)
+        finally:
+            self.engine._lock.release()
+        if lsn is not None:
+            self.engine.commit_done(lsn)
+        return False
+
+
+# For testing
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+    
+    directory = tempfile.mkdtemp()
+    try:
+        engine = StorageEngine(directory, snapshot_every=5000)
+        count = 20000
+        threads = 8  # Concurrent committers share fsyncs
+        
+        def commit_some(worker):
+            for i in range(worker, count, threads):
+                with engine.transaction() as txn:
+                    txn.put("players", f"p{i % 500}", {"name": f"p{i % 500}", "xp": i})
+                    txn.put("guilds", f"g{i % 50}", {"id": f"g{i % 50}", "xp": i})
+        
+        start = time.perf_counter()
+        workers = [threading.Thread(target=commit_some, args=(worker,)) for worker in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        print(f"{count} durable two-document transactions on {threads} threads in {elapsed:.2f}s "
+              f"({count / elapsed:.0f}/sec) with {engine.fsync_count} fsyncs")
+        engine.close()
+        
+        # Simulate a crash that tore the last log line
+        wal_path = sorted(Path(directory).glob("wal.*.log"))[-1]
+        with open(wal_path, "ab") as f:
+            f.write(b"deadbeef {\"lsn\": 99999")
+        
+        start = time.perf_counter()
+        recovered = StorageEngine(directory)
+        print(f"Recovered {recovered.lsn} commits in {time.perf_counter() - start:.3f}s, "
+              f"p499 xp = {recovered.get('players', 'p499')['xp']}")
+        assert recovered.lsn == count
+        recovered.close()
+    finally:
+        shutil.rmtree(directory)
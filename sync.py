@@ -0,0 +1,802 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Sync module keeping local storage and Firestore in step for offline-first play
+
+Reads and writes always go to local storage. Each write is recorded in an
+outbound journal and bumps the document's version vector; the sync engine
+then reconciles journaled documents with Firestore in batches and pulls
+documents other devices changed. Version vectors tell whether one side is
+simply newer; concurrent edits are merged field by field against the last
+version both sides agreed on.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from rich.console import Console
+
+from database import Database, firestore
+from guild import guild_level_for_xp
+from guild_index import guild_summary
+from metrics import get_registry
+from resilience import ResilientFirestore, WriteQueue
+
+console = Console()
+
+SYNC_FIELD = "_sync"  # Version vector and timestamps stored on every synced Firestore document
+TOMBSTONES = "sync_tombstones"  # Firestore collection remembering deleted documents
+CLOCK_MARGIN = 300.0  # Seconds pulled again each time, in case device clocks disagree
+
+# Outcomes of reconciling one document
+IN_SYNC = "in_sync"
+PUSHED = "pushed"
+PULLED = "pulled"
+MERGED = "merged"
+
+# Fields Firestore keeps only for queries, dropped when documents come back
+_REMOTE_ONLY_FIELDS = {"guilds": ("member_count",)}
+
+_documents_synced = get_registry().counter("edurpg_sync_documents_total",
+                                           "Documents reconciled with Firestore, by outcome", ("outcome",))
+
+_MISSING = object()  # A field or entry absent from one version of a document
+
+
+# Version vectors: device ID -> number of writes made on that device
+def compare_versions(a, b):
+    """Compare two version vectors
+    
+    Args:
+        a (dict): Version vector
+        b (dict): Version vector
+        
+    Returns:
+        str: "equal", "ahead" (a has seen everything b has), "behind" or "concurrent"
+    """
+    devices = set(a) | set(b)
+    a_covers = all(a.get(device, 0) >= b.get(device, 0) for device in devices)
+    b_covers = all(b.get(device, 0) >= a.get(device, 0) for device in devices)
+    if a_covers and b_covers:
+        return "equal"
+    if a_covers:
+        return "ahead"
+    if b_covers:
+        return "behind"
+    return "concurrent"
+
+
+def merge_versions(a, b):
+    """Get the version vector that has seen everything either one has
+    
+    Args:
+        a (dict): Version vector
+        b (dict): Version vector
+        
+    Returns:
+        dict: Pointwise maximum
+    """
+    return {device: max(a.get(device, 0), b.get(device, 0)) for device in set(a) | set(b)}
+
+
+# Merge rules: rule(base, local, remote, local_wins) -> merged value or _MISSING
+def _three_way(base, local, remote, local_wins, rule=None):
+    """Merge one value changed on either side since base
+    
+    Args:
+        base: Value both sides last agreed on, or _MISSING
+        local: Local value, or _MISSING
+        remote: Remote value, or _MISSING
+        local_wins (bool): Whether the local edit is the later one
+        rule (callable, optional): Merges values changed on both sides. Defaults to last writer wins.
+        
+    Returns:
+        Merged value, or _MISSING if it should be absent
+    """
+    if local == remote:
+        return local
+    if local == base:
+        return remote
+    if remote == base:
+        return local
+    if rule is not None and local is not _MISSING and remote is not _MISSING:
+        return rule(base, local, remote, local_wins)
+    return local if local_wins else remote
+
+
+def merge_map(base, local, remote, local_wins, rule=None):
+    """Merge dictionaries key by key, such as Guild.members
+    
+    Returns:
+        dict: Merged dictionary
+    """
+    if not isinstance(local, dict) or not isinstance(remote, dict):
+        return local if local_wins else remote
+    base = base if isinstance(base, dict) else {}
+    merged = {}
+    for key in dict.fromkeys([*local, *remote]):
+        value = _three_way(base.get(key, _MISSING), local.get(key, _MISSING), remote.get(key, _MISSING),
+                           local_wins, rule)
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
+
+def merge_totals(base, local, remote, local_wins):
+    """Merge running totals by adding both sides' increments, such as member_xp
+    
+    Nested dictionaries are merged the same way; non-integer values such
+    as timestamps keep the larger one.
+    
+    Returns:
+        Merged total
+    """
+    if isinstance(local, dict) and isinstance(remote, dict):
+        return merge_map(base, local, remote, local_wins, merge_totals)
+    if isinstance(local, int) and isinstance(remote, int) and not isinstance(local, bool):
+        base = base if isinstance(base, int) else 0
+        return local + remote - base
+    try:
+        return max(local, remote)
+    except TypeError:
+        return local if local_wins else remote
+
+
+def merge_keyed_list(base, local, remote, local_wins):
+    """Merge lists of dictionaries by their "id", such as quests
+    
+    An entry removed on one side and changed on the other stays removed:
+    quests leave the list when they are completed or expire.
+    
+    Returns:
+        list: Merged list, in local order followed by new remote entries
+    """
+    def by_id(items):
+        return {item["id"]: item for item in items} if isinstance(items, list) else {}
+    
+    base_items, local_items, remote_items = by_id(base), by_id(local), by_id(remote)
+    merged = []
+    for item_id in dict.fromkeys([*local_items, *remote_items]):
+        local_item = local_items.get(item_id, _MISSING)
+        remote_item = remote_items.get(item_id, _MISSING)
+        base_item = base_items.get(item_id, _MISSING)
+        if base_item is not _MISSING and _MISSING in (local_item, remote_item):
+            continue
+        item = _three_way(base_item, local_item, remote_item, local_wins)
+        if item is not _MISSING:
+            merged.append(item)
+    return merged
+
+
+def merge_chat(base, local, remote, local_wins):
+    """Merge chat histories by keeping every message from both sides
+    
+    Returns:
+        list: The last 100 messages in time order
+    """
+    messages = {}
+    for message in [*local, *remote]:
+        messages[(message.get("timestamp"), message.get("user_id"), message.get("message"))] = message
+    return sorted(messages.values(), key=lambda message: message.get("timestamp") or 0)[-100:]
+
+
+MERGE_RULES = {
+    "guilds": {
+        "members": merge_map,
+        "member_xp": merge_totals,
+        "xp": merge_totals,
+        "quest_stats": merge_totals,
+        "quests": merge_keyed_list,
+        "completed_quests": merge_keyed_list,
+        "chat_history": merge_chat,
+        "level": lambda base, local, remote, local_wins: max(local, remote),
+    },
+    "counters": {"*": merge_totals},  # Every field is a quest's progress
+}
+
+
+def merge_document(collection, base, local, remote, local_wins):
+    """Merge two concurrently edited versions of a document field by field
+    
+    Fields changed on one side only take that side's value. Fields changed
+    on both sides use the collection's rule from MERGE_RULES, or else the
+    later writer's value.
+    
+    Args:
+        collection (str): "players", "guilds" or "counters"
+        base (dict): Version both sides last agreed on, or None
+        local (dict): Local version
+        remote (dict): Remote version
+        local_wins (bool): Whether the local edit is the later one
+        
+    Returns:
+        dict: Merged document
+    """
+    rules = MERGE_RULES.get(collection, {})
+    base = base or {}
+    merged = {}
+    for field in dict.fromkeys([*local, *remote]):
+        value = _three_way(base.get(field, _MISSING), local.get(field, _MISSING), remote.get(field, _MISSING),
+                           local_wins, rules.get(field, rules.get("*")))
+        if value is not _MISSING:
+            merged[field] = value
+    
+    if collection == "guilds":
+        merged["level"] = max(merged.get("level", 1), guild_level_for_xp(merged.get("xp", 0)))
+        # Newer than both sides, so saves of either unmerged copy fail their version check
+        merged["version"] = max(local.get("version", 0), remote.get("version", 0)) + 1
+    return merged
+
+
+class SyncEngine:
+    """Reconciles a local database with Firestore
+    
+    Per-document state (version vector, last agreed version, time and
+    device of the last write) lives in data/sync/state.json and the
+    outbound journal in data/sync/journal.jsonl, so writes made offline
+    survive restarts until they are synced.
+    """
+    
+    def __init__(self, database, firestore_module, device_id=None, batch_size=100, clock=time.time):
+        """Initialize the engine
+        
+        Args:
+            database (Database): Local-mode database holding the data
+            firestore_module: firebase_admin.firestore or a stand-in such as fake_firestore.FakeFirestore()
+            device_id (str, optional): Name of this device in version vectors. Defaults to a
+                random ID kept in the sync state.
+            batch_size (int, optional): Documents reconciled per Firestore transaction. Defaults to 100.
+            clock (callable, optional): Wall clock. Defaults to time.time.
+        """
+        self.database = database
+        self.module = firestore_module
+        self.batch_size = batch_size
+        self.clock = clock
+        self.sync_dir = database.local_data_dir / "sync"
+        self.sync_dir.mkdir(parents=True, exist_ok=True)
+        self.remote = ResilientFirestore(firestore_module.client(), firestore_module,
+                                         self.sync_dir / "firestore_writes.jsonl")
+        self.journal = WriteQueue(self.sync_dir / "journal.jsonl")
+        self.lock = threading.RLock()  # Held while local data and its sync state change together
+        self._sync_lock = threading.Lock()  # One sync at a time
+        self._stop = threading.Event()
+        self._thread = None
+        
+        state_path = self.sync_dir / "state.json"
+        state = {}
+        if state_path.exists():
+            with open(state_path, "r") as f:
+                state = json.load(f)
+        self.device_id = device_id or state.get("device_id") or uuid.uuid4().hex[:12]
+        self._documents = state.get("documents", {})  # "collection/doc_id" -> state
+        self._cursors = state.get("cursors", {})  # Pulled source -> time of the last pull
+        
+        # Journal entries newer than the saved state carry their version vectors
+        for entry in self.journal.entries:
+            doc = self._documents.setdefault(entry["path"], {"vv": {}, "base": None})
+            doc["vv"] = merge_versions(doc["vv"], entry["vv"])
+            if entry["updated_at"] >= doc.get("updated_at", 0):
+                doc["updated_at"], doc["device"] = entry["updated_at"], entry["device"]
+        
+        if not state_path.exists():
+            self._track_existing()
+            self._save_state()
+    
+    def _track_existing(self):
+        """Journal the documents stored before syncing was turned on, so they get pushed"""
+        for player_id in self.database.list_players():
+            self.record("players", player_id)
+        for guild_id in self.database.list_guilds():
+            self.record("guilds", guild_id)
+            self.record("counters", guild_id)
+    
+    def _save_state(self):
+        with self.lock:
+            state = {"device_id": self.device_id, "documents": self._documents, "cursors": self._cursors}
+            state_path = self.sync_dir / "state.json"
+            tmp_path = state_path.with_name(state_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, state_path)
+    
+    def record(self, collection, doc_id):
+        """Record a local write in the journal
+        
+        Call it with the lock held, right after the write, so no sync runs
+        in between.
+        
+        Args:
+            collection (str): "players", "guilds" or "counters"
+            doc_id (str): Document ID (the guild ID for counters)
+        """
+        path = f"{collection}/{doc_id}"
+        with self.lock:
+            doc = self._documents.setdefault(path, {"vv": {}, "base": None})
+            doc["vv"] = {**doc["vv"], self.device_id: doc["vv"].get(self.device_id, 0) + 1}
+            doc["updated_at"] = self.clock()
+            doc["device"] = self.device_id
+            self.journal.append({"path": path, "collection": collection, "doc_id": doc_id,
+                                 "vv": doc["vv"], "updated_at": doc["updated_at"], "device": self.device_id})
+    
+    @property
+    def pending(self):
+        """Number of journaled writes not yet synced"""
+        return len(self.journal)
+    
+    # Local side
+    def _read_local(self, collection, doc_id):
+        if collection == "players":
+            return self.database.get_player(doc_id)
+        if collection == "guilds":
+            return self.database.get_guild(doc_id)
+        return self.database.get_quest_progress(doc_id)
+    
+    def _write_local(self, collection, doc_id, data):
+        """Apply a synced document locally, bypassing the journal"""
+        if collection == "players":
+            if data is None:
+                Database.delete_player(self.database, doc_id)
+            else:
+                Database.save_player(self.database, data)
+        elif collection == "guilds":
+            if data is None:
+                Database.delete_guild(self.database, doc_id)
+            else:
+                Database.save_guild(self.database, data)
+        else:
+            Database.set_quest_progress(self.database, doc_id, data or {})
+    
+    # Remote side
+    def _remote_refs(self, collection, doc_id):
+        """Get the raw references of a document and of its tombstone
+        
+        Returns:
+            tuple: (document reference, tombstone reference)
+        """
+        client = self.remote.client
+        if collection == "counters":
+            ref = client.collection("guilds").document(doc_id).collection("counters").document("quests")
+        else:
+            ref = client.collection(collection).document(doc_id)
+        return ref, client.collection(TOMBSTONES).document(f"{collection}~{doc_id}")
+    
+    def _read_remote(self, collection, refs, transaction):
+        """Read a document and its sync metadata inside a transaction
+        
+        Returns:
+            tuple: (data or None if missing or deleted, metadata)
+        """
+        ref, tombstone_ref = refs
+        snapshot = ref.get(transaction=transaction, **self.remote.call_options)
+        if snapshot.exists:
+            data = snapshot.to_dict()
+            meta = data.pop(SYNC_FIELD, None) or {}
+            for field in _REMOTE_ONLY_FIELDS.get(collection, ()):
+                data.pop(field, None)
+            return data, meta
+        tombstone = tombstone_ref.get(transaction=transaction, **self.remote.call_options)
+        return None, (tombstone.to_dict() or {}).get(SYNC_FIELD) or {}
+    
+    def _write_remote(self, transaction, collection, doc_id, refs, data, meta):
+        ref, tombstone_ref = refs
+        if data is None:
+            transaction.delete(ref)
+            transaction.set(tombstone_ref, {"collection": collection, "doc_id": doc_id, SYNC_FIELD: meta})
+            return
+        
+        data = dict(data)
+        if collection == "guilds":
+            # Denormalized like Database.save_guild does, so listings can order by it
+            data["member_count"] = guild_summary(data)["member_count"]
+        data[SYNC_FIELD] = meta
+        transaction.set(ref, data)
+        transaction.delete(tombstone_ref)
+    
+    def _resolve(self, collection, known, remote, remote_meta):
+        """Decide what one document becomes on both sides
+        
+        Args:
+            collection (str): Collection name
+            known (dict): Local data, vv, base, updated_at and device
+            remote (dict): Remote data, or None
+            remote_meta (dict): Remote sync metadata
+            
+        Returns:
+            tuple: (outcome, resulting data, version vector, updated_at, device)
+        """
+        local = known["data"]
+        local_vv, remote_vv = known["vv"], remote_meta.get("vv", {})
+        order = compare_versions(local_vv, remote_vv)
+        local_stamp = (known["updated_at"], known["device"])
+        remote_stamp = (remote_meta.get("updated_at", 0), remote_meta.get("device", ""))
+        
+        if order == "equal" and local == remote:
+            return IN_SYNC, local, local_vv, *local_stamp
+        if order == "ahead":
+            return PUSHED, local, local_vv, *local_stamp
+        if order == "behind":
+            return PULLED, remote, remote_vv, *remote_stamp
+        
+        # Concurrent edits, or the same versions with different data (written outside the engine)
+        if local is None or remote is None:
+            merged = remote if local is None else local  # An edit wins over a concurrent delete
+        else:
+            merged = merge_document(collection, known["base"], local, remote, local_stamp >= remote_stamp)
+        vv = merge_versions(local_vv, remote_vv)
+        vv[self.device_id] = vv.get(self.device_id, 0) + 1
+        return MERGED, merged, vv, self.clock(), self.device_id
+    
+    def _reconcile(self, paths):
+        """Reconcile documents with Firestore in one transaction
+        
+        Args:
+            paths (list): "collection/doc_id" paths
+            
+        Returns:
+            dict: Outcome -> number of documents
+        """
+        keys = [tuple(path.split("/", 1)) for path in paths]
+        with self.lock:
+            known = {}
+            for path, (collection, doc_id) in zip(paths, keys):
+                doc = self._documents.get(path, {})
+                known[path] = {"data": self._read_local(collection, doc_id), "vv": dict(doc.get("vv", {})),
+                               "base": doc.get("base"), "updated_at": doc.get("updated_at", 0),
+                               "device": doc.get("device", "")}
+        refs = {path: self._remote_refs(*key) for path, key in zip(paths, keys)}
+        
+        @self.module.transactional
+        def exchange(transaction):
+            # Firestore transactions must do every read before any write
+            remotes = {path: self._read_remote(key[0], refs[path], transaction) for path, key in zip(paths, keys)}
+            synced_at = self.clock()
+            results = {}
+            for path, (collection, doc_id) in zip(paths, keys):
+                remote, remote_meta = remotes[path]
+                result = results[path] = self._resolve(collection, known[path], remote, remote_meta)
+                outcome, data, vv, updated_at, device = result
+                if outcome in (PUSHED, MERGED):
+                    meta = {"vv": vv, "updated_at": updated_at, "device": device, "synced_at": synced_at}
+                    self._write_remote(transaction, collection, doc_id, refs[path], data, meta)
+            return results
+        
+        results = self.remote.call(lambda: exchange(self.remote.transaction()))
+        
+        stats = {}
+        with self.lock:
+            for path, (collection, doc_id) in zip(paths, keys):
+                outcome, data, vv, updated_at, device = results[path]
+                stats[outcome] = stats.get(outcome, 0) + 1
+                _documents_synced.inc(outcome)
+                doc = self._documents.get(path, {})
+                if doc.get("vv", {}) != known[path]["vv"]:
+                    # Written locally meanwhile: keep that write, which is still journaled
+                    if outcome == PUSHED:
+                        doc["vv"] = merge_versions(doc["vv"], vv)
+                        doc["base"] = data
+                    elif outcome == MERGED:
+                        # The merge and the local write both bumped this device's counter.
+                        # Fold the merge into the local write and count past both, so the
+                        # next push sends the combined document instead of pulling over it.
+                        current = self._read_local(collection, doc_id)
+                        if current is None or data is None:
+                            combined = data if current is None else current
+                        else:
+                            combined = merge_document(collection, known[path]["data"], current, data, True)
+                        self._write_local(collection, doc_id, combined)
+                        doc["vv"] = merge_versions(doc["vv"], vv)
+                        doc["vv"][self.device_id] = doc["vv"].get(self.device_id, 0) + 1
+                        doc["base"] = data
+                        doc["updated_at"] = self.clock()
+                        doc["device"] = self.device_id
+                    continue
+                if outcome in (PULLED, MERGED):
+                    self._write_local(collection, doc_id, data)
+                self._documents[path] = {"vv": vv, "base": data, "updated_at": updated_at, "device": device}
+        return stats
+    
+    def push(self):
+        """Reconcile every journaled document, batch_size documents per transaction
+        
+        Returns:
+            dict: Outcome -> number of documents
+        """
+        entries = list(self.journal.entries)
+        paths = list(dict.fromkeys(entry["path"] for entry in entries))
+        stats = {}
+        done = set()
+        for start in range(0, len(paths), self.batch_size):
+            batch = paths[start:start + self.batch_size]
+            for outcome, count in self._reconcile(batch).items():
+                stats[outcome] = stats.get(outcome, 0) + count
+            done.update(batch)
+            
+            # Drop the journal entries at the front whose documents are now synced
+            synced = 0
+            while synced < len(entries) and entries[synced]["path"] in done:
+                synced += 1
+            self._save_state()
+            self.journal.pop(synced)
+            del entries[:synced]
+        return stats
+    
+    def pull(self):
+        """Reconcile the documents other devices changed since the last pull
+        
+        Returns:
+            dict: Outcome -> number of documents
+        """
+        client = self.remote.client
+        sources = {
+            "players": client.collection("players"),
+            "guilds": client.collection("guilds"),
+            "counters": client.collection_group("counters"),
+            TOMBSTONES: client.collection(TOMBSTONES),
+        }
+        pending = {entry["path"] for entry in self.journal.entries}
+        stats = {}
+        for source, query in sources.items():
+            started = self.clock()
+            since = self._cursors.get(source, 0) - CLOCK_MARGIN
+            snapshots = self.remote.call(lambda: list(query.where(f"{SYNC_FIELD}.synced_at", ">=", since)
+                                                      .stream(**self.remote.call_options)))
+            
+            changed = []
+            for snapshot in snapshots:
+                data = snapshot.to_dict()
+                if source == TOMBSTONES:
+                    path = f"{data['collection']}/{data['doc_id']}"
+                elif source == "counters":
+                    path = f"counters/{snapshot.reference.path.split('/')[1]}"
+                else:
+                    path = f"{source}/{snapshot.id}"
+                if path in pending:
+                    continue  # The next push reconciles it
+                local_vv = self._documents.get(path, {}).get("vv", {})
+                if compare_versions(data[SYNC_FIELD].get("vv", {}), local_vv) in ("ahead", "concurrent"):
+                    changed.append(path)
+            
+            for start in range(0, len(changed), self.batch_size):
+                for outcome, count in self._reconcile(changed[start:start + self.batch_size]).items():
+                    stats[outcome] = stats.get(outcome, 0) + count
+            self._cursors[source] = started
+            self._save_state()
+        return stats
+    
+    def sync(self):
+        """Push journaled writes, then pull remote changes
+        
+        Firestore errors leave the journal in place for the next attempt.
+        
+        Returns:
+            dict: Outcome -> number of documents, plus "pending" journal entries
+                and "error" if Firestore could not be reached
+        """
+        with self._sync_lock:
+            stats = {}
+            try:
+                for step in (self.push, self.pull):
+                    for outcome, count in step().items():
+                        stats[outcome] = stats.get(outcome, 0) + count
+            except Exception as e:
+                stats["error"] = str(e)
+                console.print(f"[yellow]Sync postponed: {e}[/yellow]")
+            stats["pending"] = self.pending
+            return stats
+    
+    def start(self, interval=30.0):
+        """Sync in a background thread every interval seconds
+        
+        Args:
+            interval (float, optional): Seconds between syncs. Defaults to 30.0.
+        """
+        self._stop.clear()
+        
+        def run():
+            while True:
+                self.sync()
+                if self._stop.wait(interval):
+                    break
+        
+        self._thread = threading.Thread(target=run, name="sync-engine", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop background syncing"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+class SyncedDatabase(Database):
+    """Local database whose writes are synced with Firestore by a SyncEngine
+    
+    Players, guilds and quest progress counters are synced; memberships,
+    archives and questions stay local.
+    """
+    
+    def __init__(self, data_dir="data", use_wal=None, firestore_module=None, device_id=None, batch_size=100):
+        """Initialize the database and its sync engine
+        
+        Args:
+            data_dir (str, optional): Directory for local storage. Defaults to "data".
+            use_wal (bool, optional): Keep players and guilds in the storage engine. Defaults to
+                the EDURPG_STORAGE environment variable being "wal".
+            firestore_module (optional): Stand-in for firebase_admin.firestore. Defaults to the real module.
+            device_id (str, optional): Name of this device in version vectors. Defaults to a random ID.
+            batch_size (int, optional): Documents reconciled per Firestore transaction. Defaults to 100.
+        """
+        super().__init__(use_firebase=False, use_wal=use_wal, data_dir=data_dir)
+        self.sync_engine = None
+        module = firestore_module or firestore
+        if module is None:
+            console.print("[yellow]Firebase is not installed. Sync is disabled.[/yellow]")
+            return
+        try:
+            self.sync_engine = SyncEngine(self, module, device_id, batch_size)
+        except Exception as e:
+            console.print(f"[red]Error starting sync: {e}[/red]")
+    
+    def _write(self, collection, doc_id, write, *args):
+        """Make a local write and journal it, without a sync in between"""
+        if not self.sync_engine:
+            return write(*args)
+        with self.sync_engine.lock:
+            result = write(*args)
+            if result is not None and result is not False:
+                self.sync_engine.record(collection, doc_id)
+            return result
+    
+    def save_player(self, player_data):
+        return self._write("players", player_data["name"], super().save_player, player_data)
+    
+    def delete_player(self, player_id):
+        return self._write("players", player_id, super().delete_player, player_id)
+    
+    def save_guild(self, guild_data, expected_version=None):
+        return self._write("guilds", guild_data["id"], super().save_guild, guild_data, expected_version)
+    
+    def delete_guild(self, guild_id):
+        result = self._write("guilds", guild_id, super().delete_guild, guild_id)
+        if result and self.sync_engine:
+            self.sync_engine.record("counters", guild_id)
+        return result
+    
+    def increment_quest_progress(self, guild_id, quest_id, amount):
+        return self._write("counters", guild_id, super().increment_quest_progress, guild_id, quest_id, amount)
+    
+    def clear_quest_progress(self, guild_id, quest_id):
+        return self._write("counters", guild_id, super().clear_quest_progress, guild_id, quest_id)
+
+
+# For testing
+if __name__ == "__main__":
+    import tempfile
+    
+    from fake_firestore import FakeFirestore
+    from guild import Guild
+    
+    results = []
+    
+    def check(name, ok):
+        results.append(ok)
+        print(f"{'PASS' if ok else 'FAIL'} {name}")
+    
+    def fast(database):
+        # No backoff sleeps, and a breaker that probes again at once
+        database.sync_engine.remote.sleep = lambda seconds: None
+        database.sync_engine.remote.breaker.reset_timeout = 0.0
+        return database
+    
+    cloud = FakeFirestore()
+    with tempfile.TemporaryDirectory() as dir_a, tempfile.TemporaryDirectory() as dir_b:
+        laptop = fast(SyncedDatabase(dir_a, firestore_module=cloud, device_id="laptop"))
+        tablet = fast(SyncedDatabase(dir_b, firestore_module=cloud, device_id="tablet"))
+        
+        guild = Guild("Math Wizards", "Numbers are fun", "ada", "math")
+        guild.add_quest({"id": "q1", "name": "Solve 10", "target": 10, "progress": 0, "xp_reward": 100})
+        laptop.save_guild(guild.to_dict())
+        laptop.save_player({"name": "Ada", "level": 3})
+        laptop.sync_engine.sync()
+        tablet.sync_engine.sync()
+        check("tablet pulls the laptop's guild", tablet.get_guild(guild.id) == laptop.get_guild(guild.id))
+        check("tablet pulls the laptop's player", tablet.get_player("Ada") == {"name": "Ada", "level": 3})
+        
+        # Both devices edit the guild while offline
+        on_laptop = Guild.from_dict(laptop.get_guild(guild.id))
+        on_laptop.add_member("bob")
+        on_laptop.member_xp["bob"] = 50
+        on_laptop.gain_xp(50)
+        on_laptop.add_chat_message("bob", "Bob", "hi", now=1.0)
+        on_laptop.version += 1
+        laptop.save_guild(on_laptop.to_dict(), on_laptop.version - 1)
+        laptop.increment_quest_progress(guild.id, "q1", 3)
+        
+        on_tablet = Guild.from_dict(tablet.get_guild(guild.id))
+        on_tablet.add_member("cy")
+        on_tablet.member_xp["cy"] = 1200
+        on_tablet.gain_xp(1200)
+        on_tablet.add_chat_message("cy", "Cy", "hello", now=2.0)
+        on_tablet.description = "Numbers are great"
+        on_tablet.version += 1
+        tablet.save_guild(on_tablet.to_dict(), on_tablet.version - 1)
+        tablet.increment_quest_progress(guild.id, "q1", 4)
+        
+        laptop.sync_engine.sync()
+        tablet.sync_engine.sync()
+        laptop.sync_engine.sync()
+        merged = tablet.get_guild(guild.id)
+        check("devices converge", laptop.get_guild(guild.id) == merged)
+        check("members from both sides", set(merged["members"]) == {"ada", "bob", "cy"})
+        check("xp increments add up", merged["xp"] == 1250 and merged["member_xp"] == {"bob": 50, "cy": 1200})
+        check("level follows merged xp", merged["level"] == guild_level_for_xp(1250))
+        check("chat keeps both messages", [m["message"] for m in merged["chat_history"]] == ["hi", "hello"])
+        check("one-sided edit kept", merged["description"] == "Numbers are great")
+        check("quest progress increments add up", tablet.get_quest_progress(guild.id) == {"q1": 7}
+              and laptop.get_quest_progress(guild.id) == {"q1": 7})
+        check("merged version is newer than both", merged["version"] > on_laptop.version)
+        
+        # Writes during an outage stay journaled until Firestore is back
+        cloud.fake_client.outage = True
+        laptop.save_player({"name": "Ada", "level": 4})
+        stats = laptop.sync_engine.sync()
+        check("outage keeps the journal", "error" in stats and stats["pending"] == 1)
+        check("reads stay local during the outage", laptop.get_player("Ada")["level"] == 4)
+        cloud.fake_client.outage = False
+        stats = laptop.sync_engine.sync()
+        check("journal drains after the outage", stats["pending"] == 0 and stats.get(PUSHED) == 1)
+        
+        # The journal and version vectors survive a restart
+        laptop.save_player({"name": "Ada", "level": 5})
+        laptop.close()
+        laptop = fast(SyncedDatabase(dir_a, firestore_module=cloud))
+        check("device ID and journal survive a restart",
+              laptop.sync_engine.device_id == "laptop" and laptop.sync_engine.pending == 1)
+        laptop.sync_engine.sync()
+        tablet.sync_engine.sync()
+        check("restarted device pushes its write", tablet.get_player("Ada")["level"] == 5)
+        
+        # Deletes travel as tombstones
+        laptop.delete_player("Ada")
+        laptop.sync_engine.sync()
+        tablet.sync_engine.sync()
+        check("delete propagates", tablet.get_player("Ada") is None
+              and "players/Ada" not in cloud.fake_client.dump())
+        
+        # Batches: many documents over several transactions
+        laptop.sync_engine.batch_size = 7
+        for number in range(30):
+            laptop.save_player({"name": f"P{number}", "level": 1})
+        stats = laptop.sync_engine.sync()
+        tablet.sync_engine.sync()
+        check("batched push", stats.get(PUSHED) == 30 and stats["pending"] == 0
+              and len(tablet.list_players()) == 30)
+        
+        # A local write made while a merge is in flight is folded in, not pulled over
+        laptop.save_player({"name": "Max", "level": 1, "grade": "5"})
+        laptop.sync_engine.sync()
+        tablet.sync_engine.sync()
+        laptop.save_player({"name": "Max", "level": 2, "grade": "5"})
+        tablet.save_player({"name": "Max", "level": 1, "grade": "6"})
+        tablet.sync_engine.sync()
+        resolve = laptop.sync_engine._resolve
+        
+        def resolve_then_write(*args):
+            laptop.save_player({"name": "Max", "level": 3, "grade": "5"})
+            return resolve(*args)
+        
+        laptop.sync_engine._resolve = resolve_then_write
+        laptop.sync_engine.sync()
+        laptop.sync_engine._resolve = resolve
+        laptop.sync_engine.sync()
+        tablet.sync_engine.sync()
+        check("local write during a merge survives",
+              laptop.get_player("Max") == tablet.get_player("Max") == {"name": "Max", "level": 3, "grade": "6"})
+    
+    print(f"{sum(results)}/{len(results)} checks passed")
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+EduRPG - Text-Based Educational RPG
+Full-screen Textual front-end driving the game without blocking prompts
+"""
+
+import time
+
+from rich.panel import Panel
+from textual import work
+from textual.app import App
+from textual.binding import Binding
+from textual.containers import Horizontal, Vertical, VerticalScroll
+from textual.screen import Screen
+from textual.widgets import Button, Footer, Header, Input, Label, ListItem, ListView, Static, TextLog
+
+from chat_hub import ChatHub
+from combat import CombatSystem
+from guild import GuildSystem
+from main import Game
+from player import Player
+
+QUESTION_SECONDS = 30  # Answers after this long score no speed bonus and time out
+GRADES = ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "college"]
+
+
+class StartScreen(Screen):
+    """Character creation, or loading a saved character by name"""
+    
+    def compose(self):
+        yield Header()
+        with Vertical(id="start"):
+            yield Static(self.app.ui.title_banner())
+            yield Input(placeholder="Character name", id="name")
+            yield Input(placeholder=f"Grade ({', '.join(GRADES)})", id="grade")
+            yield Button("Start", variant="primary", id="start-game")
+            yield Label("", id="start-error")
+        yield Footer()
+    
+    def on_input_submitted(self, event):
+        self.start_game()
+    
+    def on_button_pressed(self, event):
+        if event.button.id == "start-game":
+            self.start_game()
+    
+    def start_game(self):
+        name = self.query_one("#name", Input).value.strip()
+        grade = self.query_one("#grade", Input).value.strip().lower()
+        if not name:
+            self.query_one("#start-error", Label).update("[red]Enter a character name[/red]")
+            return
+        if grade not in GRADES:
+            self.query_one("#start-error", Label).update(f"[red]Grade must be one of {', '.join(GRADES)}[/red]")
+            return
+        self.load_player(name, grade)
+    
+    @work(exclusive=True)
+    def load_player(self, name, grade):
+        # Reading a save touches the database, so it runs off the event loop
+        data = self.app.game.db.get_player(name)
+        player = Player.from_dict(data) if data else Player(name, grade)
+        self.app.call_from_thread(self.app.begin, player)
+
+
+class HubScreen(Screen):
+    """Main menu with a live summary of the character"""
+    
+    BINDINGS = [Binding("b", "battle", "Battle"), Binding("c", "character", "Character"),
+                Binding("g", "guild", "Guild"), Binding("s", "save", "Save")]
+    
+    def compose(self):
+        yield Header()
+        with Vertical(id="hub"):
+            yield Static(id="summary")
+            with Horizontal(id="menu"):
+                yield Button("Battle", variant="error", id="battle")
+                yield Button("Character", id="character")
+                yield Button("Guild", id="guild")
+                yield Button("Save", variant="success", id="save")
+                yield Button("Quit", id="quit")
+            yield Label("", id="status")
+        yield Footer()
+    
+    def on_mount(self):
+        self.refresh_summary()
+    
+    def on_screen_resume(self):
+        self.refresh_summary()
+    
+    def refresh_summary(self):
+        player = self.app.game.player
+        self.query_one("#summary", Static).update(Panel(
+            f"[bold]{player.name}[/bold]  Grade {player.grade}  Level {player.level}\n"
+            f"XP {self.app.ui._create_hp_bar(player.xp, player.xp + player.get_xp_to_next_level() or 1)}\n"
+            f"Guild: {player.guild_id or 'None'}",
+            title="[bold]EduRPG[/bold]", border_style="bright_blue"
+        ))
+    
+    async def on_button_pressed(self, event):
+        if event.button.id == "quit":
+            self.app.exit()
+        else:
+            await self.run_action(event.button.id)
+    
+    def action_battle(self):
+        self.app.push_screen(BattleScreen())
+    
+    def action_character(self):
+        self.app.push_screen(CharacterScreen())
+    
+    def action_guild(self):
+        self.app.push_screen(GuildScreen())
+    
+    def action_save(self):
+        self.query_one("#status", Label).update("Saving...")
+        self.save_game()
+    
+    @work(exclusive=True)
+    def save_game(self):
+        saved = self.app.game.db.save_player(self.app.game.player.to_dict())
+        message = "[green]Game saved![/green]" if saved else "[red]Saving failed[/red]"
+        self.app.call_from_thread(self.query_one("#status", Label).update, message)
+
+
+class CharacterScreen(Screen):
+    """Character stats and inventory"""
+    
+    BINDINGS = [Binding("escape", "app.pop_screen", "Back")]
+    
+    def compose(self):
+        yield Header()
+        with VerticalScroll():
+            yield Static(self.app.ui.player_stats_panel(self.app.game.player))
+            yield Static(self.app.ui.inventory_panel(self.app.game.player))
+        yield Footer()
+
+
+class BattleScreen(Screen):
+    """One battle; the countdown and HP bars update while waiting for answers"""
+    
+    BINDINGS = [Binding("escape", "flee", "Flee")]
+    
+    def __init__(self):
+        super().__init__()
+        self.combat = self.app.game.combat
+        self.question = None
+        self._asked_at = None
+    
+    def compose(self):
+        yield Header()
+        with Vertical(id="battle"):
+            yield Static(id="enemy")
+            yield Static(id="hp")
+            yield Static(id="countdown")
+            yield Static(id="question")
+            yield Input(placeholder="Your answer", id="answer")
+            yield TextLog(id="log", markup=True, wrap=True)
+            with Horizontal():
+                yield Button("Next battle", variant="primary", id="next")
+                yield Button("Flee", variant="warning", id="flee")
+        yield Footer()
+    
+    def on_mount(self):
+        self.set_interval(0.1, self.tick)
+        self.start_battle()
+    
+    def start_battle(self):
+        enemy = self.combat.generate_enemy()
+        self.combat.enemy = enemy
+        self.query_one("#enemy", Static).update(Panel(enemy.sprite, title=f"[bold red]{enemy.name}[/bold red]", border_style="red"))
+        self.query_one("#log", TextLog).write(f"[bold red]A wild {enemy.name} appears![/bold red] Subject: [cyan]{enemy.subject.capitalize()}[/cyan]")
+        self.query_one("#next", Button).display = False
+        self.query_one("#answer", Input).disabled = False
+        self.refresh_hp()
+        self.next_question()
+    
+    def next_question(self):
+        self.question = self.combat.ask_question()
+        self._asked_at = time.monotonic()
+        self.query_one("#question", Static).update(Panel(self.question["question"], title="[bold]Question[/bold]", border_style="cyan"))
+        answer = self.query_one("#answer", Input)
+        answer.value = ""
+        answer.focus()
+    
+    def refresh_hp(self):
+        enemy = self.combat.enemy
+        self.query_one("#hp", Static).update(f"[bold]{enemy.name}[/bold] {self.app.ui._create_hp_bar(enemy.hp, enemy.max_hp)}")
+    
+    def tick(self):
+        if self.question is None:
+            return
+        remaining = max(0.0, QUESTION_SECONDS - (time.monotonic() - self._asked_at))
+        self.query_one("#countdown", Static).update(f"[bold]Time[/bold] {self.app.ui._create_hp_bar(int(remaining + 0.999), QUESTION_SECONDS)}")
+        if remaining <= 0:
+            self.resolve("", timed_out=True)
+    
+    def on_input_submitted(self, event):
+        if self.question is not None:
+            self.resolve(event.value)
+    
+    def resolve(self, answer, timed_out=False):
+        log = self.query_one("#log", TextLog)
+        result = self.combat.check_answer(self.question, answer, time.monotonic() - self._asked_at)
+        self.question = None
+        
+        if result["correct"]:
+            damage = self.combat.strike(result["score"])
+            log.write(f"[bold green]Correct! +{result['score']} points, {result['xp_gained']} XP[/bold green] "
+                      f"You dealt {damage} damage!")
+        elif timed_out:
+            log.write(f"[bold red]Time's up! The answer was: {result['answer']}[/bold red]")
+        else:
+            log.write(f"[bold red]Incorrect! The answer was: {result['answer']}[/bold red]")
+        self.refresh_hp()
+        
+        if self.combat.enemy.is_defeated():
+            rewards = self.combat.claim_victory()
+            log.write(f"[bold green]Victory! You defeated the {self.combat.enemy.name}![/bold green] You gained {rewards['xp']} XP.")
+            if rewards["item"]:
+                log.write(f"[cyan]{rewards['item']['name']}[/cyan] dropped: {rewards['item']['description']}")
+            self.query_one("#answer", Input).disabled = True
+            self.query_one("#countdown", Static).update("")
+            next_button = self.query_one("#next", Button)
+            next_button.display = True
+            next_button.focus()
+        else:
+            self.next_question()
+    
+    def on_button_pressed(self, event):
+        if event.button.id == "next":
+            self.start_battle()
+        elif event.button.id == "flee":
+            self.action_flee()
+    
+    def action_flee(self):
+        self.question = None
+        self.app.pop_screen()
+
+
+class GuildScreen(Screen):
+    """Guild browser, or the player's guild with its live chat"""
+    
+    BINDINGS = [Binding("escape", "app.pop_screen", "Back")]
+    
+    def __init__(self):
+        super().__init__()
+        self.guild_system = self.app.game.guild
+        self.subscription = None
+    
+    def compose(self):
+        yield Header()
+        with Vertical(id="guild"):
+            yield Static(id="guild-info")
+            # Browsing
+            yield ListView(id="guild-list")
+            yield Input(placeholder="Name of a new guild", id="new-guild")
+            # Membership
+            yield TextLog(id="chat", markup=True, wrap=True)
+            yield Input(placeholder="Say something to your guild", id="message")
+            yield Label("", id="guild-status")
+        yield Footer()
+    
+    def on_mount(self):
+        self.load()
+    
+    def on_unmount(self):
+        if self.subscription is not None:
+            self.guild_system.chat_hub.unsubscribe(self.subscription)
+    
+    @work(exclusive=True, group="guild-load")
+    def load(self):
+        if self.app.game.player.guild_id:
+            guild = self.guild_system.guild_details()
+            self.app.call_from_thread(self.show_guild, guild)
+        else:
+            guilds, _ = self.guild_system.browse_guilds(limit=20)
+            self.app.call_from_thread(self.show_browser, guilds)
+    
+    def show_browser(self, guilds):
+        self.query_one("#guild-info", Static).update(Panel("Join a guild or found a new one.", title="[bold]Available Guilds[/bold]", border_style="blue"))
+        listing = self.query_one("#guild-list", ListView)
+        listing.clear()
+        for guild in guilds:
+            item = ListItem(Label(f"{guild['name']}  [magenta]{guild['member_count']} members[/magenta]  [yellow]Level {guild['level']}[/yellow]"))
+            item.guild_id = guild["id"]
+            listing.append(item)
+        for widget_id, browsing in (("#guild-list", True), ("#new-guild", True), ("#chat", False), ("#message", False)):
+            self.query_one(widget_id).display = browsing
+    
+    def show_guild(self, guild):
+        if guild is None:
+            self.query_one("#guild-status", Label).update("[red]Guild not found[/red]")
+            return
+        
+        self.query_one("#guild-info", Static).update(Panel(
+            f"{guild['description']}\n\nMembers: {', '.join(guild['members'])}",
+            title=f"[bold]{guild['name']}[/bold] (Level {guild['level']})", border_style="blue"
+        ))
+        chat = self.query_one("#chat", TextLog)
+        chat.clear()
+        for message in guild.get("chat_history", []):
+            chat.write(f"[bold]{message['user_name']}:[/bold] {message['message']}")
+        for widget_id, browsing in (("#guild-list", True), ("#new-guild", True), ("#chat", False), ("#message", False)):
+            self.query_one(widget_id).display = not browsing
+        self.query_one("#message", Input).focus()
+        
+        if self.subscription is None:
+            self.follow_chat()
+    
+    @work(exclusive=True, group="chat")
+    async def follow_chat(self):
+        # Messages are pushed by the chat hub, so the log updates while the player types
+        self.subscription = self.guild_system.subscribe_chat()
+        if self.subscription is None:
+            return
+        chat = self.query_one("#chat", TextLog)
+        async for message in self.subscription:
+            chat.write(f"[bold]{message['user_name']}:[/bold] {message['message']}")
+    
+    def on_list_view_selected(self, event):
+        self.join(event.item.guild_id)
+    
+    def on_input_submitted(self, event):
+        value = event.value.strip()
+        event.input.value = ""
+        if not value:
+            return
+        if event.input.id == "new-guild":
+            self.create(value)
+        elif event.input.id == "message":
+            self.send(value)
+    
+    @work(group="guild-write")
+    def join(self, guild_id):
+        if self.guild_system.join_guild(guild_id):
+            self.app.call_from_thread(self.load)
+        else:
+            self.app.call_from_thread(self.query_one("#guild-status", Label).update, "[red]Could not join that guild[/red]")
+    
+    @work(group="guild-write")
+    def create(self, name):
+        if self.guild_system.new_guild(name, f"{self.app.game.player.name}'s guild"):
+            self.app.call_from_thread(self.load)
+        else:
+            self.app.call_from_thread(self.query_one("#guild-status", Label).update, "[red]Could not create that guild[/red]")
+    
+    @work(group="guild-write")
+    def send(self, message):
+        if not self.guild_system.send_chat_message(message):
+            self.app.call_from_thread(self.query_one("#guild-status", Label).update, "[red]Message not sent[/red]")
+
+
+class EduRPGApp(App):
+    """Textual front-end for EduRPG
+    
+    Drives the same Game, CombatSystem and GuildSystem objects as the
+    terminal version. Database work runs in thread workers and guild chat
+    arrives through the chat hub, so nothing waits on input.
+    """
+    
+    TITLE = "EduRPG"
+    SUB_TITLE = "Learn, Battle, Grow!"
+    CSS = """
+    #start, #hub, #battle, #guild { padding: 1 2; }
+    #start Input, #start Button { width: 60; margin-bottom: 1; }
+    #menu Button { margin-right: 1; }
+    #battle #log { height: 1fr; border: round $accent; }
+    #guild #chat { height: 1fr; border: round $accent; }
+    #guild #guild-list { height: 1fr; }
+    """
+    BINDINGS = [Binding("ctrl+q", "quit", "Quit")]
+    
+    def __init__(self, game=None):
+        """Initialize the app
+        
+        Args:
+            game (Game, optional): Game to drive. Defaults to a new one.
+        """
+        super().__init__()
+        self.game = game or Game()
+        self.ui = self.game.ui  # Formatting helpers shared with the terminal version
+    
+    def on_mount(self):
+        self.push_screen(StartScreen())
+    
+    def begin(self, player):
+        """Start playing as a character
+        
+        Args:
+            player (Player): New or loaded character
+        """
+        self.game.player = player
+        self.game.combat = CombatSystem(player)
+        self.game.guild = GuildSystem(player, self.game.db, chat_hub=ChatHub())
+        self.switch_screen(HubScreen())
+
+
+if __name__ == "__main__":
+    EduRPGApp().run()
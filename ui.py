@@ -4,16 +4,19 @@ EduRPG - Text-Based Educational RPG
 UI module for terminal interface using Rich library
 """
 
-import time
 import random
 from rich.console import Console
 from rich.panel import Panel
 from rich.layout import Layout
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.prompt import Prompt, Confirm
 from rich import box
 from rich.text import Text
+from rich.console import Group
+
+from pacing import get_pacing
+from session import get_session
+from render_cache import RenderCache
 
 console = Console()
 
@@ -23,10 +26,17 @@ class UI:
     Handles terminal interface using Rich library
     """
     
-    def __init__(self):
-        """Initialize the UI"""
+    def __init__(self, session=None):
+        """Initialize the UI
+        
+        Args:
+            session (Session, optional): Source of player input. Defaults to the shared session.
+        """
+        self.session = session or get_session()
         self.console = Console()
         self.width = 80  # Default width for panels and tables
+        self.render_cache = RenderCache(self.console)
+        self.pacing = get_pacing()  # Decides how long pauses last
     
     def clear(self):
         """Clear the console"""
@@ -43,6 +53,18 @@ class UI:
     
     def display_title(self):
         """Display the game title"""
+        self.console.print(self.title_banner())
+        self.console.print()
+    
+    def title_banner(self):
+        """Get the title banner
+        
+        Returns:
+            Renderable: Banner with the game title and tagline
+        """
+        return self.render_cache.static("title", self._build_title)
+    
+    def _build_title(self):
         title_art = """
         ______    _       _____  _____   _____  
        |  ____|  | |     |  __ \|  __ \ / ____| 
@@ -54,9 +76,10 @@ class UI:
         [bold cyan]Educational Role-Playing Game[/bold cyan]
         """
         
-        self.console.print(Panel(title_art, border_style="bright_blue", width=self.width))
-        self.console.print("[italic]Learn, Battle, Grow![/italic]", justify="center")
-        self.console.print()
+        return Group(
+            Panel(title_art, border_style="bright_blue", width=self.width),
+            Text.from_markup("[italic]Learn, Battle, Grow![/italic]", justify="center")
+        )
     
     def display_menu(self, title, options):
         """Display a menu and get user choice
@@ -68,16 +91,12 @@ class UI:
         Returns:
             int: Selected option index (0-based)
         """
-        self.console.print(Panel(f"[bold]{title}[/bold]", border_style="cyan", width=self.width))
-        
-        for i, option in enumerate(options, 1):
-            self.console.print(f"  [cyan]{i}.[/cyan] {option}")
-        
+        self.console.print(self._menu_frame(title, options))
         self.console.print()
         
         # Get user choice
         while True:
-            choice = Prompt.ask("Enter your choice", console=self.console)
+            choice = self.session.ask("Enter your choice", console=self.console)
             try:
                 choice_num = int(choice)
                 if 1 <= choice_num <= len(options):
@@ -87,6 +106,66 @@ class UI:
             except ValueError:
                 self.console.print("[red]Please enter a valid number[/red]")
     
+    def _menu_frame(self, title, options):
+        return self.render_cache.static(("menu", title, tuple(options)), lambda: Group(
+            Panel(f"[bold]{title}[/bold]", border_style="cyan", width=self.width),
+            *[Text.from_markup(f"  [cyan]{i}.[/cyan] {option}") for i, option in enumerate(options, 1)]
+        ))
+    
+    def display_main_menu(self):
+        """Display the main menu
+        
+        Returns:
+            str: "new_game", "load_game", "guild", "help" or "exit"
+        """
+        keys = ["new_game", "load_game", "guild", "help", "exit"]
+        return keys[self.display_menu("Main Menu", ["New Game", "Load Game", "Guild", "Help", "Exit"])]
+    
+    def display_game_menu(self, player):
+        """Display the in-game menu
+        
+        Args:
+            player (Player): Player object
+            
+        Returns:
+            str: "battle", "profile", "guild", "save" or "main_menu"
+        """
+        keys = ["battle", "profile", "guild", "save", "main_menu"]
+        title = f"{player.name} - Level {player.level}"
+        return keys[self.display_menu(title, ["Battle", "Profile", "Guild", "Save Game", "Main Menu"])]
+    
+    def select_option(self, title, options):
+        """Display a menu and get the chosen option
+        
+        Args:
+            title (str): Menu title
+            options (list): List of menu options
+            
+        Returns:
+            str: Selected option
+        """
+        return options[self.display_menu(title, options)]
+    
+    def display_profile(self, player):
+        """Display player stats and inventory
+        
+        Args:
+            player (Player): Player object
+        """
+        self.display_player_stats(player)
+        self.display_inventory(player)
+    
+    def display_help(self):
+        """Display how to play"""
+        self.console.print(self.render_cache.static("help", lambda: Panel(
+            "Battle enemies by answering questions about their subject.\n"
+            "Correct answers deal damage; faster answers score more.\n"
+            "Winning earns XP that raises your level and subject traits,\n"
+            "and enemies may drop items that boost your traits and damage.\n"
+            "Join a guild to take on quests and chat with classmates.",
+            title="[bold]How to Play[/bold]", border_style="cyan", width=self.width
+        )))
+    
     def get_input(self, prompt_text, default=None):
         """Get user input
         
@@ -97,7 +176,7 @@ class UI:
         Returns:
             str: User input
         """
-        return Prompt.ask(prompt_text, console=self.console, default=default)
+        return self.session.ask(prompt_text, default=default, console=self.console)
     
     def get_confirmation(self, prompt_text):
         """Get user confirmation
@@ -108,7 +187,7 @@ class UI:
         Returns:
             bool: True if confirmed, False otherwise
         """
-        return Confirm.ask(prompt_text, console=self.console)
+        return self.session.confirm(prompt_text, console=self.console)
     
     def display_player_creation(self):
         """Display player creation screen and get player info
@@ -142,7 +221,7 @@ class UI:
                 self.console.print("[red]Please enter a valid number[/red]")
         
         self.console.print(f"\n[green]Character created: [bold]{name}[/bold] (Grade {grade})[/green]")
-        time.sleep(1.5)
+        self.pacing.pause(1.5)
         
         return {"name": name, "grade": grade}
     
@@ -152,29 +231,41 @@ class UI:
         Args:
             player (Player): Player object
         """
-        # Create a table for player stats
-        table = Table(box=box.ROUNDED, width=self.width-4)
-        table.add_column("Attribute", style="cyan")
-        table.add_column("Value", style="green")
+        self.console.print(self.player_stats_panel(player))
+    
+    def player_stats_panel(self, player):
+        """Build the player stats panel
+        
+        Args:
+            player (Player): Player object
+            
+        Returns:
+            Renderable: Stats panel
+        """
+        # Rows are compared with the last frame and only changed ones re-rendered
+        table = self.render_cache.table(
+            "player_stats",
+            [("Attribute", "cyan", 20), ("Value", "green", self.width - 31)],
+            panel={"title": "[bold]Character Stats[/bold]", "border_style": "bright_blue", "width": self.width},
+            table_box=box.ROUNDED
+        )
         
         # Add basic info
-        table.add_row("Name", player.name)
-        table.add_row("Grade", player.grade)
-        table.add_row("Level", str(player.level))
-        table.add_row("XP", f"{player.xp}/{player.xp_to_next_level}")
+        rows = [
+            ("Name", player.name),
+            ("Grade", player.grade),
+            ("Level", str(player.level)),
+            ("XP", f"{player.xp}/{player.xp + player.get_xp_to_next_level()}")
+        ]
         
         # Add traits
         for trait, value in player.traits.items():
-            table.add_row(f"{trait.capitalize()} Trait", str(value))
+            rows.append((f"{trait.capitalize()} Trait", str(value)))
         
         # Add guild info if applicable
-        if player.guild_id:
-            table.add_row("Guild", player.guild_id)
-        else:
-            table.add_row("Guild", "None")
+        rows.append(("Guild", player.guild_id or "None"))
         
-        # Display the table in a panel
-        self.console.print(Panel(table, title="[bold]Character Stats[/bold]", border_style="bright_blue", width=self.width))
+        return table.render(rows)
     
     def display_inventory(self, player):
         """Display player inventory
@@ -182,21 +273,54 @@ class UI:
         Args:
             player (Player): Player object
         """
+        self.console.print(self.inventory_panel(player))
+    
+    def inventory_panel(self, player):
+        """Build the inventory panel
+        
+        Args:
+            player (Player): Player object
+            
+        Returns:
+            Renderable: Inventory panel
+        """
         if not player.inventory:
-            self.console.print(Panel("Your inventory is empty.", title="[bold]Inventory[/bold]", border_style="yellow", width=self.width))
-            return
+            return Panel("Your inventory is empty.", title="[bold]Inventory[/bold]", border_style="yellow", width=self.width)
         
+        rows = tuple((item["name"], item["description"], self._format_effect(item["effect"]), str(quantity))
+                     for item, quantity in player.inventory)
+        return self.render_cache.static(("inventory", rows), lambda: self._build_inventory(rows))
+    
+    def _build_inventory(self, rows):
         # Create a table for inventory
         table = Table(box=box.SIMPLE, width=self.width-4)
         table.add_column("Item", style="cyan")
         table.add_column("Description", style="green")
         table.add_column("Effect", style="magenta")
+        table.add_column("Qty", style="white", justify="right")
         
-        for item in player.inventory:
-            table.add_row(item["name"], item["description"], item["effect"])
+        for row in rows:
+            table.add_row(*row)
         
-        # Display the table in a panel
-        self.console.print(Panel(table, title="[bold]Inventory[/bold]", border_style="yellow", width=self.width))
+        return Panel(table, title="[bold]Inventory[/bold]", border_style="yellow", width=self.width)
+    
+    def _format_effect(self, effect):
+        """Format an item effect for display
+        
+        Args:
+            effect (Mapping): Item effect
+            
+        Returns:
+            str: Readable effect description
+        """
+        parts = []
+        for trait, bonus in effect.get("trait_bonus", {}).items():
+            parts.append(f"+{bonus} {trait.capitalize()}")
+        if "damage_bonus" in effect:
+            parts.append(f"+{effect['damage_bonus']} damage")
+        if "xp_bonus" in effect:
+            parts.append(f"+{effect['xp_bonus']:.0%} XP")
+        return ", ".join(parts) or "-"
     
     def display_skills(self, player):
         """Display player skills
@@ -228,11 +352,11 @@ class UI:
         """
         self.clear()
         
-        # Display enemy encounter message
-        self.console.print(Panel(f"[bold red]A wild {enemy.name} appears![/bold red]", border_style="red", width=self.width))
-        
-        # Display enemy sprite
-        self.console.print(Panel(enemy.sprite, border_style="red", width=self.width))
+        # Display enemy encounter message and sprite
+        self.console.print(self.render_cache.static(("encounter", enemy.name, enemy.sprite), lambda: Group(
+            Panel(f"[bold red]A wild {enemy.name} appears![/bold red]", border_style="red", width=self.width),
+            Panel(enemy.sprite, border_style="red", width=self.width)
+        )))
         
         # Display enemy info
         self.console.print(f"[bold]Subject:[/bold] {enemy.subject}")
@@ -240,9 +364,9 @@ class UI:
         self.console.print()
         
         # Dramatic pause
-        time.sleep(1)
+        self.pacing.pause(1)
         self.console.print("[bold yellow]Prepare for battle![/bold yellow]")
-        time.sleep(1)
+        self.pacing.pause(1)
     
     def display_question(self, question):
         """Display a question and get user answer
@@ -295,7 +419,7 @@ class UI:
             
             self.console.print(Panel(panel_content, border_style="red", width=self.width))
         
-        time.sleep(1.5)
+        self.pacing.pause(1.5)
     
     def display_combat_status(self, player_hp, enemy_hp, enemy_name):
         """Display combat status
@@ -305,16 +429,16 @@ class UI:
             enemy_hp (int): Enemy HP
             enemy_name (str): Enemy name
         """
-        # Create a table for combat status
-        table = Table(box=box.SIMPLE, width=self.width-4)
-        table.add_column("Combatant", style="cyan")
-        table.add_column("HP", style="green")
-        
-        table.add_row("You", self._create_hp_bar(player_hp, 100))
-        table.add_row(enemy_name, self._create_hp_bar(enemy_hp, enemy_hp if enemy_hp > 0 else 100))
-        
-        # Display the table in a panel
-        self.console.print(Panel(table, title="[bold]Combat Status[/bold]", border_style="red", width=self.width))
+        # Only the HP rows that changed since the last frame are re-rendered
+        table = self.render_cache.table(
+            "combat_status",
+            [("Combatant", "cyan", 24), ("HP", "green", self.width - 35)],
+            panel={"title": "[bold]Combat Status[/bold]", "border_style": "red", "width": self.width}
+        )
+        self.console.print(table.render([
+            ("You", self._create_hp_bar(player_hp, 100)),
+            (enemy_name, self._create_hp_bar(enemy_hp, enemy_hp if enemy_hp > 0 else 100))
+        ]))
     
     def _create_hp_bar(self, current, maximum, width=30):
         """Create an HP bar
@@ -364,7 +488,7 @@ class UI:
         else:
             self.console.print(Panel("[bold red]Defeat![/bold red]\n\nDon't worry, you can try again!", border_style="red", width=self.width))
         
-        time.sleep(2)
+        self.pacing.pause(2)
     
     def display_level_up(self, new_level, trait_increases=None):
         """Display level up screen
@@ -382,20 +506,24 @@ class UI:
             
             self.console.print(Panel(traits_text, border_style="cyan", width=self.width))
         
-        time.sleep(2)
+        self.pacing.pause(2)
     
-    def display_guild_list(self, guilds):
-        """Display list of guilds
+    def display_guild_list(self, guilds, has_next=False):
+        """Display one page of guilds
         
         Args:
-            guilds (list): List of guild dictionaries
+            guilds (list): List of guild summary dictionaries for this page
+            has_next (bool, optional): Whether a next page exists. Defaults to False.
             
         Returns:
-            int: Selected guild index, or -1 to create new guild, or -2 to cancel
+            int: Selected guild index, -1 to create new guild, -2 to cancel
+                or -3 for the next page
         """
         self.clear()
         
-        self.console.print(Panel("[bold]Available Guilds[/bold]", border_style="blue", width=self.width))
+        self.console.print(self.render_cache.static("guild_list_header", lambda: Panel(
+            "[bold]Available Guilds[/bold]", border_style="blue", width=self.width
+        )))
         
         if not guilds:
             self.console.print("No guilds available. Create a new one!")
@@ -406,25 +534,13 @@ class UI:
                 return -2  # Cancel
         
         # Display guild list
-        table = Table(box=box.SIMPLE, width=self.width-4)
-        table.add_column("#", style="cyan")
-        table.add_column("Name", style="green")
-        table.add_column("Members", style="magenta")
-        table.add_column("Level", style="yellow")
-        
-        for i, guild in enumerate(guilds, 1):
-            table.add_row(
-                str(i),
-                guild["name"],
-                str(len(guild["members"])),
-                str(guild["level"])
-            )
-        
-        self.console.print(table)
+        self.console.print(self._guild_table(guilds))
         self.console.print()
         
         # Options
         self.console.print("[cyan]0.[/cyan] Create a new guild")
+        if has_next:
+            self.console.print("[cyan]N.[/cyan] Next page")
         self.console.print("[cyan]C.[/cyan] Cancel")
         self.console.print()
         
@@ -434,6 +550,8 @@ class UI:
             
             if choice == "c":
                 return -2  # Cancel
+            if choice == "n" and has_next:
+                return -3  # Next page
             
             try:
                 choice_num = int(choice)
@@ -446,6 +564,25 @@ class UI:
             except ValueError:
                 self.console.print("[red]Please enter a valid number or 'C' to cancel[/red]")
     
+    def _guild_table(self, guilds):
+        rows = tuple(
+            (str(i), guild["name"], str(guild["member_count"]), str(guild["level"]))
+            for i, guild in enumerate(guilds, 1)
+        )
+        return self.render_cache.static(("guild_list", rows), lambda: self._build_guild_table(rows))
+    
+    def _build_guild_table(self, rows):
+        table = Table(box=box.SIMPLE, width=self.width-4)
+        table.add_column("#", style="cyan")
+        table.add_column("Name", style="green")
+        table.add_column("Members", style="magenta")
+        table.add_column("Level", style="yellow")
+        
+        for row in rows:
+            table.add_row(*row)
+        
+        return table
+    
     def display_guild_creation(self):
         """Display guild creation screen and get guild info
         
@@ -460,7 +597,7 @@ class UI:
         description = self.get_input("Enter guild description")
         
         self.console.print(f"\n[green]Guild created: [bold]{name}[/bold][/green]")
-        time.sleep(1.5)
+        self.pacing.pause(1.5)
         
         return {"name": name, "description": description}
     
@@ -543,9 +680,7 @@ class UI:
             transient=True,
         ) as progress:
             task = progress.add_task(message, total=100)
-            for _ in range(100):
-                time.sleep(duration / 100)
-                progress.update(task, advance=1)
+            self.pacing.animate(duration, lambda fraction: progress.update(task, completed=fraction * 100)).wait()
 
 
 # For testing
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import '../styles/Combat.css';
-import { getQuestionsByDifficulty } from '../supabase';
+import { getQuestionPools } from '../supabase';
 
 function getRandom(arr) {
   return arr[Math.floor(Math.random() * arr.length)];
@@ -32,9 +32,7 @@ function Combat() {
     async function loadQuestions() {
       try {
         setLoading(true);
-        const easyQuestions = await getQuestionsByDifficulty('easy');
-        const mediumQuestions = await getQuestionsByDifficulty('medium');
-        const hardQuestions = await getQuestionsByDifficulty('hard');
+        const { easy: easyQuestions, medium: mediumQuestions, hard: hardQuestions } = await getQuestionPools();
         
         if (!easyQuestions?.length || !mediumQuestions?.length || !hardQuestions?.length) {
           console.error('Failed to load questions:', { easy: easyQuestions?.length, medium: mediumQuestions?.length, hard: hardQuestions?.length });
@@ -23,6 +23,30 @@ export async function getQuestionsByDifficulty(difficulty) {
   return data;
 }
 
+// Fetch the easy, medium and hard pools together. With a question server
+// configured this is one request, revalidated with its ETag on later loads.
+export async function getQuestionPools() {
+  const questionApi = process.env.REACT_APP_QUESTION_API;
+  if (questionApi) {
+    try {
+      const response = await fetch(`${questionApi}/questions/pools?difficulties=easy,medium,hard`, { cache: 'no-cache' });
+      if (response.ok) {
+        return await response.json();
+      }
+      console.error('Error fetching question pools:', response.status);
+    } catch (error) {
+      console.error('Error fetching question pools:', error);
+    }
+  }
+
+  const [easy, medium, hard] = await Promise.all([
+    getQuestionsByDifficulty('easy'),
+    getQuestionsByDifficulty('medium'),
+    getQuestionsByDifficulty('hard')
+  ]);
+  return { easy, medium, hard };
+}
+
 export async function addQuestion(question) {
   const { data, error } = await supabase
     .from('questions')